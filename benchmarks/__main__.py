@@ -0,0 +1,10 @@
+"""
+python -m benchmarks  (same as 'djcli bench')
+"""
+
+import sys
+
+from benchmarks.runner import main
+
+if __name__ == "__main__":
+    sys.exit(main())
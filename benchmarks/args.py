@@ -0,0 +1,21 @@
+"""
+benchmarks/args.py
+
+Command-line arguments of 'djcli bench'. Kept apart from the runner so the
+CLI can build its parser without importing the benchmark stages.
+"""
+
+from config.settings import BENCH_BASELINE_FILE, BENCH_REGRESSION_THRESHOLD
+
+
+def add_bench_arguments(parser):
+    parser.add_argument("--list", action="store_true", help="List the stages and exit.")
+    parser.add_argument("--stages", help="Comma-separated stages to run (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (default: 3).")
+    parser.add_argument("--items", type=int, default=200, help="Files per stage (default: 200).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic inputs.")
+    parser.add_argument("--baseline", help=f"Baseline JSON (default: {BENCH_BASELINE_FILE}).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=BENCH_REGRESSION_THRESHOLD,
+                        help=f"Regression threshold in percent (default: {BENCH_REGRESSION_THRESHOLD:g}).")
+    parser.add_argument("--json", dest="json_out", help="Also write this run's results to a JSON file.")
@@ -0,0 +1,69 @@
+"""
+benchmarks/fixtures.py
+
+Small synthetic inputs for the benchmark stages: valid (silent) MP3s and
+photo-sized images, generated from a seed so every run measures the same
+bytes.
+"""
+
+import os
+import random
+
+from PIL import Image
+
+# One MPEG-1 Layer III frame, 128 kbps / 44.1 kHz (~26 ms of silence).
+MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+
+
+def write_mp3(path, frames=40):
+    """
+    Writes an untagged MP3 of 'frames' frames. Returns the path.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(MP3_FRAME * frames)
+    return path
+
+
+def noise_bytes(rng, count):
+    """
+    'count' random bytes from a seeded random.Random.
+    """
+    return rng.getrandbits(8 * count).to_bytes(count, "little")
+
+
+def write_image(path, size=(1200, 800), seed=0):
+    """
+    Writes a JPEG with a seeded gradient and noise, roughly like a photo.
+    Returns the path.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    base = Image.linear_gradient("L").resize(size).convert("RGB")
+    tint = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.frombytes("L", size, noise_bytes(rng, size[0] * size[1])).convert("RGB")
+    img = Image.blend(Image.blend(base, tint, 0.5), noise, 0.2)
+    img.save(path, "JPEG", quality=85)
+    return path
+
+
+def make_tracks(folder, count, frames=40, name="Track {i:05d}.mp3"):
+    return [write_mp3(os.path.join(folder, name.format(i=i)), frames) for i in range(count)]
+
+
+def make_dated_mixes(folder, count, frames=40, start_year=2020):
+    """
+    Mix files named like 'Mix 0001 - 2020-01-01.mp3', one per day.
+    """
+    paths = []
+    for i in range(count):
+        day = 1 + i % 28
+        month = 1 + (i // 28) % 12
+        year = start_year + i // (28 * 12)
+        name = f"Mix {i + 1:04d} - {year}-{month:02d}-{day:02d}.mp3"
+        paths.append(write_mp3(os.path.join(folder, name), frames))
+    return paths
+
+
+def make_images(folder, count, size=(1200, 800), seed=0):
+    return [write_image(os.path.join(folder, f"photo_{i:04d}.jpg"), size, seed + i) for i in range(count)]
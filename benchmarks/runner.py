@@ -0,0 +1,260 @@
+"""
+benchmarks/runner.py
+
+Runs the benchmark stages (see benchmarks/stages.py), reports per-stage
+timings and peak memory, and compares them with a stored JSON baseline.
+
+- Every stage runs once untimed (warm-up), then 'repeat' timed runs; the
+  median is what gets compared. Memory is measured in one extra run with
+  tracemalloc (peak Python-level allocations; memory allocated inside C
+  libraries such as Pillow isn't counted), or for subprocess stages from
+  the OS (peak RSS of the child), so it doesn't skew the timings.
+- A stage is flagged when its median time or peak memory exceeds the
+  baseline by more than 'threshold' percent (tiny absolute changes are
+  ignored as noise).
+
+Usage:
+    djcli bench [--stages id3_write,organize_moves] [--save-baseline]
+    python -m benchmarks --list
+"""
+
+import io
+import os
+import json
+import time
+import shutil
+import platform
+import argparse
+import datetime
+import tempfile
+import statistics
+import tracemalloc
+from contextlib import redirect_stdout
+
+from config.settings import BENCH_BASELINE_FILE, BENCH_REGRESSION_THRESHOLD
+from core.color_utils import MSG_ERROR, MSG_NOTICE, MSG_STATUS, MSG_SUCCESS, MSG_WARNING
+from benchmarks.args import add_bench_arguments
+from benchmarks.stages import STAGES, SkipStage
+
+BASELINE_VERSION = 1
+# Differences smaller than these are noise, whatever the percentage.
+MIN_TIME_DELTA = 0.002
+MIN_MEMORY_DELTA_KB = 256
+
+
+class BenchContext:
+    """
+    Scratch folder and sizing shared by the stages of one run.
+    """
+
+    def __init__(self, workdir, items=200, seed=0):
+        self.workdir = workdir
+        self.items = items
+        self.seed = seed
+
+    def path(self, name):
+        folder = os.path.join(self.workdir, name)
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+
+def measure(workload, repeat=3):
+    """
+    Times workload.run() and measures its memory. Returns a result dict.
+    """
+    times = []
+    try:
+        with redirect_stdout(io.StringIO()):
+            for attempt in range(repeat + 1):
+                workload.setup()
+                started = time.perf_counter()
+                workload.run()
+                if attempt:  # the first run is the warm-up
+                    times.append(time.perf_counter() - started)
+
+            workload.setup()
+            if workload.child:
+                peak_kb, memory = workload.run(), "child_rss"
+            else:
+                tracemalloc.start()
+                try:
+                    workload.run()
+                    peak_kb, memory = tracemalloc.get_traced_memory()[1] // 1024, "python_peak"
+                finally:
+                    tracemalloc.stop()
+    finally:
+        workload.teardown()
+
+    median = statistics.median(times)
+    return {
+        "items": workload.items,
+        "repeat": repeat,
+        "median": round(median, 6),
+        "min": round(min(times), 6),
+        "mean": round(statistics.mean(times), 6),
+        "per_item": round(median / max(1, workload.items), 6),
+        "peak_kb": peak_kb,
+        "memory": memory
+    }
+
+
+def run_benchmarks(names=None, repeat=3, items=200, seed=0, workdir=None):
+    """
+    Runs the named stages (all by default). Returns {name: result}; a
+    skipped or failed stage has {"skipped": reason} or {"error": message}.
+    """
+    names = names or list(STAGES)
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(unknown)}")
+
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="djcli-bench-")
+    results = {}
+    try:
+        ctx = BenchContext(workdir, items=items, seed=seed)
+        for name in names:
+            description, factory = STAGES[name]
+            print(f"{MSG_STATUS}Running {name}: {description}")
+            try:
+                with redirect_stdout(io.StringIO()):
+                    workload = factory(ctx)
+                results[name] = measure(workload, repeat)
+            except SkipStage as e:
+                print(f"{MSG_NOTICE}Skipped {name}: {e}")
+                results[name] = {"skipped": str(e)}
+            except Exception as e:
+                print(f"{MSG_ERROR}{name} failed: {e}")
+                results[name] = {"error": str(e)}
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def load_baseline(path=None):
+    """
+    Stored results by stage name, or {} if there is no usable baseline.
+    """
+    path = path or BENCH_BASELINE_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"{MSG_WARNING}Could not read benchmark baseline {path}: {e}")
+        return {}
+    if data.get("version") != BASELINE_VERSION:
+        print(f"{MSG_WARNING}Ignoring benchmark baseline {path} (format version {data.get('version')}).")
+        return {}
+    return data.get("stages", {})
+
+
+def save_baseline(results, path=None):
+    """
+    Writes the measured stages as the new baseline (atomically).
+    """
+    path = path or BENCH_BASELINE_FILE
+    data = {
+        "version": BASELINE_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": {name: r for name, r in results.items() if "median" in r}
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _grew(current, base, threshold, min_delta):
+    if current is None or not base:
+        return None
+    change = (current - base) / base * 100
+    return change if change > threshold and current - base > min_delta else None
+
+
+def compare_to_baseline(results, baseline, threshold=BENCH_REGRESSION_THRESHOLD):
+    """
+    Returns a list of (stage, metric, baseline value, current value,
+    percent change) for every regression beyond 'threshold' percent.
+    Items counts must match; stages measured at another size are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if "median" not in result or not base or base.get("items") != result["items"]:
+            continue
+        change = _grew(result["median"], base.get("median"), threshold, MIN_TIME_DELTA)
+        if change is not None:
+            regressions.append((name, "time", base["median"], result["median"], change))
+        if base.get("memory") == result["memory"]:
+            change = _grew(result["peak_kb"], base.get("peak_kb"), threshold, MIN_MEMORY_DELTA_KB)
+            if change is not None:
+                regressions.append((name, "memory", base["peak_kb"], result["peak_kb"], change))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    baseline = baseline or {}
+    print(f"{'stage':<18} {'items':>6} {'median':>10} {'per item':>10} {'peak mem':>10} {'vs base':>8}")
+    for name, r in results.items():
+        if "median" not in r:
+            print(f"{name:<18} {r.get('skipped') or r.get('error')}")
+            continue
+        base = baseline.get(name, {})
+        versus = ""
+        if base.get("median") and base.get("items") == r["items"]:
+            versus = f"{(r['median'] - base['median']) / base['median'] * 100:+.0f}%"
+        memory = f"{r['peak_kb'] / 1024:.1f} MB" if r["peak_kb"] is not None else "n/a"
+        print(
+            f"{name:<18} {r['items']:>6} {r['median'] * 1000:>8.1f}ms "
+            f"{r['per_item'] * 1000:>8.2f}ms {memory:>10} {versus:>8}"
+        )
+
+
+def main(argv=None):
+    """
+    Entry point for 'djcli bench' and 'python -m benchmarks'.
+    Returns 1 if a regression was found, else 0.
+    """
+    parser = argparse.ArgumentParser(prog="djcli bench", description="Benchmark the djcli pipelines.")
+    add_bench_arguments(parser)
+    return run_from_args(parser.parse_args(argv))
+
+
+def run_from_args(args):
+    if args.list:
+        for name, (description, _) in STAGES.items():
+            print(f"{name:<18} {description}")
+        return 0
+
+    names = [n.strip() for n in args.stages.split(",") if n.strip()] if args.stages else None
+    try:
+        results = run_benchmarks(names, repeat=max(1, args.repeat), items=max(1, args.items), seed=args.seed)
+    except ValueError as e:
+        print(f"{MSG_ERROR}{e}")
+        return 2
+
+    baseline = load_baseline(args.baseline)
+    print_report(results, baseline)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for name, metric, before, after, change in regressions:
+        unit = "s" if metric == "time" else " KB"
+        print(f"{MSG_WARNING}Regression in {name} ({metric}): {before}{unit} -> {after}{unit} ({change:+.0f}%)")
+    if not baseline:
+        print(f"{MSG_NOTICE}No baseline to compare against; use --save-baseline to store this run.")
+    elif not regressions:
+        print(f"{MSG_SUCCESS}No regressions beyond {args.threshold:g}%.")
+
+    if args.save_baseline:
+        print(f"{MSG_SUCCESS}Baseline saved to {save_baseline(results, args.baseline)}")
+    return 1 if regressions else 0
@@ -0,0 +1,274 @@
+"""
+benchmarks/stages.py
+
+The pipeline stages 'djcli bench' measures. Each stage builds its inputs
+in the run's scratch folder and returns a Workload; only Workload.run is
+timed (setup runs before every repetition, outside the timer).
+"""
+
+import os
+import sys
+import glob
+import shutil
+import datetime
+import subprocess
+from unittest import mock
+
+from config.settings import BENCH_FONT_PATH, CONFIGURATIONS
+from benchmarks.fixtures import make_dated_mixes, make_images, make_tracks, write_mp3
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_DIRS = (
+    "/usr/share/fonts", "/usr/local/share/fonts", "/Library/Fonts",
+    "/System/Library/Fonts", os.path.expanduser("~/Library/Fonts"), "C:\\Windows\\Fonts"
+)
+
+STAGES = {}
+
+
+class Workload:
+    """
+    What a stage measures: run() is timed, setup() runs untimed before each
+    repetition, teardown() once at the end. 'items' is how many units
+    (files, images, ...) one run() handles; 'child' marks work done in a
+    subprocess, whose run() returns the child's peak RSS in KB (or None)
+    instead of memory being traced in this process.
+    """
+
+    def __init__(self, run, items=1, setup=None, teardown=None, child=False):
+        self.run = run
+        self.items = items
+        self.setup = setup or (lambda: None)
+        self.teardown = teardown or (lambda: None)
+        self.child = child
+
+
+class SkipStage(Exception):
+    """
+    The stage can't run on this machine (e.g. no font to render with).
+    """
+
+
+def stage(name, description):
+    def register(factory):
+        STAGES[name] = (description, factory)
+        return factory
+    return register
+
+
+def _child_env(home):
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def _run_python(args, home):
+    """
+    Runs the interpreter with 'args'. Returns its peak RSS in KB where the
+    OS reports it per process (os.wait4), else None.
+    """
+    proc = subprocess.Popen(
+        [sys.executable] + args, cwd=PROJECT_ROOT, env=_child_env(home),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    if not hasattr(os, "wait4"):
+        if proc.wait():
+            raise subprocess.CalledProcessError(proc.returncode, args)
+        return None
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+@stage("cli_startup", "djcli --help in a fresh interpreter")
+def cli_startup(ctx):
+    home = ctx.path("home")
+    return Workload(lambda: _run_python(["-m", "cli.main", "--help"], home), child=True)
+
+
+@stage("settings_load", "import config.settings in a fresh interpreter")
+def settings_load(ctx):
+    home = ctx.path("home")
+    return Workload(lambda: _run_python(["-c", "import config.settings"], home), child=True)
+
+
+def find_font():
+    if BENCH_FONT_PATH and os.path.exists(BENCH_FONT_PATH):
+        return BENCH_FONT_PATH
+    for config in CONFIGURATIONS.values():
+        if os.path.exists(config.get("font_path", "")):
+            return config["font_path"]
+    for folder in FONT_DIRS:
+        fonts = sorted(glob.glob(os.path.join(folder, "**", "*.tt[fc]"), recursive=True))
+        if fonts:
+            return fonts[0]
+    return None
+
+
+@stage("cover_render", "create_album_cover per image")
+def cover_render(ctx):
+    from modules.covers.create_album_cover import create_album_cover
+
+    font = find_font()
+    if not font:
+        raise SkipStage("no TrueType font found (set BENCH_FONT_PATH)")
+    config = dict(next(iter(CONFIGURATIONS.values()), {}))
+    config.update({"font_path": font, "logo_path": ""})
+    config.setdefault("active_flag", "CUE_CLUB_ARCHIVE")
+    config.setdefault("subheading_text_1", "Cue Club\n  Archive")
+    config.setdefault("subheading_text_2", "DJCLI")
+    config.setdefault("main_text_template", "{mix_number}")
+
+    count = max(1, ctx.items // 10)
+    images = make_images(ctx.path("cover_in"), count, seed=ctx.seed)
+    out_dir = ctx.path("cover_out")
+
+    def run():
+        for i, image in enumerate(images, 1):
+            create_album_cover(config, image, i, os.path.join(out_dir, f"cover_{i}.jpg"))
+    return Workload(run, items=count)
+
+
+@stage("id3_write", "update_id3_tags on tiny MP3s")
+def id3_write(ctx):
+    from core.metadata_utils import update_id3_tags
+
+    tracks = make_tracks(ctx.path("id3"), ctx.items)
+
+    def run():
+        for i, path in enumerate(tracks):
+            update_id3_tags(path, f"Artist {i % 50}", f"Title {i}", "2024", "House")
+    return Workload(run, items=len(tracks))
+
+
+@stage("cover_embed", "attach_cover_to_mp3 with a normalized JPEG")
+def cover_embed(ctx):
+    from core.cover_utils import attach_cover_to_mp3, normalize_cover
+    from core.metadata_utils import update_id3_tags
+
+    tracks = make_tracks(ctx.path("embed"), ctx.items)
+    for path in tracks:
+        update_id3_tags(path, "Artist", "Title", "2024", "House")
+    image = make_images(ctx.path("embed_cover"), 1, seed=ctx.seed)[0]
+    with open(image, "rb") as f:
+        cover = normalize_cover(f.read())
+
+    def run():
+        for path in tracks:
+            attach_cover_to_mp3(path, cover)
+    return Workload(run, items=len(tracks))
+
+
+def _move_workload(ctx, name, cross_device):
+    from core.move_engine import move_files
+
+    src_dir, dest_dir = ctx.path(f"{name}_src"), ctx.path(f"{name}_pool")
+    originals = make_tracks(ctx.path(f"{name}_originals"), ctx.items, frames=400)
+    pairs = [(os.path.join(src_dir, os.path.basename(p)), os.path.join(dest_dir, "House", os.path.basename(p)))
+             for p in originals]
+
+    def setup():
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        os.makedirs(os.path.join(dest_dir, "House"))
+        shutil.rmtree(src_dir, ignore_errors=True)
+        os.makedirs(src_dir)
+        for original, (src, _) in zip(originals, pairs):
+            shutil.copyfile(original, src)
+
+    def run():
+        if cross_device:
+            with mock.patch("core.move_engine.same_device", return_value=False):
+                move_files(pairs)
+        else:
+            move_files(pairs)
+    return Workload(run, items=len(pairs), setup=setup)
+
+
+@stage("organize_moves", "move_files into the pool on the same drive (renames)")
+def organize_moves(ctx):
+    return _move_workload(ctx, "moves", cross_device=False)
+
+
+@stage("organize_copies", "move_files as if the pool were on another drive (verified copies)")
+def organize_copies(ctx):
+    return _move_workload(ctx, "copies", cross_device=True)
+
+
+@stage("upload_discovery", "traverse_external_directory on a dated mix archive (cold index)")
+def upload_discovery(ctx):
+    import core.library_index as library_index
+    import modules.mixcloud.uploader as uploader
+
+    archive = ctx.path("mix_archive")
+    make_dated_mixes(archive, ctx.items, frames=4)
+    db_path = os.path.join(ctx.path("index"), "library.db")
+    state = {}
+
+    def setup():
+        if state.get("index"):
+            state["index"].close()
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        state["index"] = library_index.LibraryIndex(db_path, max_age=0)
+
+    def run():
+        with mock.patch.object(library_index, "_default_index", state["index"]), \
+                mock.patch.object(uploader, "EXTERNAL_TRACK_DIR", archive):
+            uploader.traverse_external_directory(datetime.datetime(2000, 1, 1), ctx.items)
+
+    def teardown():
+        if state.get("index"):
+            state["index"].close()
+    return Workload(run, items=ctx.items, setup=setup, teardown=teardown)
+
+
+@stage("library_index", "LibraryIndex.refresh over a synthetic DJ pool (cold index, tag reads)")
+def library_index_refresh(ctx):
+    from core.library_index import LibraryIndex
+    from benchmarks.synthetic import generate_library
+
+    root = ctx.path("library")
+    generate_library(root, tracks=ctx.items, mixes=0, covers=0, images=0, seed=ctx.seed)
+    pool = os.path.join(root, "pool")
+    db_path = os.path.join(ctx.path("library_index"), "library.db")
+    state = {}
+
+    def setup():
+        if state.get("index"):
+            state["index"].close()
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        state["index"] = LibraryIndex(db_path, max_age=0)
+
+    def teardown():
+        if state.get("index"):
+            state["index"].close()
+    return Workload(lambda: state["index"].refresh(pool), items=ctx.items, setup=setup, teardown=teardown)
+
+
+@stage("upload_fake", "upload_track against the local fake Mixcloud server")
+def upload_fake(ctx):
+    import modules.mixcloud.uploader as uploader
+    from modules.mixcloud.fake_server import FakeMixcloudServer
+
+    track = write_mp3(os.path.join(ctx.path("upload"), "Mix 0001 - 2024-01-01.mp3"), frames=20000)
+    server = FakeMixcloudServer().start()
+    patches = [
+        mock.patch.object(uploader, "MIXCLOUD_API_URL", server.url),
+        mock.patch.object(uploader, "ACCESS_TOKEN", "fake-token"),
+        mock.patch.object(uploader, "UPLOAD_LINKS_FILE", os.path.join(ctx.path("upload"), "links.txt")),
+        mock.patch("modules.mixcloud.transfer.UPLOAD_METRICS_FILE", os.path.join(ctx.path("upload"), "metrics.jsonl"))
+    ]
+
+    def run():
+        for p in patches:
+            p.start()
+        try:
+            if uploader.upload_track(track, None, 1, "Bench", "", remove_files=False, consume_date=False) is not True:
+                raise RuntimeError("fake upload failed")
+        finally:
+            for p in reversed(patches):
+                p.stop()
+    return Workload(run, items=1, teardown=server.stop)
@@ -0,0 +1,332 @@
+"""
+benchmarks/synthetic.py
+
+Deterministic synthetic DJ library for scale tests of organize, upload
+discovery, retagging and indexing.
+
+    root/
+      pool/YYYY/YYYY-MM/YYYY-MM-DD/Artist - Title.mp3   tagged tracks
+      pool/Requested Songs/YYYY/...                      (some of them)
+      downloads/Artist - Title.mp3                      fresh, partly untagged
+      mixes/Mix 0001 - YYYY-MM-DD.mp3                   date-named mix archive
+      covers/CueClubArchive_1.jpg                       numbered mix covers
+      pexels/1234567.jpg + downloaded_pexel_photos.txt  Pexels-like photos
+      manifest.json                                     seed, counts, timing
+
+- Every file is built from random.Random(f"{seed}:{kind}:{i}"), so the same
+  seed gives byte-identical output regardless of worker count.
+- MP3s are a few silent MPEG frames behind an ID3v2.3 tag assembled
+  directly (title, artist, album, genre, year, BPM, key, and an APIC
+  picture from a small pool of JPEGs), so 100k files take seconds rather
+  than a mutagen save per file.
+- File writes run on a thread pool.
+
+Usage:
+    python -m benchmarks.synthetic /tmp/djlib --tracks 100000 --seed 7
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+import datetime
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from benchmarks.fixtures import MP3_FRAME, noise_bytes
+
+GENRES = [
+    "House", "Deep House", "Tech House", "Techno", "Drum & Bass", "Hip-Hop", "R&B",
+    "Disco", "Afro House", "Dancehall", "Reggaeton", "Pop", "Funk", "Garage", "Trance"
+]
+KEYS = [f"{n}{m}" for n in range(1, 13) for m in "AB"] + ["Am", "C#m", "F", "Gm", "Ebm"]
+SYLLABLES = [
+    "ka", "ta", "zu", "mi", "ro", "lu", "na", "vex", "dj", "sol", "mar", "io", "ne",
+    "ra", "bel", "kai", "lo", "zé", "øy", "ñu"
+]
+WORDS = [
+    "Night", "Drive", "Echo", "Sunset", "Pulse", "Gravity", "Velvet", "Neon", "Ocean",
+    "Fever", "Signal", "Rhythm", "Golden", "Shadow", "Motion", "Paradise", "Heat",
+    "Static", "Bloom", "Horizon", "Midnight", "Love", "Fire", "Cosmic", "Tokyo"
+]
+VERSIONS = ["", "", "", " (Extended Mix)", " (Radio Edit)", " (Remix)", " (Dub)", " (VIP)"]
+
+START_YEAR, YEARS = 2015, 10  # pool dates
+COVER_POOL_SIZE = 16
+BATCH = 1024
+PEXEL_FILE = "downloaded_pexel_photos.txt"
+
+
+def _rng(seed, kind, i):
+    return random.Random(f"{seed}:{kind}:{i}")
+
+
+def _name(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def _artist(rng):
+    artist = _name(rng) if rng.random() < 0.4 else f"{_name(rng)} {_name(rng)}"
+    if rng.random() < 0.15:
+        artist += f" & {_name(rng)}"
+    return artist
+
+
+def _title(rng):
+    return " ".join(rng.sample(WORDS, rng.randint(1, 3))) + rng.choice(VERSIONS)
+
+
+def _date(rng, start_year, years):
+    start = datetime.date(start_year, 1, 1)
+    return start + datetime.timedelta(days=rng.randrange(365 * years))
+
+
+# ---- ID3v2.3 ------------------------------------------------------------
+
+def _text_frame(frame_id, text):
+    try:
+        data = b"\x00" + text.encode("latin-1")
+    except UnicodeEncodeError:
+        data = b"\x01" + text.encode("utf-16")
+    return frame_id.encode("ascii") + struct.pack(">I", len(data)) + b"\x00\x00" + data
+
+
+def _apic_frame(jpeg):
+    data = b"\x00image/jpeg\x00\x03Cover\x00" + jpeg
+    return b"APIC" + struct.pack(">I", len(data)) + b"\x00\x00" + data
+
+
+def _syncsafe(n):
+    return bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+
+
+def id3_tag(tags, picture=None, padding=256):
+    """
+    ID3v2.3 tag bytes for {"TIT2": "...", ...} text frames plus an
+    optional front-cover JPEG.
+    """
+    frames = b"".join(_text_frame(frame_id, text) for frame_id, text in tags.items() if text)
+    if picture:
+        frames += _apic_frame(picture)
+    return b"ID3\x03\x00\x00" + _syncsafe(len(frames) + padding) + frames + b"\x00" * padding
+
+
+def mp3_bytes(frames, tags=None, picture=None):
+    """
+    A valid MP3: optional ID3v2.3 tag, then 'frames' silent audio frames.
+    """
+    header = id3_tag(tags, picture) if tags is not None else b""
+    return header + MP3_FRAME * frames
+
+
+# ---- Images --------------------------------------------------------------
+
+def render_image(rng, size, quality=80):
+    """
+    JPEG bytes of a seeded gradient/noise image, roughly photo-like.
+    """
+    base = Image.linear_gradient("L").rotate(rng.randrange(360)).resize(size).convert("RGB")
+    tint = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.frombytes("L", size, noise_bytes(rng, size[0] * size[1])).convert("RGB")
+    img = Image.blend(Image.blend(base, tint, rng.uniform(0.3, 0.7)), noise, rng.uniform(0.05, 0.2))
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+def cover_pool(seed, size=64):
+    return [render_image(_rng(seed, "cover-pool", i), (size, size)) for i in range(COVER_POOL_SIZE)]
+
+
+# ---- Plans ---------------------------------------------------------------
+
+def _track_tags(rng, artist, title, day):
+    return {
+        "TIT2": title,
+        "TPE1": artist,
+        "TALB": f"{_name(rng)} {rng.choice(WORDS)}" if rng.random() < 0.6 else "",
+        "TCON": rng.choice(GENRES),
+        "TYER": str(day.year),
+        "TBPM": str(rng.randint(70, 175)) if rng.random() < 0.7 else "",
+        "TKEY": rng.choice(KEYS) if rng.random() < 0.5 else ""
+    }
+
+
+def _identity(rng):
+    """
+    (artist, title, day, requested) - the first draws of every track's rng,
+    shared by the path plan and the file contents.
+    """
+    return _artist(rng), _title(rng), _date(rng, START_YEAR, YEARS), rng.random() < 0.1
+
+
+def _unique(path, taken):
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 2
+    while candidate.lower() in taken:
+        candidate = f"{stem} {n}{ext}"
+        n += 1
+    taken.add(candidate.lower())
+    return candidate
+
+
+def plan_tracks(root, count, seed, kind="pool"):
+    """
+    Yields (path, kind, i) for pool tracks (date folders) or downloads.
+    """
+    taken = set()
+    for i in range(count):
+        artist, title, day, requested = _identity(_rng(seed, kind, i))
+        filename = f"{artist} - {title}.mp3"
+        if kind == "pool":
+            parts = [root, "pool"]
+            if requested:
+                parts.append("Requested Songs")
+            parts += [day.strftime("%Y"), day.strftime("%Y-%m"), day.strftime("%Y-%m-%d"), filename]
+        else:
+            parts = [root, "downloads", filename]
+        yield _unique(os.path.join(*parts), taken), kind, i
+
+
+def build_track(seed, kind, i, covers, frames=3, untagged_share=0.05, no_cover_share=0.3):
+    rng = _rng(seed, kind, i)
+    artist, title, day, _ = _identity(rng)
+    if kind == "downloads":
+        untagged_share, no_cover_share = 0.4, 0.8
+    if rng.random() < untagged_share:
+        return mp3_bytes(frames + rng.randrange(3))
+    picture = None if rng.random() < no_cover_share else covers[rng.randrange(len(covers))]
+    return mp3_bytes(frames + rng.randrange(3), _track_tags(rng, artist, title, day), picture)
+
+
+def plan_mixes(root, count, seed, start=datetime.date(2019, 1, 4)):
+    """
+    Yields mix paths, one every 2-4 days, plus the odd undated or
+    AppleDouble ("._") file the uploader has to skip.
+    """
+    day = start
+    for n in range(1, count + 1):
+        rng = _rng(seed, "mix", n)
+        day += datetime.timedelta(days=rng.randint(2, 4))
+        yield os.path.join(root, "mixes", f"Mix {n:04d} - {day.isoformat()}.mp3")
+        if rng.random() < 0.02:
+            yield os.path.join(root, "mixes", f"._Mix {n:04d} - {day.isoformat()}.mp3")
+        if rng.random() < 0.02:
+            yield os.path.join(root, "mixes", f"Untitled session {n}.mp3")
+
+
+# ---- Generation ----------------------------------------------------------
+
+def _write(path, data):
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return len(data)
+
+
+def generate_library(root, tracks=1000, downloads=0, mixes=100, covers=None, images=20,
+                     seed=0, workers=4, frames=3, mix_frames=40, image_size=(640, 427)):
+    """
+    Builds the library under 'root' (see the module docstring) and returns
+    the manifest dict. 'covers' defaults to one per mix.
+    """
+    covers = mixes if covers is None else covers
+    started = time.perf_counter()
+    os.makedirs(root, exist_ok=True)
+    for folder in ("pool", "downloads", "mixes", "covers", "pexels"):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+    pictures = cover_pool(seed)
+    written = {"bytes": 0}
+
+    def jobs():
+        for path, kind, i in plan_tracks(root, tracks, seed, "pool"):
+            yield path, lambda kind=kind, i=i: build_track(seed, kind, i, pictures, frames)
+        for path, kind, i in plan_tracks(root, downloads, seed, "downloads"):
+            yield path, lambda kind=kind, i=i: build_track(seed, kind, i, pictures, frames)
+        for path in plan_mixes(root, mixes, seed):
+            yield path, lambda: mp3_bytes(mix_frames)
+        for n in range(1, covers + 1):
+            yield (os.path.join(root, "covers", f"CueClubArchive_{n}.jpg"),
+                   lambda n=n: pictures[n % len(pictures)])
+        for i, photo_id in enumerate(pexel_ids(seed, images)):
+            yield (os.path.join(root, "pexels", f"{photo_id}.jpg"),
+                   lambda i=i: render_image(_rng(seed, "pexel", i), _photo_size(_rng(seed, "pexel-size", i), image_size)))
+
+    def make(job):
+        path, build = job
+        return _write(path, build())
+
+    files, pending = 0, jobs()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            batch = list(islice(pending, BATCH))
+            if not batch:
+                break
+            for size in pool.map(make, batch):
+                written["bytes"] += size
+                files += 1
+
+    with open(os.path.join(root, "pexels", PEXEL_FILE), "w", encoding="utf-8") as f:
+        f.writelines(f"{photo_id}\n" for photo_id in pexel_ids(seed, images))
+
+    manifest = {
+        "seed": seed,
+        "tracks": tracks,
+        "downloads": downloads,
+        "mixes": mixes,
+        "covers": covers,
+        "images": images,
+        "files": files,
+        "bytes": written["bytes"],
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+    with open(os.path.join(root, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def pexel_ids(seed, count):
+    rng = _rng(seed, "pexel-ids", 0)
+    return rng.sample(range(1000000, 9999999), count)
+
+
+def _photo_size(rng, size):
+    width, height = size
+    return (width, height) if rng.random() < 0.7 else (height, width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic DJ library for scale tests.")
+    parser.add_argument("root", help="Output folder.")
+    parser.add_argument("--tracks", type=int, default=1000, help="Tagged tracks in the DJ pool.")
+    parser.add_argument("--downloads", type=int, default=0, help="Fresh tracks waiting in downloads/.")
+    parser.add_argument("--mixes", type=int, default=100, help="Date-named mixes in the archive.")
+    parser.add_argument("--covers", type=int, help="Numbered mix covers (default: one per mix).")
+    parser.add_argument("--images", type=int, default=20, help="Pexels-like photos.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    manifest = generate_library(
+        args.root, tracks=args.tracks, downloads=args.downloads, mixes=args.mixes,
+        covers=args.covers, images=args.images, seed=args.seed, workers=args.workers
+    )
+    print(
+        f"{manifest['files']} files ({manifest['bytes'] / 1e6:.1f} MB) written to {args.root} "
+        f"in {manifest['seconds']}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
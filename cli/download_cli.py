@@ -26,6 +26,11 @@ def main():
         action="store_true",
         help="If set, automatically organize downloaded files after download."
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-download links already recorded as downloaded (file mode)."
+    )
     parser.add_argument(
         "--pexel",
         action="store_true",
@@ -43,7 +48,7 @@ def main():
     if args.mode == "interactive":
         process_links_interactively()
     else:
-        process_links_from_file()
+        process_links_from_file(force=args.force)
 
     if args.pexel:
         print(f"{MSG_NOTICE}Starting Pexels photo download...")
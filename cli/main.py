@@ -28,8 +28,16 @@ from modules.download.downloader import (
 )
 from modules.covers.create_album_cover import main as create_album_covers_main, test_run_album_covers
 from modules.download.download_pexel import search_and_download_photos
-from modules.organize.organize_files import organize_downloads
+from modules.organize.organize_files import organize_downloads, undo_organize
+from modules.organize.oplog import purge_trash
+from modules.organize.duplicates import report_pool_duplicates
+from modules.organize.retag import retag_library
+from modules.organize.watcher import watch_downloads
+from modules.covers.backfill import backfill_covers
 from cli.mixcloud_cli import handle_mixcloud_subcommand
+from benchmarks.args import add_bench_arguments
+from core.log_utils import configure_logging
+from core import tracing
 from core.color_utils import (
     COLOR_GREEN, COLOR_CYAN, COLOR_RESET, COLOR_BLUE, COLOR_YELLOW,
     MSG_STATUS, MSG_NOTICE, MSG_WARNING, MSG_ERROR, LINE_BREAK, MSG_SUCCESS, MSG_DEBUG
@@ -44,8 +52,9 @@ from config.settings import (
     ensure_user_py_settings, load_user_py_settings_as_dict,
     LOCAL_TRACK_DIR, EXTERNAL_TRACK_DIR, USE_EXTERNAL_TRACK_DIR,
     DJ_POOL_BASE_PATH, COVER_IMAGE_DIRECTORY, FINISHED_DIRECTORY,
-    PUBLISHED_DATES, TITLES_FILE, UPLOAD_LINKS_FILE,
-    
+    PUBLISHED_DATES, TITLES_FILE, UPLOAD_LINKS_FILE, RETAG_WORKERS,
+    COVER_BACKFILL_WORKERS, COVER_BACKFILL_MAX_LOOKUPS, WATCH_ROUTING_STRATEGY,
+    MAX_UPLOADS,
 )
 
 from core.version import __version__
@@ -110,7 +119,7 @@ def handle_download_music_subcommand(args):
     if args.mode == "interactive":
         process_links_interactively()
     else:
-        process_links_from_file()
+        process_links_from_file(force=args.force)
 
     if args.organize:
         print(f"{MSG_NOTICE}Organizing downloaded files...")
@@ -128,17 +137,37 @@ def handle_download_pexel_subcommand(args):
     )
 
 def handle_organize_subcommand(args):
+    if args.purge_trash:
+        purge_trash(keep=0)
+        return
     if not os.path.exists(DOWNLOAD_FOLDER_NAME):
         print(f"{MSG_WARNING}Download folder '{DOWNLOAD_FOLDER_NAME}' not found.")
         return
 
-    if args.requested:
+    if args.undo:
+        undo_organize()
+    elif args.watch:
+        strategy = "requested" if args.requested else args.strategy
+        watch_downloads(strategy=strategy)
+    elif args.requested:
         print(f"{MSG_NOTICE}Organizing only requested songs...")
         # Add your specific logic for requested songs here.
     else:
         print(f"{MSG_NOTICE}Organizing all downloaded files...")
         organize_downloads()
 
+def handle_duplicates_subcommand(args):
+    report_pool_duplicates(rebuild=args.rebuild)
+
+def handle_retag_subcommand(args):
+    retag_library(root=args.path, dry_run=args.dry_run, workers=args.workers)
+
+def handle_library_covers_subcommand(args, parser):
+    if args.covers_command == "backfill":
+        backfill_covers(root=args.path, workers=args.workers, max_lookups=args.limit)
+    else:
+        parser.print_help()
+
 def handle_create_album_covers_subcommand(args):
     if args.test:
         print(f"{MSG_NOTICE}Running test mode for album covers...")
@@ -280,6 +309,18 @@ def setup_argparser():
         description="https://github.com/Katazui/DJAutomation",
         epilog=f"{COLOR_GREEN}Tip:{COLOR_RESET} Use 'djcli config --mc_id YOUR_ID --init-settings' to update .env and initialize user settings."
     )
+    parser.add_argument("--log-level",
+                        help="Console log level: DEBUG, INFO, SUCCESS, NOTICE, WARNING or ERROR (default: LOG_LEVEL).")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Only show warnings and errors (same as --log-level WARNING).")
+    parser.add_argument("--log-json", action="store_true",
+                        help="Print log messages as JSON lines.")
+    parser.add_argument("--log-file",
+                        help="Also write JSON-lines logs to this file (default: LOG_FILE).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time the command's stages; print a summary and write a Chrome trace at the end.")
+    parser.add_argument("--trace-file",
+                        help="Where --profile writes the trace (default: PROFILE_TRACE_DIR/<command>-<time>.json).")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Download Music
@@ -293,6 +334,10 @@ def setup_argparser():
         action="store_true",
         help="Organize after download."
     )
+    download_music_parser.add_argument("--force",
+        action="store_true",
+        help="Re-download links already recorded as downloaded (file mode)."
+    )
 
     # Organize
     organize_parser = subparsers.add_parser("org_dl", help="Organize downloaded audio files.")
@@ -300,6 +345,46 @@ def setup_argparser():
         action="store_true",
         help="Only organize requested songs."
     )
+    organize_parser.add_argument("--watch",
+        action="store_true",
+        help="Keep running and organize new downloads as they finish (no prompts)."
+    )
+    organize_parser.add_argument("--undo",
+        action="store_true",
+        help="Move the files of the last org_dl run back where they came from."
+    )
+    organize_parser.add_argument("--purge-trash",
+        action="store_true",
+        help="Delete the duplicates earlier runs set aside (they can't be restored by --undo afterwards)."
+    )
+    organize_parser.add_argument("--strategy",
+        default=WATCH_ROUTING_STRATEGY,
+        help=f"Watch mode destination: date, requested, or a folder path. Default={WATCH_ROUTING_STRATEGY}."
+    )
+
+    # Duplicates
+    dupes_parser = subparsers.add_parser("dupes", help="Find duplicate tracks in the DJ pool by audio fingerprint.")
+    dupes_parser.add_argument("--rebuild",
+        action="store_true",
+        help="Discard the fingerprint index and rescan every file."
+    )
+
+    # Retag
+    retag_parser = subparsers.add_parser("retag", help="Clean and reapply tags across a music library.")
+    retag_parser.add_argument("path",
+        nargs="?",
+        default=DJ_POOL_BASE_PATH,
+        help="Folder to retag. Default=DJ_POOL_BASE_PATH."
+    )
+    retag_parser.add_argument("--dry-run",
+        action="store_true",
+        help="Print the tag changes without writing them."
+    )
+    retag_parser.add_argument("--workers",
+        type=int,
+        default=RETAG_WORKERS,
+        help=f"Worker processes. Default={RETAG_WORKERS}."
+    )
 
     # Download Pexels
     download_pexel_parser = subparsers.add_parser("dl_pexel", help="Download photos from Pexels.")
@@ -313,10 +398,41 @@ def setup_argparser():
     covers_parser = subparsers.add_parser("create_ac", help="Create album covers from images.")
     covers_parser.add_argument("--test", action="store_true", help="Test mode for creating album covers.")
 
+    # Library Covers
+    library_covers_parser = subparsers.add_parser("covers", help="Manage embedded cover art across the library.")
+    library_covers_sub = library_covers_parser.add_subparsers(dest="covers_command")
+    backfill_parser = library_covers_sub.add_parser("backfill", help="Find and embed covers for tracks without artwork.")
+    backfill_parser.add_argument("path",
+        nargs="?",
+        default=DJ_POOL_BASE_PATH,
+        help="Folder to scan. Default=DJ_POOL_BASE_PATH."
+    )
+    backfill_parser.add_argument("--workers",
+        type=int,
+        default=COVER_BACKFILL_WORKERS,
+        help=f"Concurrent lookups. Default={COVER_BACKFILL_WORKERS}."
+    )
+    backfill_parser.add_argument("--limit",
+        type=int,
+        default=COVER_BACKFILL_MAX_LOOKUPS,
+        help=f"Max lookups this run (0 = no limit). Default={COVER_BACKFILL_MAX_LOOKUPS}."
+    )
+
     # Mixcloud Upload
     mixcloud_parser = subparsers.add_parser("up_mixes", help="Upload multiple tracks to Mixcloud.")
     mixcloud_parser.add_argument("--init-settings", action="store_true", help="Initialize MixCloud Content.")
     mixcloud_parser.add_argument("--dry-run", action="store_true", help="Dry run mode for Mixcloud uploads.")
+    mixcloud_parser.add_argument("--batch",
+        nargs="?", const="", metavar="SPEC",
+        help="Upload without prompts, from a JSON batch spec and/or the flags below."
+    )
+    mixcloud_parser.add_argument("--title-index", type=int, help="Batch: 1-based title row in TITLES_FILE.")
+    mixcloud_parser.add_argument("--start-mix", type=int, help="Batch: first mix number (default: next after the last upload).")
+    mixcloud_parser.add_argument("--count", type=int, help=f"Batch: number of mixes to upload (default: {MAX_UPLOADS}).")
+
+    # Benchmarks
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the pipelines against synthetic fixtures.")
+    add_bench_arguments(bench_parser)
 
     # Testing
     test_parser = subparsers.add_parser("test", help="Run tests.")
@@ -382,6 +498,11 @@ def main():
 
     parser = setup_argparser()
     args = parser.parse_args()
+    configure_logging(
+        level="WARNING" if args.quiet else args.log_level,
+        fmt="json" if args.log_json else None,
+        log_file=args.log_file
+    )
 
     if DEBUG_MODE or (hasattr(args, "verbose_config") and args.verbose_config):
         print_loaded_configurations()
@@ -390,6 +511,20 @@ def main():
         parser.print_help()
         return
 
+    if args.profile:
+        tracing.enable()
+    try:
+        with tracing.span(f"djcli {args.command}"):
+            run_command(args, parser)
+    finally:
+        if args.profile:
+            tracing.finish_profile(args.command, args.trace_file)
+
+
+def run_command(args, parser):
+    """
+    Dispatches the parsed subcommand.
+    """
     if args.command == "dl_audio":
         print(f"{MSG_STATUS}Starting 'download_music' subcommand...\n{LINE_BREAK}")
         handle_download_music_subcommand(args)
@@ -406,10 +541,27 @@ def main():
         print(f"{MSG_STATUS}Starting 'organize download' subcommand...\n{LINE_BREAK}")
         handle_organize_subcommand(args)
 
+    elif args.command == "dupes":
+        print(f"{MSG_STATUS}Starting 'duplicates' subcommand...\n{LINE_BREAK}")
+        handle_duplicates_subcommand(args)
+
+    elif args.command == "retag":
+        print(f"{MSG_STATUS}Starting 'retag' subcommand...\n{LINE_BREAK}")
+        handle_retag_subcommand(args)
+
+    elif args.command == "covers":
+        print(f"{MSG_STATUS}Starting 'covers' subcommand...\n{LINE_BREAK}")
+        handle_library_covers_subcommand(args, parser)
+
     elif args.command == "up_mixes":
         print(f"{MSG_STATUS}Starting 'upload mixcloud mixes' subcommand...\n{LINE_BREAK}")
         handle_mixcloud_subcommand(args)
 
+    elif args.command == "bench":
+        print(f"{MSG_STATUS}Starting 'bench' subcommand...\n{LINE_BREAK}")
+        from benchmarks.runner import run_from_args
+        sys.exit(run_from_args(args))
+
     elif args.command == "test":
         print(f"{MSG_STATUS}Running custom tests or debug checks...\n{LINE_BREAK}")
         from cli.test_cli import handle_test_subcommand
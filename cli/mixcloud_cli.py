@@ -24,7 +24,11 @@ if project_root not in sys.path:
     sys.path.append(project_root)
 
 # Import your core logic and color utilities
-from modules.mixcloud.uploader import main as run_mixcloud_upload, dry_run_upload
+from modules.mixcloud.uploader import (
+    main as run_mixcloud_upload, dry_run_upload,
+    traverse_external_directory, find_local_tracks, find_cover_images,
+    load_batch_spec, run_upload_batch
+)
 # Or if you want to call a specialized function, e.g.:
 # from modules.mixcloud.uploader import run_mixcloud_upload
 
@@ -62,10 +66,11 @@ def check_directories():
     if not os.path.isdir(track_dir):
         return False, f"{MSG_ERROR}Track directory does not exist => {track_dir}"
 
-    # Check for audio files
-    audio_files = []
-    for ext in (".mp3", ".m4a"):
-        audio_files.extend([f for f in os.listdir(track_dir) if f.lower().endswith(ext)])
+    # Check for audio files (the same library index query the upload flow uses)
+    if USE_EXTERNAL_TRACK_DIR:
+        audio_files = traverse_external_directory(None, 1)
+    else:
+        audio_files = find_local_tracks()
 
     if not audio_files:
         return False, f"{MSG_WARNING}No audio files found in => {track_dir}"
@@ -74,9 +79,7 @@ def check_directories():
     if not os.path.isdir(COVER_IMAGE_DIRECTORY):
         return False, f"{MSG_ERROR}Cover image directory does not exist => {COVER_IMAGE_DIRECTORY}"
 
-    cover_images = []
-    for ext in (".png", ".jpg", ".jpeg"):
-        cover_images.extend([f for f in os.listdir(COVER_IMAGE_DIRECTORY) if f.lower().endswith(ext)])
+    cover_images = find_cover_images()
 
     if not cover_images:
         # It's not strictly required, but we can warn if covers are missing
@@ -96,6 +99,10 @@ def handle_mixcloud_subcommand(args):
         create_mixcloud_files()
         return
 
+    if getattr(args, "batch", None) is not None:
+        handle_batch_upload(args)
+        return
+
     print(f"{MSG_STATUS}Checking directories before Mixcloud upload...")
     ok, message = check_directories()
     print(message)
@@ -112,6 +119,28 @@ def handle_mixcloud_subcommand(args):
     # Here we call run_mixcloud_upload from the modules/mixcloud/uploader.
     run_mixcloud_upload()
 
+def handle_batch_upload(args):
+    """
+    Runs 'up_mixes --batch [spec.json]' without prompts. Exits non-zero
+    when the batch can't start or an upload failed, for cron/CI.
+    """
+    overrides = {
+        "title_index": args.title_index,
+        "start_mix": args.start_mix,
+        "count": args.count,
+        "dry_run": True if args.dry_run else None
+    }
+    try:
+        spec = load_batch_spec(args.batch or None, overrides)
+    except (OSError, ValueError) as e:
+        print(f"{MSG_ERROR}Invalid batch spec: {e}")
+        sys.exit(2)
+
+    result = run_upload_batch(spec)
+    if result is None or result[1]:
+        sys.exit(1)
+
+
 #########################################################
 #                 CREATE CONFIGURATION
 #########################################################
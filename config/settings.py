@@ -43,6 +43,7 @@ load_dotenv()
 
 CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(CONFIG_DIR)
+USER_DOCS = os.path.expanduser("~/Documents")
 
 DJ_POOL_BASE_PATH = os.environ.get(
     "DJ_POOL_BASE_PATH",
@@ -65,12 +66,41 @@ LINKS_FILE = os.environ.get(
     os.path.join(PROJECT_ROOT, "content", "download", "musicLinks.txt")
 ) # TODO: Refactor a Clearer Name
 
+# Record of processed links (by YouTube/SoundCloud ID) so reruns skip finished ones
+DOWNLOAD_INDEX_FILE = os.environ.get(
+    "DOWNLOAD_INDEX_FILE",
+    os.path.join(USER_DOCS, "DJCLI", "index", "downloaded_links.jsonl")
+)
+
+# Parallel metadata lookups in the planning pass before downloading
+PLANNER_WORKERS = int(os.getenv("PLANNER_WORKERS", "8"))
+
+# Parallel entry downloads for playlists and SoundCloud sets
+PLAYLIST_WORKERS = int(os.getenv("PLAYLIST_WORKERS", "4"))
+
+# "always": convert every download to MP3. "native": keep AAC/MP3 sources that
+# meet NATIVE_MIN_KBPS (AAC is remuxed to .m4a), only transcode other codecs.
+TRANSCODE_POLICY = os.getenv("TRANSCODE_POLICY", "always").strip().lower()
+NATIVE_MIN_KBPS = int(os.getenv("NATIVE_MIN_KBPS", "128"))
+
 # ----------------------------------------------------------------
 #          LOGGING & GENERAL TOGGLES
 # ----------------------------------------------------------------
 
 USE_COLOR_LOGS = os.getenv("USE_COLOR_LOGS", "True").strip().lower() == "true"
 DEBUG_MODE = os.getenv("DEBUG_MODE", "False").strip().lower() == "true"
+# Console log level: DEBUG, INFO, SUCCESS, NOTICE, WARNING or ERROR (DEBUG_MODE implies DEBUG)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG_MODE else "INFO").strip().upper()
+# Console format: "text" ("[Status]: ..." prefixes) or "json" (one JSON object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()
+# Optional JSON-lines log file, written in the background ("" = off), and its level
+LOG_FILE = os.getenv("LOG_FILE", "").strip()
+LOG_FILE_LEVEL = os.getenv("LOG_FILE_LEVEL", "DEBUG").strip().upper()
+# Where 'djcli --profile' writes its Chrome trace-event JSON
+PROFILE_TRACE_DIR = os.getenv(
+    "PROFILE_TRACE_DIR",
+    os.path.join(USER_DOCS, "DJCLI", "logs", "traces")
+)
 
 # ----------------------------------------------------------------
 #   MIXCLOUD + OTHER SENSITIVE CREDENTIALS (FROM .ENV)
@@ -94,11 +124,23 @@ MUSICBRAINZ_API_TOKEN = os.getenv("MUSICBRAINZ_API_TOKEN", "")
 MIXCLOUD_ENABLED = True  # If you disable it, code won’t attempt uploads
 MIXCLOUD_PORT = int(os.getenv("MIXCLOUD_PORT", "8001"))
 MIXCLOUD_REDIRECT_URI = f"http://localhost:{MIXCLOUD_PORT}/"
+# API and OAuth base URLs; point both at 'python -m modules.mixcloud.fake_server'
+# to run uploads against the local stand-in
+MIXCLOUD_API_URL = os.getenv("MIXCLOUD_API_URL", "https://api.mixcloud.com").rstrip("/")
+MIXCLOUD_OAUTH_URL = os.getenv("MIXCLOUD_OAUTH_URL", "https://www.mixcloud.com/oauth").rstrip("/")
 MIXCLOUD_AUTH_URL = (
-    "https://www.mixcloud.com/oauth/authorize"
+    f"{MIXCLOUD_OAUTH_URL}/authorize"
     f"?client_id={MIXCLOUD_CLIENT_ID}&redirect_uri={MIXCLOUD_REDIRECT_URI}"
 )
 
+# Access token kept between runs (owner-only file); re-auth only when Mixcloud rejects it
+MIXCLOUD_TOKEN_FILE = os.getenv(
+    "MIXCLOUD_TOKEN_FILE",
+    os.path.join(USER_DOCS, "DJCLI", "configuration", "mixcloud_token.json")
+)
+# Seconds to wait for the browser authorization before giving up
+MIXCLOUD_OAUTH_TIMEOUT = float(os.getenv("MIXCLOUD_OAUTH_TIMEOUT", "300"))
+
 # If you’re a Mixcloud Pro user, can schedule uploads
 MIXCLOUD_PRO_USER = True
 
@@ -118,6 +160,42 @@ MAX_UPLOADS = int(os.getenv("MAX_UPLOADS", "8"))
 # Publish Time (for scheduled uploads)
 PUBLISHED_HOUR = int(os.getenv("PUBLISHED_HOUR", "12"))
 PUBLISHED_MINUTE = int(os.getenv("PUBLISHED_MINUTE", "00"))
+PUBLISH_TIMEZONE = os.getenv("PUBLISH_TIMEZONE", "US/Eastern")
+
+# Publish schedule (e.g. "Tue,Fri"): publish slots are generated on these weekdays at
+# PUBLISHED_HOUR:PUBLISHED_MINUTE instead of read from PUBLISHED_DATES. Empty = use the file.
+PUBLISH_SCHEDULE_DAYS = os.getenv("PUBLISH_SCHEDULE_DAYS", "").strip()
+# First day slots may fall on (YYYY-MM-DD); empty = today
+PUBLISH_SCHEDULE_START = os.getenv("PUBLISH_SCHEDULE_START", "").strip()
+# Which slots are taken (shared by concurrent runs)
+PUBLISH_SCHEDULE_DB = os.getenv(
+    "PUBLISH_SCHEDULE_DB",
+    os.path.join(USER_DOCS, "DJCLI", "index", "publish_slots.db")
+)
+
+# Upload pre-flight checks (run in parallel on the whole batch before anything is sent)
+MIXCLOUD_MAX_UPLOAD_MB = int(os.getenv("MIXCLOUD_MAX_UPLOAD_MB", "4096"))
+MIXCLOUD_MIN_DURATION_SECONDS = int(os.getenv("MIXCLOUD_MIN_DURATION_SECONDS", "60"))
+MIXCLOUD_MIN_BITRATE_KBPS = int(os.getenv("MIXCLOUD_MIN_BITRATE_KBPS", "128"))  # lower only warns
+MIXCLOUD_COVER_MAX_MB = float(os.getenv("MIXCLOUD_COVER_MAX_MB", "10"))
+MIXCLOUD_COVER_MAX_DIMENSION = int(os.getenv("MIXCLOUD_COVER_MAX_DIMENSION", "3000"))  # larger covers are re-encoded
+MIXCLOUD_COVER_MIN_DIMENSION = int(os.getenv("MIXCLOUD_COVER_MIN_DIMENSION", "300"))
+PREFLIGHT_WORKERS = int(os.getenv("PREFLIGHT_WORKERS", "4"))
+PREFLIGHT_COVER_DIR = os.getenv(
+    "PREFLIGHT_COVER_DIR",
+    os.path.join(USER_DOCS, "DJCLI", "cache", "upload_covers")
+)
+
+# Upload bandwidth cap in Mbit/s shared by all uploads (0 = unlimited), plus
+# time-of-day overrides in local time, e.g. "18:00-23:30=4,23:30-07:00=0"
+# (later windows win where they overlap)
+MIXCLOUD_UPLOAD_LIMIT_MBPS = float(os.getenv("MIXCLOUD_UPLOAD_LIMIT_MBPS", "0"))
+MIXCLOUD_UPLOAD_LIMIT_PROFILES = os.getenv("MIXCLOUD_UPLOAD_LIMIT_PROFILES", "").strip()
+# One JSON line per upload attempt: bytes, duration, average/peak throughput, retries
+UPLOAD_METRICS_FILE = os.getenv(
+    "UPLOAD_METRICS_FILE",
+    os.path.join(USER_DOCS, "DJCLI", "logs", "upload_metrics.jsonl")
+)
 
 # Mixcloud track tags (max 5)
 TRACK_TAGS = [
@@ -195,7 +273,6 @@ DEFAULT_JSON_PATH = os.path.join(
     "default_albumCoverConfig.json"
 )
 
-USER_DOCS = os.path.expanduser("~/Documents")
 USER_CONFIG_FOLDER = os.path.join(USER_DOCS, "DJCLI", "configuration")
 USER_CONFIG_PATH = os.path.join(USER_CONFIG_FOLDER, "albumCoverConfig.json")
 
@@ -228,6 +305,142 @@ ORIGINAL_IMAGES_FOLDER = os.path.join(USER_DOCS, "DJCLI", "content", "albumCover
 DESTINATION_FOLDER = os.path.join(USER_DOCS, "DJCLI", "content", "albumCovers", "pexel_processed")
 OUTPUT_FOLDER = os.path.join(USER_DOCS, "DJCLI", "content", "albumCovers", "albumCovers_output")
 
+# ----------------------------------------------------------------
+#   EMBEDDED COVER ART
+# ----------------------------------------------------------------
+
+# Covers are cropped square and scaled down to at most this many pixels per side
+COVER_MAX_DIMENSION = int(os.getenv("COVER_MAX_DIMENSION", "600"))
+COVER_JPEG_QUALITY = int(os.getenv("COVER_JPEG_QUALITY", "88"))
+# Some older CDJs can't display progressive JPEGs, so this is off by default
+COVER_JPEG_PROGRESSIVE = os.getenv("COVER_JPEG_PROGRESSIVE", "False").strip().lower() == "true"
+
+# Processed covers are cached by source URL and content hash, so repeated
+# artwork (same album, backfill runs) skips the download and re-encode
+COVER_STORE_ENABLED = os.getenv("COVER_STORE_ENABLED", "True").strip().lower() == "true"
+COVER_STORE_DIR = os.getenv(
+    "COVER_STORE_DIR",
+    os.path.join(USER_DOCS, "DJCLI", "cache", "covers")
+)
+
+# ----------------------------------------------------------------
+#   COVER BACKFILL (djcli covers backfill)
+# ----------------------------------------------------------------
+
+# Files looked up concurrently
+COVER_BACKFILL_WORKERS = int(os.getenv("COVER_BACKFILL_WORKERS", "4"))
+# Lookups per run, so nightly runs stay within API quotas (0 = no limit)
+COVER_BACKFILL_MAX_LOOKUPS = int(os.getenv("COVER_BACKFILL_MAX_LOOKUPS", "500"))
+# Days before a track with no cover found is looked up again
+COVER_BACKFILL_RETRY_DAYS = int(os.getenv("COVER_BACKFILL_RETRY_DAYS", "30"))
+# Progress log; lets an interrupted run resume where it stopped
+COVER_BACKFILL_STATE_FILE = os.getenv(
+    "COVER_BACKFILL_STATE_FILE",
+    os.path.join(USER_DOCS, "DJCLI", "index", "cover_backfill.jsonl")
+)
+# Requests per second allowed for each cover provider
+COVER_PROVIDER_RATE_LIMITS = {
+    "lastfm": float(os.getenv("LASTFM_RATE_LIMIT", "4")),
+    "musicbrainz": float(os.getenv("MUSICBRAINZ_RATE_LIMIT", "1")),
+    "spotify": float(os.getenv("SPOTIFY_RATE_LIMIT", "5")),
+    "deezer": float(os.getenv("DEEZER_RATE_LIMIT", "8")),
+}
+
+# ----------------------------------------------------------------
+#   DUPLICATE DETECTION (ACOUSTIC FINGERPRINTS)
+# ----------------------------------------------------------------
+
+# Requires ffmpeg on PATH; detection is skipped when it is missing.
+DUPLICATE_DETECTION = os.getenv("DUPLICATE_DETECTION", "True").strip().lower() == "true"
+# What organize does with a file that already exists in the pool:
+#   flag  - move it anyway (under a unique name) and print a warning
+#   skip  - leave it in the download folder
+#   merge - keep whichever copy has the higher bitrate, trash the other
+DUPLICATE_POLICY = os.getenv("DUPLICATE_POLICY", "flag").strip().lower()
+DUPLICATE_MATCH_THRESHOLD = float(os.getenv("DUPLICATE_MATCH_THRESHOLD", "0.85"))
+FINGERPRINT_MAX_SECONDS = int(os.getenv("FINGERPRINT_MAX_SECONDS", "120"))
+FINGERPRINT_DB_PATH = os.getenv(
+    "FINGERPRINT_DB_PATH",
+    os.path.join(USER_DOCS, "DJCLI", "index", "fingerprints.db")
+)
+
+# ----------------------------------------------------------------
+#   WATCH MODE (djcli org_dl --watch)
+# ----------------------------------------------------------------
+
+# "date" (DJ pool date folders), "requested" (Requested Songs date folders),
+# or a fixed folder path
+WATCH_ROUTING_STRATEGY = os.getenv("WATCH_ROUTING_STRATEGY", "date").strip()
+# A file is moved once its size/mtime haven't changed for this long
+WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", "5"))
+# Settled files are moved together once this many are queued, or the oldest has waited this long
+WATCH_BATCH_SIZE = int(os.getenv("WATCH_BATCH_SIZE", "20"))
+WATCH_BATCH_SECONDS = float(os.getenv("WATCH_BATCH_SECONDS", "10"))
+# Seconds between checks (also the polling interval when inotify is unavailable)
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "2"))
+
+# ----------------------------------------------------------------
+#   ORGANIZE RULES
+# ----------------------------------------------------------------
+
+# JSON routing rules (genre/artist/key/bpm/source -> folder) applied by org_dl
+# and watch mode before the usual destination; see config/default_organizeRules.json
+ORGANIZE_RULES_PATH = os.getenv(
+    "ORGANIZE_RULES_PATH",
+    os.path.join(USER_CONFIG_FOLDER, "organizeRules.json")
+)
+
+# ----------------------------------------------------------------
+#   FILE MOVES (organize -> DJ pool)
+# ----------------------------------------------------------------
+
+# Parallel copies when the DJ pool is on another drive (same-drive moves are renames)
+MOVE_WORKERS = int(os.getenv("MOVE_WORKERS", "4"))
+# Copy buffer per file, in MB
+MOVE_BUFFER_MB = int(os.getenv("MOVE_BUFFER_MB", "8"))
+# Check copies before deleting the source: "checksum" (size + BLAKE2) or "size"
+MOVE_VERIFY = os.getenv("MOVE_VERIFY", "checksum").strip().lower()
+# One operation log per org_dl run, replayed backwards by 'djcli org_dl --undo'
+ORGANIZE_LOG_DIR = os.getenv(
+    "ORGANIZE_LOG_DIR",
+    os.path.join(USER_DOCS, "DJCLI", "index", "organize_runs")
+)
+# Runs (newest first) whose dropped duplicates are kept for undo; older trash folders are emptied
+ORGANIZE_TRASH_KEEP_RUNS = int(os.getenv("ORGANIZE_TRASH_KEEP_RUNS", "5"))
+
+# ----------------------------------------------------------------
+#   LIBRARY INDEX
+# ----------------------------------------------------------------
+
+# Shared file index for Downloads, the DJ pool, mix and cover folders
+LIBRARY_INDEX_DB = os.getenv(
+    "LIBRARY_INDEX_DB",
+    os.path.join(USER_DOCS, "DJCLI", "index", "library.db")
+)
+# Seconds a folder refresh is reused within one command before walking it again
+LIBRARY_INDEX_MAX_AGE = float(os.getenv("LIBRARY_INDEX_MAX_AGE", "60"))
+
+# ----------------------------------------------------------------
+#   LIBRARY MAINTENANCE (djcli retag)
+# ----------------------------------------------------------------
+
+# Worker processes used to read/clean/write tags across the library
+RETAG_WORKERS = int(os.getenv("RETAG_WORKERS", str(os.cpu_count() or 4)))
+
+# ----------------------------------------------------------------
+#   BENCHMARKS (djcli bench)
+# ----------------------------------------------------------------
+
+# Stored per-stage timings/memory that later runs are compared against
+BENCH_BASELINE_FILE = os.getenv(
+    "BENCH_BASELINE_FILE",
+    os.path.join(USER_DOCS, "DJCLI", "benchmarks", "baseline.json")
+)
+# A stage slower (or using more memory) than its baseline by more than this % is a regression
+BENCH_REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "20"))
+# TrueType font for the cover rendering stage (default: the album cover config's, then system fonts)
+BENCH_FONT_PATH = os.getenv("BENCH_FONT_PATH", "").strip()
+
 # ----------------------------------------------------------------
 #   PYTHON-BASED SETTINGS CONFIGURATION (for user overrides)
 # ----------------------------------------------------------------
@@ -0,0 +1,134 @@
+"""
+core/cover_store.py
+
+Content-addressed cache of processed (normalized) cover images:
+- Blobs are stored once under their SHA-256: <root>/ab/abcdef....jpg
+- A SQLite table maps each source URL (plus the normalization settings
+  that produced the bytes) to a blob digest
+
+Tracks from the same album, and backfill runs across a whole library,
+reuse a cover without another HTTP fetch or crop/encode, and identical
+artwork from different URLs is kept on disk only once.
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+
+from config.settings import (
+    COVER_STORE_ENABLED, COVER_STORE_DIR,
+    COVER_MAX_DIMENSION, COVER_JPEG_QUALITY, COVER_JPEG_PROGRESSIVE
+)
+from core.color_utils import MSG_ERROR
+
+
+def cover_digest(data):
+    """
+    SHA-256 hex digest of cover bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def _settings_key():
+    # Bytes cached for one set of normalization settings aren't reused for another.
+    return f"{COVER_MAX_DIMENSION}:{COVER_JPEG_QUALITY}:{int(COVER_JPEG_PROGRESSIVE)}"
+
+
+class CoverStore:
+    """
+    URL -> digest index in SQLite plus one file per distinct cover.
+    Safe to share between threads.
+    """
+
+    def __init__(self, root=COVER_STORE_DIR):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "covers.db"), check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (url, settings)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.jpg")
+
+    def get_by_digest(self, digest):
+        """
+        Returns the cover bytes for a digest, or None.
+        """
+        try:
+            with open(self.blob_path(digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get(self, url):
+        """
+        Returns processed cover bytes previously stored for url, or None.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT digest FROM urls WHERE url = ? AND settings = ?", (url, _settings_key())
+            ).fetchone()
+        return self.get_by_digest(row[0]) if row else None
+
+    def put(self, url, data):
+        """
+        Stores processed cover bytes for url. Returns their digest.
+        """
+        digest = cover_digest(data)
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO urls (url, settings, digest) VALUES (?, ?, ?)",
+                (url, _settings_key(), digest)
+            )
+            self.conn.commit()
+        return digest
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_cover_store():
+    """
+    Returns the shared CoverStore, or None if COVER_STORE_ENABLED is off
+    or the store can't be opened.
+    """
+    global _default_store
+    if not COVER_STORE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_store is None:
+            try:
+                _default_store = CoverStore()
+            except Exception as e:
+                print(f"{MSG_ERROR}Could not open cover store '{COVER_STORE_DIR}': {e}")
+                return None
+        return _default_store
@@ -2,9 +2,10 @@
 core/cover_utils.py
 
 Contains functions for:
-- Checking if MP3 files have embedded covers
+- Checking if MP3/M4A files have embedded covers
 - Fetching album covers via external APIs (Last.fm, MusicBrainz, Deezer, Spotify)
 - Downloading, cropping, and embedding album covers
+- Normalizing covers (square, at most COVER_MAX_DIMENSION, JPEG)
 """
 
 import os
@@ -12,24 +13,37 @@ import requests
 from io import BytesIO
 from PIL import Image
 from mutagen.mp3 import MP3
+from mutagen.mp4 import MP4, MP4Cover
 from mutagen.id3 import ID3, APIC, error
-from core.color_utils import (
-    MSG_ERROR, MSG_NOTICE, MSG_DEBUG, MSG_SUCCESS, MSG_WARNING
+from core.log_utils import get_logger
+from core.tracing import span, traced
+from config.settings import (
+    DEBUG_MODE, COVER_MAX_DIMENSION, COVER_JPEG_QUALITY, COVER_JPEG_PROGRESSIVE
 )
-from config.settings import DEBUG_MODE
+from core.file_utils import is_mp4_audio
+from core.cover_store import get_cover_store
 # If APIS, get_spotify_token, etc. are stored in settings or a separate module, import them below:
 from config.settings import APIS
 # from modules.download.some_spotify_file import get_spotify_token
 
+log = get_logger(__name__)
+
 # ----------------------------------------------------------------
 #                   HAS EMBEDDED COVER
 # ----------------------------------------------------------------
 
 def has_embedded_cover(file_path):
     """
-    Checks whether the MP3 file has an embedded cover (ID3:APIC) tag.
+    Checks whether the MP3 file has an embedded cover (ID3:APIC) tag,
+    or the M4A file a 'covr' atom.
     Returns True if cover art is present, False otherwise.
     """
+    if is_mp4_audio(file_path):
+        try:
+            tags = MP4(file_path).tags
+            return bool(tags and tags.get("covr"))
+        except Exception:
+            return False
     try:
         metadata = MP3(file_path, ID3=ID3)
         if metadata and metadata.tags.getall('APIC'):
@@ -42,7 +56,8 @@ def has_embedded_cover(file_path):
 #                 FETCH ALBUM COVER (HIGH-LEVEL)
 # ----------------------------------------------------------------
 
-def fetch_album_cover(title, artist):
+@traced("fetch_album_cover")
+def fetch_album_cover(title, artist, rate_limiters=None):
     """
     Decide which external API to query to retrieve a cover URL.
     Return the cover URL or None if nothing is found.
@@ -52,29 +67,29 @@ def fetch_album_cover(title, artist):
       2) musicbrainz_cover(...)
       3) spotify_cover(...)
       4) deezer_cover(...)
+
+    'rate_limiters' optionally maps a provider name ("lastfm", ...) to a
+    core.rate_limit.TokenBucket; each call to that provider waits for it.
     """
     if artist.lower() == "unknown artist" and title.lower() == "unknown title":
         return None
 
-    # 1) Last.fm
-    url = lastfm_cover(title, artist)
-    if url:
-        return url
-
-    # 2) MusicBrainz
-    url = musicbrainz_cover(title, artist)
-    if url:
-        return url
-
-    # 3) Spotify
-    url = spotify_cover(title, artist)
-    if url:
-        return url
-
-    # 4) Deezer
-    url = deezer_cover(title, artist)
-    if url:
-        return url
+    providers = (
+        ("lastfm", lastfm_cover),            # 1) Last.fm
+        ("musicbrainz", musicbrainz_cover),  # 2) MusicBrainz
+        ("spotify", spotify_cover),          # 3) Spotify
+        ("deezer", deezer_cover),            # 4) Deezer
+    )
+    for name, provider in providers:
+        # Disabled providers return without a request, so don't wait on them.
+        if rate_limiters and name in rate_limiters and APIS.get(name, {}).get("enabled", True):
+            with span("cover.rate_wait", provider=name):
+                rate_limiters[name].acquire()
+        with span(f"cover.{name}") as provider_span:
+            url = provider(title, artist)
+            provider_span.set(found=bool(url))
+        if url:
+            return url
 
     return None
 
@@ -213,23 +228,42 @@ def download_crop_and_attach_cover(file_path, cover_url):
     Download the cover from cover_url, crop it to a square,
     then embed it into the MP3 file as an ID3 APIC frame.
     """
+    cropped_image_data = download_and_crop_cover(cover_url)
+    if cropped_image_data:
+        attach_cover_to_mp3(file_path, cropped_image_data)
+
+def download_and_crop_cover(cover_url):
+    """
+    Download the cover from cover_url and normalize it (see normalize_cover).
+    Covers already in the cover store are returned without a request.
+    Returns JPEG bytes, or None on failure. Use this with a TagTransaction
+    to embed the cover in the same write as the other tags.
+    """
+    store = get_cover_store()
+    if store is not None:
+        cached = store.get(cover_url)
+        if cached:
+            return cached
+
     try:
         r = requests.get(cover_url, timeout=10)
         if r.status_code == 200:
-            image_data = r.content
-            image = Image.open(BytesIO(image_data))
-
-            cropped_image_data = crop_image_to_square(image)
-            attach_cover_to_mp3(file_path, cropped_image_data)
-        else:
-            print(f"{MSG_ERROR}Failed to download album cover: {r.status_code}\n")
+            cover_data = normalize_cover(r.content)
+            if store is not None:
+                store.put(cover_url, cover_data)
+            return cover_data
+        log.error("Failed to download album cover: %s", r.status_code)
     except Exception as e:
-        print(f"{MSG_ERROR}Error attaching cover to {file_path}: {e}\n")
+        log.error("Error downloading cover %s: %s", cover_url, e)
+    return None
 
 def attach_cover_to_mp3(file_path, cover_data):
     """
     Embed the given cover_data (JPEG) into the MP3 file as an ID3 APIC frame.
+    M4A files get a 'covr' atom instead.
     """
+    if is_mp4_audio(file_path):
+        return attach_cover_to_mp4(file_path, cover_data)
     try:
         audio = MP3(file_path, ID3=ID3)
         audio.tags.delall('APIC')  # remove existing covers
@@ -241,9 +275,23 @@ def attach_cover_to_mp3(file_path, cover_data):
             data=cover_data,
         ))
         audio.save()
-        print(f"{MSG_SUCCESS}Album cover added to {file_path}\n")
+        log.success("Album cover added to %s", file_path)
+    except Exception as e:
+        log.error("Failed embedding cover in %s: %s", file_path, e)
+
+def attach_cover_to_mp4(file_path, cover_data):
+    """
+    Embed the given cover_data (JPEG) into an M4A file as its 'covr' atom.
+    """
+    try:
+        audio = MP4(file_path)
+        if audio.tags is None:
+            audio.add_tags()
+        audio.tags["covr"] = [MP4Cover(cover_data, imageformat=MP4Cover.FORMAT_JPEG)]
+        audio.save()
+        log.success("Album cover added to %s", file_path)
     except Exception as e:
-        print(f"{MSG_ERROR}Failed embedding cover in {file_path}: {e}\n")
+        log.error("Failed embedding cover in %s: %s", file_path, e)
 
 # ----------------------------------------------------------------
 #                 IMAGE CROPPING HELPERS
@@ -256,7 +304,7 @@ def crop_image_to_square(image):
     """
     width, height = image.size
     if width == 0 or height == 0:
-        print(f"{MSG_WARNING}Image has invalid size; skipping crop.")
+        log.warning("Image has invalid size; skipping crop.")
         return image_to_jpeg_bytes(image)
 
     side = min(width, height)
@@ -268,12 +316,54 @@ def crop_image_to_square(image):
     cropped = image.crop((left, top, right, bottom))
     return image_to_jpeg_bytes(cropped)
 
-def image_to_jpeg_bytes(pil_image):
+def image_to_jpeg_bytes(pil_image, quality=COVER_JPEG_QUALITY, progressive=COVER_JPEG_PROGRESSIVE):
     """
     Convert a PIL Image to raw JPEG bytes.
     """
     if pil_image.mode not in ("RGB", "L"):
         pil_image = pil_image.convert("RGB")
     buffer = BytesIO()
-    pil_image.save(buffer, format='JPEG')
-    return buffer.getvalue()
\ No newline at end of file
+    pil_image.save(buffer, format='JPEG', quality=quality, progressive=progressive)
+    return buffer.getvalue()
+
+# ----------------------------------------------------------------
+#                 COVER NORMALIZATION
+# ----------------------------------------------------------------
+
+def normalize_cover(image_data, max_dimension=COVER_MAX_DIMENSION):
+    """
+    Turn downloaded image bytes into the cover we embed: a square JPEG no
+    larger than max_dimension per side.
+
+    - A square baseline JPEG already within the limit is returned as-is
+      (no decode/re-encode).
+    - JPEGs are decoded in draft mode, so libjpeg scales them down by
+      1/2, 1/4 or 1/8 while decoding instead of decoding e.g. a full
+      3000x3000 image and resizing it afterwards.
+    """
+    image = Image.open(BytesIO(image_data))
+    width, height = image.size
+    if width == 0 or height == 0:
+        log.warning("Image has invalid size; skipping normalization.")
+        return image_to_jpeg_bytes(image)
+
+    is_jpeg = image.format == "JPEG"
+    if (is_jpeg and width == height and width <= max_dimension
+            and image.mode in ("RGB", "L")
+            and bool(image.info.get("progressive")) == COVER_JPEG_PROGRESSIVE):
+        return image_data
+
+    side = min(width, height)
+    if is_jpeg and side > max_dimension:
+        # Ask for the smallest draft whose short side still covers max_dimension.
+        scale = max_dimension / side
+        image.draft("RGB", (int(width * scale) + 1, int(height * scale) + 1))
+        width, height = image.size
+        side = min(width, height)
+
+    left = (width - side) // 2
+    top = (height - side) // 2
+    image = image.crop((left, top, left + side, top + side))
+    if side > max_dimension:
+        image = image.resize((max_dimension, max_dimension), Image.LANCZOS)
+    return image_to_jpeg_bytes(image)
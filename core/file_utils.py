@@ -4,15 +4,21 @@ core/file_utils.py
 General file and string utilities:
 - Clearing terminal
 - Sanitizing filenames
+- Building track filenames
 - Removing bracketed text
+- Marking files a download is still working on
 """
 
 import os
 import re
+import time
 from config.settings import DEBUG_MODE
 from core.color_utils import (
     MSG_ERROR, MSG_NOTICE, MSG_WARNING, MSG_STATUS
 )
+from core.log_utils import get_logger
+
+log = get_logger(__name__)
 
 
 def clear_terminal():
@@ -30,6 +36,28 @@ def sanitize_filename(name: str) -> str:
     return re.sub(r'[\/*?:"<>|\\]', '', name)
 
 
+def build_track_filename(artist: str, title: str, soundcloud: bool = False, ext: str = "mp3") -> str:
+    """
+    Final file name for a downloaded track.
+    For SoundCloud: "title.mp3" (retaining parentheses).
+    For other sources: "Artist - Title.mp3".
+    """
+    if soundcloud:
+        return sanitize_filename(f"{title}.{ext}")
+    if not artist.strip():
+        artist = "Unknown Artist"
+    if not title.strip():
+        title = "Unknown Title"
+    return sanitize_filename(f"{artist} - {title}.{ext}")
+
+
+def is_mp4_audio(file_path: str) -> bool:
+    """
+    True for files tagged with MP4 atoms (.m4a/.mp4) rather than ID3.
+    """
+    return file_path.lower().endswith((".m4a", ".mp4"))
+
+
 def remove_unwanted_brackets(text: str) -> str:
     """
     Remove bracketed or parenthetical text unless it contains 'feat' or 'featuring'.
@@ -46,12 +74,57 @@ def remove_unwanted_brackets(text: str) -> str:
     return cleaned.strip()
 
 
+def unique_destination_path(path: str, reserved=()) -> str:
+    """
+    Returns 'path' if nothing exists there, otherwise the first free
+    variant with a numbered suffix: "Song (1).mp3", "Song (2).mp3", ...
+    Paths in 'reserved' (already claimed by a pending move) count as taken.
+    """
+    if not os.path.exists(path) and path not in reserved:
+        return path
+    base, ext = os.path.splitext(path)
+    counter = 1
+    while os.path.exists(f"{base} ({counter}){ext}") or f"{base} ({counter}){ext}" in reserved:
+        counter += 1
+    return f"{base} ({counter}){ext}"
+
+
+# A download still working on "Song.mp3" (tagging, fetching the cover,
+# renaming) holds ".Song.mp3.djcli-lock" next to it; the watcher leaves
+# the file alone until it is gone. Markers left by a crashed run expire.
+OWNER_LOCK_SUFFIX = ".djcli-lock"
+OWNER_LOCK_MAX_AGE = 3600
+
+
+def owner_lock_path(path: str) -> str:
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}{OWNER_LOCK_SUFFIX}")
+
+
+def claim_file(path: str) -> str:
+    """
+    Creates the marker for 'path'. Returns the marker's path.
+    """
+    lock = owner_lock_path(path)
+    with open(lock, "w"):
+        pass
+    return lock
+
+
+def is_file_claimed(path: str) -> bool:
+    """
+    True while a (not expired) marker exists for 'path'.
+    """
+    try:
+        return time.time() - os.stat(owner_lock_path(path)).st_mtime < OWNER_LOCK_MAX_AGE
+    except OSError:
+        return False
+
+
 def log_debug_info(message: str) -> None:
     """
-    Logs additional debug information if DEBUG_MODE is True.
+    Logs additional debug information (shown with DEBUG_MODE or LOG_LEVEL=DEBUG).
     """
-    if DEBUG_MODE:
-        print(f"{MSG_STATUS}(DEBUG) {message}")
+    log.debug("%s", message)
 
 
 # If you have any other file or string manipulation utilities, you can add them here.
\ No newline at end of file
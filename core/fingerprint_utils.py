@@ -0,0 +1,355 @@
+"""
+core/fingerprint_utils.py
+
+Acoustic fingerprinting for duplicate detection:
+- Decoding audio to mono PCM through ffmpeg
+- Computing chromaprint-style 32-bit sub-fingerprints with NumPy
+- Comparing fingerprints by bit error rate
+- Persisting fingerprints in an inverted index (sub-fingerprint -> tracks)
+"""
+
+import os
+import shutil
+import sqlite3
+import subprocess
+from collections import Counter
+
+import numpy as np
+
+from config.settings import (
+    FINGERPRINT_DB_PATH, FINGERPRINT_MAX_SECONDS, DUPLICATE_MATCH_THRESHOLD
+)
+from core.color_utils import MSG_ERROR, MSG_WARNING
+from core.file_utils import log_debug_info
+
+SAMPLE_RATE = 11025
+FRAME_SIZE = 4096
+HOP_SIZE = FRAME_SIZE // 3
+MIN_FREQ = 28.0
+MAX_FREQ = 3520.0
+SMOOTHING_FRAMES = 8
+TEMPORAL_DISTANCE = 4
+
+# Only every Nth sub-fingerprint of a stored track goes into the inverted index.
+# Queries use all of their frames, so any alignment still finds a shared hash.
+INDEX_STRIDE = 4
+# Max frame offset tried when aligning two fingerprints.
+MAX_ALIGN_OFFSET = 40
+# SQLite keeps the number of bound variables per statement limited.
+_QUERY_CHUNK = 500
+
+_BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(32, dtype=np.uint64))
+_chroma_filter = None
+
+
+# ----------------------------------------------------------------
+#                   DECODING
+# ----------------------------------------------------------------
+
+def ffmpeg_available():
+    """
+    Returns True if an ffmpeg binary is on PATH.
+    """
+    return shutil.which("ffmpeg") is not None
+
+
+def decode_audio(file_path, max_seconds=FINGERPRINT_MAX_SECONDS):
+    """
+    Decode the first `max_seconds` of file_path to mono float32 samples
+    at SAMPLE_RATE. Returns a NumPy array or None if decoding fails.
+    """
+    cmd = [
+        "ffmpeg", "-v", "quiet", "-i", file_path,
+        "-t", str(max_seconds),
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "s16le", "-",
+    ]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+    except FileNotFoundError:
+        print(f"{MSG_WARNING}ffmpeg not found; cannot fingerprint {file_path}")
+        return None
+
+    if proc.returncode != 0 or not proc.stdout:
+        log_debug_info(f"ffmpeg could not decode {file_path} (code {proc.returncode})")
+        return None
+
+    samples = np.frombuffer(proc.stdout, dtype=np.int16)
+    return samples.astype(np.float32) / 32768.0
+
+
+# ----------------------------------------------------------------
+#                   FINGERPRINTING
+# ----------------------------------------------------------------
+
+def _get_chroma_filter():
+    """
+    Builds (once) the matrix that folds FFT bins into 12 pitch classes.
+    """
+    global _chroma_filter
+    if _chroma_filter is None:
+        freqs = np.fft.rfftfreq(FRAME_SIZE, d=1.0 / SAMPLE_RATE)
+        valid = (freqs >= MIN_FREQ) & (freqs <= MAX_FREQ)
+        notes = np.zeros_like(freqs)
+        notes[valid] = 12.0 * np.log2(freqs[valid] / 440.0) + 69.0
+        pitch_class = np.round(notes).astype(int) % 12
+
+        matrix = np.zeros((len(freqs), 12), dtype=np.float32)
+        matrix[np.nonzero(valid)[0], pitch_class[valid]] = 1.0
+        _chroma_filter = matrix
+    return _chroma_filter
+
+
+def compute_chroma(samples):
+    """
+    Returns an (n_frames, 12) array of L2-normalized chroma vectors,
+    smoothed over SMOOTHING_FRAMES frames.
+    """
+    if len(samples) < FRAME_SIZE:
+        return np.zeros((0, 12), dtype=np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE).astype(np.float32), axis=1)) ** 2
+    chroma = spectrum.astype(np.float32) @ _get_chroma_filter()
+
+    norms = np.linalg.norm(chroma, axis=1, keepdims=True)
+    chroma = chroma / np.maximum(norms, 1e-9)
+
+    if len(chroma) < SMOOTHING_FRAMES:
+        return chroma
+    cumulative = np.cumsum(np.vstack([np.zeros((1, 12), dtype=np.float32), chroma]), axis=0)
+    return (cumulative[SMOOTHING_FRAMES:] - cumulative[:-SMOOTHING_FRAMES]) / SMOOTHING_FRAMES
+
+
+def fingerprint_from_samples(samples):
+    """
+    Computes a sequence of 32-bit sub-fingerprints from mono samples.
+    Each sub-fingerprint encodes, for one frame:
+      - bits 0-11:  chroma[b] > chroma[b+1]      (neighbouring pitch classes)
+      - bits 12-23: chroma[b] > previous chroma[b] (temporal change)
+      - bits 24-31: chroma[b] > chroma[b+3]      (minor-third relation)
+    Returns a uint32 NumPy array (possibly empty).
+    """
+    chroma = compute_chroma(samples)
+    if len(chroma) <= TEMPORAL_DISTANCE:
+        return np.zeros(0, dtype=np.uint32)
+
+    current = chroma[TEMPORAL_DISTANCE:]
+    previous = chroma[:-TEMPORAL_DISTANCE]
+
+    bits = np.concatenate([
+        current > np.roll(current, -1, axis=1),
+        current > previous,
+        (current > np.roll(current, -3, axis=1))[:, :8],
+    ], axis=1)
+
+    return (bits.astype(np.uint64) * _BIT_WEIGHTS).sum(axis=1).astype(np.uint32)
+
+
+def compute_fingerprint(file_path):
+    """
+    Decodes file_path and returns its fingerprint, or None on failure.
+    """
+    samples = decode_audio(file_path)
+    if samples is None:
+        return None
+    fingerprint = fingerprint_from_samples(samples)
+    return fingerprint if len(fingerprint) else None
+
+
+def compare_fingerprints(fp_a, fp_b, max_offset=MAX_ALIGN_OFFSET):
+    """
+    Returns a similarity score in [0, 1]: one minus the lowest bit error rate
+    over all alignments within +/- max_offset frames.
+    """
+    if fp_a is None or fp_b is None or not len(fp_a) or not len(fp_b):
+        return 0.0
+
+    best_error = 1.0
+    for offset in range(-max_offset, max_offset + 1):
+        if offset >= 0:
+            a, b = fp_a[offset:], fp_b
+        else:
+            a, b = fp_a, fp_b[-offset:]
+        length = min(len(a), len(b))
+        # Ignore alignments that only overlap a sliver of either track.
+        if length < min(len(fp_a), len(fp_b)) // 2 or length == 0:
+            continue
+        diff = np.bitwise_xor(a[:length], b[:length])
+        errors = np.unpackbits(diff.view(np.uint8)).sum()
+        best_error = min(best_error, errors / (length * 32.0))
+    return float(1.0 - best_error)
+
+
+# ----------------------------------------------------------------
+#                   INVERTED INDEX
+# ----------------------------------------------------------------
+
+class FingerprintIndex:
+    """
+    SQLite-backed store of track fingerprints with an inverted index from
+    sub-fingerprint values to tracks. Candidate lookup is a single indexed
+    query, so checking a new file stays fast on very large pools.
+    """
+
+    def __init__(self, db_path=FINGERPRINT_DB_PATH):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS tracks (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER,
+                mtime REAL,
+                fingerprint BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hashes (
+                hash INTEGER NOT NULL,
+                track_id INTEGER NOT NULL,
+                PRIMARY KEY (hash, track_id)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def is_current(self, file_path):
+        """
+        True if file_path is indexed and its size/mtime have not changed.
+        """
+        row = self.conn.execute(
+            "SELECT size, mtime FROM tracks WHERE path = ?", (file_path,)
+        ).fetchone()
+        if not row:
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        return row[0] == stat.st_size and row[1] == stat.st_mtime
+
+    def add(self, file_path, fingerprint):
+        """
+        Stores (or replaces) the fingerprint for file_path.
+        """
+        self.remove(file_path, commit=False)
+        try:
+            stat = os.stat(file_path)
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size, mtime = None, None
+
+        cur = self.conn.execute(
+            "INSERT INTO tracks (path, size, mtime, fingerprint) VALUES (?, ?, ?, ?)",
+            (file_path, size, mtime, fingerprint.astype(np.uint32).tobytes())
+        )
+        track_id = cur.lastrowid
+        hashes = set(int(h) for h in fingerprint[::INDEX_STRIDE])
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO hashes (hash, track_id) VALUES (?, ?)",
+            ((h, track_id) for h in hashes)
+        )
+        self.conn.commit()
+
+    def remove(self, file_path, commit=True):
+        row = self.conn.execute("SELECT id FROM tracks WHERE path = ?", (file_path,)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM hashes WHERE track_id = ?", (row[0],))
+            self.conn.execute("DELETE FROM tracks WHERE id = ?", (row[0],))
+            if commit:
+                self.conn.commit()
+
+    def rename(self, old_path, new_path):
+        """
+        Points an existing entry at a new path (after a move) without
+        recomputing its fingerprint.
+        """
+        if new_path != old_path:
+            self.remove(new_path, commit=False)
+        self.conn.execute("UPDATE tracks SET path = ? WHERE path = ?", (new_path, old_path))
+        self.conn.commit()
+
+    def paths(self):
+        return [row[0] for row in self.conn.execute("SELECT path FROM tracks")]
+
+    def get_fingerprint(self, file_path):
+        row = self.conn.execute(
+            "SELECT fingerprint FROM tracks WHERE path = ?", (file_path,)
+        ).fetchone()
+        return np.frombuffer(row[0], dtype=np.uint32) if row else None
+
+    def lookup(self, fingerprint, threshold=DUPLICATE_MATCH_THRESHOLD, max_candidates=10, exclude=None):
+        """
+        Returns [(path, score), ...] for indexed tracks whose similarity to
+        `fingerprint` is at least `threshold`, best match first. The track
+        at `exclude` (usually the query file itself) is never returned.
+        """
+        if fingerprint is None or not len(fingerprint):
+            return []
+
+        query_hashes = list(set(int(h) for h in fingerprint))
+        votes = Counter()
+        for start in range(0, len(query_hashes), _QUERY_CHUNK):
+            chunk = query_hashes[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for track_id, count in self.conn.execute(
+                f"SELECT track_id, COUNT(*) FROM hashes WHERE hash IN ({placeholders}) GROUP BY track_id",
+                chunk
+            ):
+                votes[track_id] += count
+        if exclude:
+            # Drop it before truncating, or it takes a candidate slot.
+            row = self.conn.execute("SELECT id FROM tracks WHERE path = ?", (exclude,)).fetchone()
+            if row:
+                votes.pop(row[0], None)
+
+        matches = []
+        for track_id, _ in votes.most_common(max_candidates):
+            path, blob = self.conn.execute(
+                "SELECT path, fingerprint FROM tracks WHERE id = ?", (track_id,)
+            ).fetchone()
+            score = compare_fingerprints(fingerprint, np.frombuffer(blob, dtype=np.uint32))
+            if score >= threshold:
+                matches.append((path, score))
+
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
+    def prune_missing(self):
+        """
+        Drops entries whose files no longer exist. Returns how many were removed.
+        """
+        missing = [p for p in self.paths() if not os.path.exists(p)]
+        for path in missing:
+            self.remove(path, commit=False)
+        self.conn.commit()
+        return len(missing)
+
+
+def index_file(index, file_path):
+    """
+    Fingerprints file_path into index unless it is already current.
+    Returns the fingerprint (stored or fresh), or None on failure.
+    """
+    if index.is_current(file_path):
+        return index.get_fingerprint(file_path)
+    fingerprint = compute_fingerprint(file_path)
+    if fingerprint is None:
+        print(f"{MSG_ERROR}Could not fingerprint {file_path}")
+        return None
+    index.add(file_path, fingerprint)
+    return fingerprint
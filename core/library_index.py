@@ -0,0 +1,269 @@
+"""
+core/library_index.py
+
+Shared, persisted index of the folders DJCLI works on (Downloads, the DJ
+pool, mix folders, cover image folders), so commands query it instead of
+listing the same directories again.
+
+- One SQLite row per file: path, folder, size, mtime, extension, the date
+  and mix number parsed from the file name, and (for taggable audio) a tag
+  summary: title, artist, genre, has_cover.
+- refresh() walks a folder with os.scandir and compares size/mtime with
+  the stored rows; only new or changed files are parsed/tag-read, and rows
+  for files that disappeared are dropped.
+- Within one process a folder refreshed less than LIBRARY_INDEX_MAX_AGE
+  seconds ago isn't walked again, so the pre-flight check and the upload
+  flow of one command share a single scan.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import datetime
+import threading
+from collections import namedtuple
+
+from config.settings import LIBRARY_INDEX_DB, LIBRARY_INDEX_MAX_AGE
+from core.color_utils import MSG_ERROR
+from core.metadata_utils import TagTransaction
+
+TAGGABLE_EXTENSIONS = {".mp3", ".m4a", ".mp4"}
+
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_NUMBER_RE = re.compile(r"(\d+)")
+
+LibraryEntry = namedtuple(
+    "LibraryEntry",
+    "path folder name size mtime ext date mix_number title artist genre has_cover"
+)
+
+
+def parse_filename_date(name):
+    """
+    The first YYYY-MM-DD in a file name as a datetime, or None.
+    """
+    match = _DATE_RE.search(name)
+    if match:
+        try:
+            return datetime.datetime.strptime(match.group(1), "%Y-%m-%d")
+        except ValueError:
+            return None
+    return None
+
+
+def parse_mix_number(name):
+    """
+    The first number in a file name, or None.
+    """
+    match = _NUMBER_RE.search(name)
+    return int(match.group(1)) if match else None
+
+
+def _read_tag_summary(path):
+    try:
+        tags = TagTransaction(path)
+    except Exception:
+        return None, None, None, None
+    return tags.title, tags.artist, tags.get("genre"), int(tags.has_cover)
+
+
+def _walk_files(root, recursive):
+    """
+    Yields (folder, DirEntry) for the files in root (and below, if recursive).
+    """
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        yield folder, entry
+        except OSError:
+            continue
+
+
+def _subtree_bounds(root):
+    # Every path under root sorts between "root/" and "root0" ("0" follows "/").
+    prefix = os.path.join(root, "")
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class LibraryIndex:
+    """
+    File index in SQLite. Safe to share between threads.
+    """
+
+    def __init__(self, db_path=LIBRARY_INDEX_DB, max_age=LIBRARY_INDEX_MAX_AGE):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._refreshed = {}  # (root, recursive) -> monotonic time of the last walk
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ext TEXT NOT NULL,
+                date TEXT,
+                mix_number INTEGER,
+                title TEXT,
+                artist TEXT,
+                genre TEXT,
+                has_cover INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS files_folder ON files (folder);
+            """
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _scope(self, root, recursive):
+        if recursive:
+            low, high = _subtree_bounds(root)
+            return "path >= ? AND path < ?", (low, high)
+        return "folder = ?", (root,)
+
+    def refresh(self, root, recursive=True, force=False):
+        """
+        Brings the rows for 'root' up to date. Returns (added, updated, removed).
+        """
+        root = os.path.normpath(root)
+        key = (root, recursive)
+        if not force and time.monotonic() - self._refreshed.get(key, float("-inf")) < self.max_age:
+            return 0, 0, 0
+
+        where, params = self._scope(root, recursive)
+        with self._lock:
+            known = {
+                path: (size, mtime_ns) for path, size, mtime_ns in
+                self.conn.execute(f"SELECT path, size, mtime_ns FROM files WHERE {where}", params)
+            }
+
+        seen, rows, added = set(), [], 0
+        for folder, entry in _walk_files(root, recursive):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            seen.add(entry.path)
+            previous = known.get(entry.path)
+            if previous == (stat.st_size, stat.st_mtime_ns):
+                continue
+            added += previous is None
+            name = entry.name
+            ext = os.path.splitext(name)[1].lower()
+            date = parse_filename_date(name)
+            tags = (None, None, None, None)
+            if ext in TAGGABLE_EXTENSIONS and not name.startswith("._"):
+                tags = _read_tag_summary(entry.path)
+            rows.append((
+                entry.path, folder, name, stat.st_size, stat.st_mtime_ns, ext,
+                date.strftime("%Y-%m-%d") if date else None, parse_mix_number(name), *tags
+            ))
+
+        removed = [(path,) for path in known if path not in seen]
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.executemany("DELETE FROM files WHERE path = ?", removed)
+            self.conn.commit()
+        self._refreshed[key] = time.monotonic()
+        if recursive:
+            self._refreshed[(root, False)] = self._refreshed[key]
+        return added, len(rows) - added, len(removed)
+
+    def files(self, root, extensions=None, recursive=True, refresh=True):
+        """
+        LibraryEntry rows under 'root' (only its top level unless 'recursive'),
+        optionally limited to the given extensions (".mp3", ...), by path.
+        """
+        root = os.path.normpath(root)
+        if refresh:
+            self.refresh(root, recursive)
+        where, params = self._scope(root, recursive)
+        if extensions:
+            extensions = [ext.lower() for ext in extensions]
+            where += f" AND ext IN ({', '.join('?' * len(extensions))})"
+            params += tuple(extensions)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT path, folder, name, size, mtime_ns, ext, date, mix_number, "
+                f"title, artist, genre, has_cover FROM files WHERE {where} ORDER BY path",
+                params
+            ).fetchall()
+        return [LibraryEntry(*row) for row in rows]
+
+    def invalidate(self, root=None):
+        """
+        Forgets the in-process refresh times so the next query walks again.
+        """
+        if root is None:
+            self._refreshed.clear()
+        else:
+            root = os.path.normpath(root)
+            self._refreshed = {k: v for k, v in self._refreshed.items() if k[0] != root}
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_library_index():
+    """
+    Returns the shared LibraryIndex, or None if it can't be opened.
+    """
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            try:
+                _default_index = LibraryIndex()
+            except Exception as e:
+                print(f"{MSG_ERROR}Could not open library index '{LIBRARY_INDEX_DB}': {e}")
+                return None
+        return _default_index
+
+
+def library_files(root, extensions=None, recursive=True):
+    """
+    Files under 'root' from the shared index. Falls back to a plain scan
+    (without tag summaries) if the index can't be opened.
+    """
+    index = get_library_index()
+    if index is not None:
+        return index.files(root, extensions, recursive)
+
+    root = os.path.normpath(root)
+    extensions = {ext.lower() for ext in extensions or ()}
+    entries = []
+    for folder, entry in _walk_files(root, recursive):
+        ext = os.path.splitext(entry.name)[1].lower()
+        if extensions and ext not in extensions:
+            continue
+        stat = entry.stat()
+        date = parse_filename_date(entry.name)
+        entries.append(LibraryEntry(
+            entry.path, folder, entry.name, stat.st_size, stat.st_mtime_ns, ext,
+            date.strftime("%Y-%m-%d") if date else None, parse_mix_number(entry.name),
+            None, None, None, None
+        ))
+    return sorted(entries)
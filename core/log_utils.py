@@ -0,0 +1,266 @@
+"""
+core/log_utils.py
+
+Shared leveled logging on top of the standard 'logging' package.
+
+- get_logger(__name__) returns a logger under the "djcli" namespace with
+  the usual levels plus success() and notice(). Pass values as %-style
+  arguments (log.info("Uploaded %s", name)): a message below the active
+  level is dropped before it is formatted.
+- The terminal sink prints the familiar "[Status]: ..." prefixes, colored
+  only when USE_COLOR_LOGS is on and the stream is a terminal. With
+  LOG_FORMAT=json it prints one JSON object per line instead.
+- LOG_FILE adds a JSON-lines file, written by a background thread
+  (QueueHandler/QueueListener), so hot paths never wait on the disk.
+
+Keyword 'extra' fields are kept as JSON keys, e.g.
+log.info("Sent %s", name, extra={"bytes": size}).
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+import traceback
+from logging.handlers import QueueHandler, QueueListener
+
+from config.settings import LOG_FILE, LOG_FILE_LEVEL, LOG_FORMAT, LOG_LEVEL
+from core.color_utils import (
+    COLOR_RESET, COLOR_RED, COLOR_GREEN, COLOR_YELLOW, COLOR_BLUE, COLOR_CYAN
+)
+
+ROOT_LOGGER = "djcli"
+
+# Between INFO (20) and WARNING (30), ordered like the console prefixes.
+SUCCESS = 23
+NOTICE = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+logging.addLevelName(NOTICE, "NOTICE")
+
+LEVEL_PREFIXES = {
+    logging.DEBUG: ("Debug", COLOR_CYAN),
+    logging.INFO: ("Status", COLOR_GREEN),
+    SUCCESS: ("Success", COLOR_GREEN),
+    NOTICE: ("Notice", COLOR_YELLOW),
+    logging.WARNING: ("Warning", COLOR_BLUE),
+    logging.ERROR: ("Error", COLOR_RED),
+    logging.CRITICAL: ("Error", COLOR_RED)
+}
+
+# Attributes every LogRecord has; anything else came in through 'extra'.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_lock = threading.Lock()
+_listener = None
+
+
+class DJLogger(logging.Logger):
+    """
+    A Logger with the two extra console levels.
+    """
+
+    def success(self, msg, *args, **kwargs):
+        if self.isEnabledFor(SUCCESS):
+            self._log(SUCCESS, msg, args, **kwargs)
+
+    def notice(self, msg, *args, **kwargs):
+        if self.isEnabledFor(NOTICE):
+            self._log(NOTICE, msg, args, **kwargs)
+
+
+def get_logger(name=None):
+    """
+    The logger for a module ('modules.mixcloud.uploader' becomes
+    'djcli.modules.mixcloud.uploader'), or the djcli root logger.
+    """
+    if not name:
+        name = ROOT_LOGGER
+    elif name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        name = f"{ROOT_LOGGER}.{name}"
+    manager = logging.Logger.manager
+    with _lock:
+        previous = manager.loggerClass
+        manager.setLoggerClass(DJLogger)
+        try:
+            return logging.getLogger(name)
+        finally:
+            manager.loggerClass = previous
+
+
+def parse_level(level, default=logging.INFO):
+    """
+    A level number from a name ("debug", "NOTICE") or number; 'default'
+    for anything unknown.
+    """
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level or "").strip().upper())
+    return value if isinstance(value, int) else default
+
+
+def record_to_dict(record):
+    """
+    The JSON-lines view of a record: time, level, logger, msg, any 'extra'
+    fields and the traceback ('exc') if there is one.
+    """
+    entry = {
+        "time": record.created,
+        "level": record.levelname.lower(),
+        "logger": record.name,
+        "msg": record.getMessage()
+    }
+    for key, value in vars(record).items():
+        if key not in _RECORD_ATTRS and not key.startswith("_"):
+            entry[key] = value
+    if record.exc_info:
+        entry["exc"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+    elif record.exc_text:
+        entry["exc"] = record.exc_text
+    return entry
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line (see record_to_dict).
+    """
+
+    def format(self, record):
+        return json.dumps(record_to_dict(record), ensure_ascii=False, default=str)
+
+
+class TerminalFormatter(logging.Formatter):
+    """
+    "[Level]: message", colored when 'color' is set.
+    """
+
+    def __init__(self, color=False):
+        super().__init__()
+        self.color = color
+
+    def format(self, record):
+        label, color = LEVEL_PREFIXES.get(record.levelno) or (record.levelname.title(), "")
+        if self.color and color:
+            prefix = f"{color}[{label}]{COLOR_RESET}: "
+        else:
+            prefix = f"[{label}]: "
+        text = prefix + record.getMessage()
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+class TerminalHandler(logging.StreamHandler):
+    """
+    Writes to sys.stdout as it is at the time of each message (so
+    redirect_stdout and pytest's capture keep working), or to a fixed
+    stream. Color is only used when the stream is a terminal.
+    """
+
+    def __init__(self, stream=None, json_lines=False, color=True):
+        super().__init__(stream)
+        self._stream = stream
+        self.use_color = color
+        self.setFormatter(JsonFormatter() if json_lines else TerminalFormatter())
+
+    @property
+    def stream(self):
+        return self._stream or sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        self._stream = value
+
+    def format(self, record):
+        formatter = self.formatter
+        if isinstance(formatter, TerminalFormatter):
+            isatty = getattr(self.stream, "isatty", None)
+            formatter.color = self.use_color and bool(COLOR_RESET) and bool(isatty and isatty())
+        return formatter.format(record)
+
+
+class _FileQueueHandler(QueueHandler):
+    """
+    Hands records to the file-writing thread. The message is merged with
+    its arguments here (they may change after the call returns); the JSON
+    encoding and the write happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        prepared = logging.makeLogRecord(vars(record))
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            prepared.exc_info = None
+        return prepared
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def configure_logging(level=None, fmt=None, log_file=None, file_level=None, stream=None):
+    """
+    (Re)builds the djcli logging sinks. Unset arguments fall back to the
+    LOG_* settings; 'log_file' "" turns the file off. Returns the root
+    logger. The logger level is the lowest sink level, so messages no sink
+    wants cost a single level check.
+    """
+    level = parse_level(level if level is not None else LOG_LEVEL)
+    fmt = (fmt or LOG_FORMAT or "text").lower()
+    log_file = LOG_FILE if log_file is None else log_file
+    file_level = parse_level(file_level if file_level is not None else LOG_FILE_LEVEL, logging.DEBUG)
+
+    global _listener
+    root = get_logger()
+    with _lock:
+        _stop_listener()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+
+        terminal = TerminalHandler(stream, json_lines=(fmt == "json"))
+        terminal.setLevel(level)
+        root.addHandler(terminal)
+        lowest = level
+
+        if log_file:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+                file_handler = logging.FileHandler(log_file, encoding="utf-8", delay=True)
+            except OSError as e:
+                root.warning("Could not open log file %s: %s", log_file, e)
+            else:
+                file_handler.setFormatter(JsonFormatter())
+                file_handler.setLevel(file_level)
+                records = queue.Queue(-1)
+                _listener = QueueListener(records, file_handler, respect_handler_level=True)
+                _listener.start()
+                root.addHandler(_FileQueueHandler(records))
+                lowest = min(level, file_level)
+
+        root.setLevel(lowest)
+        root.propagate = False
+    return root
+
+
+def flush_logs():
+    """
+    Waits for queued file records to be written (also done at exit).
+    """
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener.start()
+
+
+atexit.register(_stop_listener)
+configure_logging()
@@ -3,7 +3,8 @@ core/metadata_utils.py
 
 Functions for:
 - Gleaning artist/title/year/genre from local ID3 tags or external info dicts
-- Checking metadata in final MP3s
+- Checking metadata in final MP3s (ID3) and M4As (MP4 atoms)
+- Tag transactions: read tags once, edit in memory, write once
 - Fetching genre from APIs (Last.fm, Deezer, Spotify, MusicBrainz)
 """
 
@@ -11,16 +12,19 @@ import re
 import requests
 import mutagen
 from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, error, TIT2, TPE1, TDRC, TCON
+from mutagen.mp4 import MP4
+from mutagen.mp4 import MP4Cover
+from mutagen.id3 import ID3, ID3NoHeaderError, error, TIT2, TPE1, TDRC, TCON, APIC
 from config.settings import DEBUG_MODE
-from core.color_utils import (
-    MSG_ERROR, MSG_NOTICE, MSG_DEBUG, MSG_SUCCESS, MSG_STATUS, MSG_WARNING
-)
-from core.file_utils import remove_unwanted_brackets, log_debug_info
+from core.file_utils import remove_unwanted_brackets, log_debug_info, is_mp4_audio
+from core.log_utils import get_logger
+from core.tracing import traced
 
 # If you keep an APIS dict or similar in settings.py, import it here:
 from config.settings import APIS
 
+log = get_logger(__name__)
+
 ######################
 # ARTIST/TITLE GLEANING
 ######################
@@ -38,42 +42,57 @@ def parse_title_for_artist_track(youtube_title: str) -> tuple:
     return "", ""
 
 
-def glean_artist_title(file_path: str, info_dict: dict) -> tuple:
+def glean_artist_title_from_info(info_dict: dict) -> tuple:
+    """
+    Glean (artist, title) from a yt_dlp info_dict alone:
+    1) Split 'Artist - Track' titles
+    2) Fall back to artist/creator/uploader fields
+    3) Remove bracketed text that doesn't contain 'feat' or 'featuring'
+    """
+    possible_title = info_dict.get("title") or ""
+    guess_artist, guess_track = parse_title_for_artist_track(possible_title)
+
+    final_title = guess_track if guess_track else possible_title
+    if not final_title.strip():
+        final_title = "Unknown Title"
+
+    possible_artist = info_dict.get("artist") or info_dict.get("creator") or ""
+    if not possible_artist.strip():
+        possible_artist = info_dict.get("uploader") or ""
+
+    final_artist = guess_artist if guess_artist else possible_artist
+    if not final_artist.strip():
+        final_artist = "Unknown Artist"
+
+    # Clean bracketed text from final
+    final_title  = remove_unwanted_brackets(final_title)
+    final_artist = remove_unwanted_brackets(final_artist)
+
+    return final_artist.strip(), final_title.strip()
+
+
+def glean_artist_title(file_path: str, info_dict: dict, tags=None) -> tuple:
     """
     1) Check existing MP3 tags for artist/title
     2) If unknown, parse info_dict
     3) Remove bracketed text that doesn't contain 'feat' or 'featuring'
     4) Return (artist, title)
+
+    If 'tags' is an open TagTransaction, it is read instead of the file.
     """
-    metadata = mutagen.File(file_path, easy=True)
-    if metadata:
-        id3_title  = metadata.get('title', [""])[0]  or ""
-        id3_artist = metadata.get('artist', [""])[0] or ""
+    if tags is not None:
+        id3_title, id3_artist = tags.title, tags.artist
     else:
-        id3_title, id3_artist = "", ""
+        metadata = mutagen.File(file_path, easy=True)
+        if metadata:
+            id3_title  = metadata.get('title', [""])[0]  or ""
+            id3_artist = metadata.get('artist', [""])[0] or ""
+        else:
+            id3_title, id3_artist = "", ""
 
     # If ID3 title is empty or "Unknown Title," glean from info_dict
     if not id3_title.strip() or id3_title.strip().lower() == "unknown title":
-        possible_title = info_dict.get("title") or ""
-        guess_artist, guess_track = parse_title_for_artist_track(possible_title)
-
-        final_title = guess_track if guess_track else possible_title
-        if not final_title.strip():
-            final_title = "Unknown Title"
-
-        possible_artist = info_dict.get("artist") or info_dict.get("creator") or ""
-        if not possible_artist.strip():
-            possible_artist = info_dict.get("uploader") or ""
-
-        final_artist = guess_artist if guess_artist else possible_artist
-        if not final_artist.strip():
-            final_artist = "Unknown Artist"
-
-        # Clean bracketed text from final
-        final_title  = remove_unwanted_brackets(final_title)
-        final_artist = remove_unwanted_brackets(final_artist)
-
-        return final_artist.strip(), final_title.strip()
+        return glean_artist_title_from_info(info_dict)
 
     else:
         # We do have ID3
@@ -132,11 +151,29 @@ def fetch_genre(artist: str, title: str) -> str:
 # ID3/Metadata Checking/Updating
 ###############################
 
+# MP4 atom names for the fields we write.
+MP4_TITLE = "\xa9nam"
+MP4_ARTIST = "\xa9ART"
+MP4_YEAR = "\xa9day"
+MP4_GENRE = "\xa9gen"
+
+
+@traced("update_id3_tags")
 def update_id3_tags(file_path: str, artist: str, title: str, year: str, genre: str) -> bool:
     """
     Update the ID3 tags (artist, title, year, genre).
+    .m4a files get the equivalent MP4 atoms instead.
     Returns True if successful, False otherwise.
     """
+    # Year & Genre
+    if not year.strip():
+        year = "Unknown Year"
+    if not genre.strip():
+        genre = "Unknown Genre"
+
+    if is_mp4_audio(file_path):
+        return update_mp4_tags(file_path, artist, title, year, genre)
+
     try:
         audio = MP3(file_path, ID3=ID3)
 
@@ -144,27 +181,49 @@ def update_id3_tags(file_path: str, artist: str, title: str, year: str, genre: s
         audio["TIT2"] = TIT2(encoding=3, text=title)
         audio["TPE1"] = TPE1(encoding=3, text=artist)
 
-        # Year & Genre
-        if not year.strip():
-            year = "Unknown Year"
-        if not genre.strip():
-            genre = "Unknown Genre"
-
         audio["TDRC"] = TDRC(encoding=3, text=year)
         audio["TCON"] = TCON(encoding=3, text=genre)
 
         audio.save(v2_version=3)
         return True
     except Exception as e:
-        print(f"{MSG_ERROR}Could not update ID3 for {file_path}: {str(e)}")
+        log.error("Could not update ID3 for %s: %s", file_path, e)
         return False
 
 
-def check_metadata(file_path: str) -> None:
+def update_mp4_tags(file_path: str, artist: str, title: str, year: str, genre: str) -> bool:
+    """
+    Update the MP4 atoms (artist, title, year, genre) of an .m4a file.
+    Returns True if successful, False otherwise.
+    """
+    try:
+        audio = MP4(file_path)
+        if audio.tags is None:
+            audio.add_tags()
+
+        audio.tags[MP4_TITLE] = [title]
+        audio.tags[MP4_ARTIST] = [artist]
+        audio.tags[MP4_YEAR] = [year]
+        audio.tags[MP4_GENRE] = [genre]
+
+        audio.save()
+        return True
+    except Exception as e:
+        log.error("Could not update MP4 tags for %s: %s", file_path, e)
+        return False
+
+
+def check_metadata(file_path: str, tags=None) -> None:
     """
     Print final ID3 tags: Title, Artist, Year, Genre, 
     and note if cover art is present.
+    Pass a committed TagTransaction as 'tags' to print it without re-reading the file.
     """
+    if tags is not None:
+        return print_tag_summary(tags.summary())
+    if is_mp4_audio(file_path):
+        return check_mp4_metadata(file_path)
+
     try:
         audio = MP3(file_path, ID3=ID3)
 
@@ -180,11 +239,186 @@ def check_metadata(file_path: str) -> None:
 
         has_art = bool(audio.tags.getall("APIC"))
 
-        print(f"{MSG_NOTICE}Title:      {title}")
-        print(f"{MSG_NOTICE}Artist:     {artist}")
-        print(f"{MSG_NOTICE}Year:       {year}")
-        print(f"{MSG_NOTICE}Genre:      {genre}")
-        print(f"{MSG_NOTICE}Cover Art:  {'Present' if has_art else 'None'}")
+        log.notice("Title:      %s", title)
+        log.notice("Artist:     %s", artist)
+        log.notice("Year:       %s", year)
+        log.notice("Genre:      %s", genre)
+        log.notice("Cover Art:  %s", 'Present' if has_art else 'None')
 
     except Exception as e:
-        print(f"{MSG_ERROR}Error reading metadata from {file_path}: {e}")
\ No newline at end of file
+        log.error("Error reading metadata from %s: %s", file_path, e)
+
+
+def check_mp4_metadata(file_path: str) -> None:
+    """
+    Print final MP4 atoms of an .m4a file, like check_metadata does for ID3.
+    """
+    try:
+        tags = MP4(file_path).tags or {}
+
+        def first(key, default):
+            values = tags.get(key)
+            return values[0] if values else default
+
+        log.notice("Title:      %s", first(MP4_TITLE, 'No Title'))
+        log.notice("Artist:     %s", first(MP4_ARTIST, 'No Artist'))
+        log.notice("Year:       %s", first(MP4_YEAR, 'No Year'))
+        log.notice("Genre:      %s", first(MP4_GENRE, 'No Genre'))
+        log.notice("Cover Art:  %s", 'Present' if tags.get('covr') else 'None')
+
+    except Exception as e:
+        log.error("Error reading metadata from %s: %s", file_path, e)
+
+
+def print_tag_summary(summary: dict) -> None:
+    """
+    Print a TagTransaction.summary() in the check_metadata format.
+    """
+    log.notice("Title:      %s", summary['title'] or 'No Title')
+    log.notice("Artist:     %s", summary['artist'] or 'No Artist')
+    log.notice("Year:       %s", summary['year'] or 'No Year')
+    log.notice("Genre:      %s", summary['genre'] or 'No Genre')
+    log.notice("Cover Art:  %s", 'Present' if summary['cover'] else 'None')
+
+
+###############################
+# Tag Transactions
+###############################
+
+# Minimum free space left in the tag after a write, so later edits
+# (retags, a replaced cover) fit without rewriting the whole file.
+TAG_PADDING_BYTES = 16 * 1024
+
+_ID3_FIELDS = {"title": "TIT2", "artist": "TPE1", "year": "TDRC", "genre": "TCON"}
+_ID3_FRAMES = {"TIT2": TIT2, "TPE1": TPE1, "TDRC": TDRC, "TCON": TCON}
+_MP4_FIELDS = {"title": MP4_TITLE, "artist": MP4_ARTIST, "year": MP4_YEAR, "genre": MP4_GENRE}
+
+# Read-only fields (DJ software writes these; we only route on them).
+_ID3_READ_FIELDS = dict(_ID3_FIELDS, bpm="TBPM", key="TKEY")
+_MP4_READ_FIELDS = dict(_MP4_FIELDS, bpm="tmpo", key="----:com.apple.iTunes:initialkey")
+
+
+def _keep_padding(info):
+    """
+    mutagen padding callback: reuse existing padding when the new tag
+    fits, otherwise grow it by TAG_PADDING_BYTES in one go.
+    """
+    if info.padding >= 0:
+        return info.padding
+    return TAG_PADDING_BYTES
+
+
+class TagTransaction:
+    """
+    Loads a file's tags once (ID3 for .mp3, MP4 atoms for .m4a), collects
+    edits in memory and writes them with a single save on commit().
+
+        with TagTransaction(path) as tags:
+            tags.set(title="Title", artist="Artist", year="2024", genre="House")
+            if not tags.has_cover:
+                tags.set_cover(jpeg_bytes)
+
+    Leaving the block without an exception commits; nothing is written if
+    no field actually changed.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.is_mp4 = is_mp4_audio(file_path)
+        self.dirty = False
+        if self.is_mp4:
+            self._audio = MP4(file_path)
+            if self._audio.tags is None:
+                self._audio.add_tags()
+            self._tags = self._audio.tags
+        else:
+            try:
+                self._tags = ID3(file_path)
+            except ID3NoHeaderError:
+                self._tags = ID3()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    # ---- reading ----
+
+    def get(self, field: str) -> str:
+        """
+        Returns the current value of 'title', 'artist', 'year', 'genre',
+        'bpm' or 'key' ("" if unset).
+        """
+        if self.is_mp4:
+            values = self._tags.get(_MP4_READ_FIELDS[field])
+            if not values:
+                return ""
+            value = values[0]
+            return bytes(value).decode("utf-8", "replace") if isinstance(value, bytes) else str(value)
+        frame = self._tags.get(_ID3_READ_FIELDS[field])
+        return str(frame.text[0]) if frame and frame.text else ""
+
+    @property
+    def title(self) -> str:
+        return self.get("title")
+
+    @property
+    def artist(self) -> str:
+        return self.get("artist")
+
+    @property
+    def has_cover(self) -> bool:
+        if self.is_mp4:
+            return bool(self._tags.get("covr"))
+        return bool(self._tags.getall("APIC"))
+
+    def summary(self) -> dict:
+        """
+        Returns {"title", "artist", "year", "genre", "cover"} from memory.
+        """
+        summary = {field: self.get(field) for field in _ID3_FIELDS}
+        summary["cover"] = self.has_cover
+        return summary
+
+    # ---- editing ----
+
+    def set(self, **fields) -> None:
+        """
+        Sets any of title/artist/year/genre. Unchanged values are ignored.
+        """
+        for field, value in fields.items():
+            if value is None or self.get(field) == value:
+                continue
+            if self.is_mp4:
+                self._tags[_MP4_FIELDS[field]] = [value]
+            else:
+                frame_id = _ID3_FIELDS[field]
+                self._tags.setall(frame_id, [_ID3_FRAMES[frame_id](encoding=3, text=value)])
+            self.dirty = True
+
+    def set_cover(self, cover_data: bytes) -> None:
+        """
+        Replaces any embedded cover with the given JPEG bytes.
+        """
+        if self.is_mp4:
+            self._tags["covr"] = [MP4Cover(cover_data, imageformat=MP4Cover.FORMAT_JPEG)]
+        else:
+            self._tags.delall("APIC")
+            self._tags.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover_data))
+        self.dirty = True
+
+    def commit(self) -> bool:
+        """
+        Writes all pending edits with one save. Returns True if the file was written.
+        """
+        if not self.dirty:
+            return False
+        if self.is_mp4:
+            self._audio.save(padding=_keep_padding)
+        else:
+            self._tags.save(self.file_path, v2_version=3, padding=_keep_padding)
+        self.dirty = False
+        return True
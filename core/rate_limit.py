@@ -0,0 +1,162 @@
+"""
+core/rate_limit.py
+
+Thread-safe token bucket used to keep API calls (cover providers, uploads)
+under a fixed rate, and a bandwidth limiter built on it whose rate can
+follow time-of-day windows (e.g. slower uploads while streaming live).
+"""
+
+import time
+import datetime
+import threading
+
+
+class TokenBucket:
+    """
+    Allows 'rate' tokens per second with bursts of up to 'capacity'.
+
+    acquire() reserves tokens immediately and then sleeps outside the lock
+    until they are due, so concurrent callers are spaced out fairly
+    instead of all waking up at once.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until 'tokens' are available. Returns the seconds waited.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def set_rate(self, rate, capacity=None):
+        """
+        Changes the rate (and burst size) from now on; tokens already
+        earned are kept, up to the new capacity.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+            self._tokens = min(self._tokens, self.capacity)
+
+    def try_acquire(self, tokens=1):
+        """
+        Takes 'tokens' if they are available right now. Returns True on success.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+
+def parse_time_windows(spec):
+    """
+    "18:00-23:30=4, 23:30-07:00=0" -> [(1080, 1410, 4.0), (1410, 420, 0.0)],
+    i.e. (start minute, end minute, value). A window may wrap past midnight.
+    Raises ValueError.
+    """
+    windows = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        span, sep, value = part.partition("=")
+        start, dash, end = span.partition("-")
+        if not sep or not dash:
+            raise ValueError(f"expected 'HH:MM-HH:MM=value', got '{part}'")
+        bounds = []
+        for stamp in (start, end):
+            hour, colon, minute = stamp.strip().partition(":")
+            if not colon or not (0 <= int(hour) <= 24 and 0 <= int(minute) < 60):
+                raise ValueError(f"invalid time '{stamp.strip()}' in '{part}'")
+            bounds.append(int(hour) * 60 + int(minute))
+        rate = float(value)
+        if rate < 0:
+            raise ValueError(f"negative value in '{part}'")
+        windows.append((bounds[0], bounds[1], rate))
+    return windows
+
+
+def _in_window(minute, start, end):
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+class BandwidthLimiter:
+    """
+    Caps a byte stream at 'rate' bytes per second, or at the rate of the
+    last time window (see parse_time_windows, in bytes per second) that
+    covers the current local time. A rate of 0 means unlimited.
+
+    One limiter can be shared by concurrent transfers; they then split
+    the rate between them. The active window is looked up at most once
+    per 'check_interval' seconds.
+    """
+
+    def __init__(self, rate=0, windows=(), now=datetime.datetime.now,
+                 clock=time.monotonic, sleep=time.sleep, check_interval=1.0):
+        self.rate = float(rate)
+        self.windows = list(windows)
+        self._now = now
+        self._clock = clock
+        self._sleep = sleep
+        self._check_interval = check_interval
+        self._checked = None
+        self._current = self.rate
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    def current_rate(self):
+        """
+        Bytes per second allowed right now (0 = unlimited).
+        """
+        local = self._now()
+        minute = local.hour * 60 + local.minute
+        for start, end, rate in reversed(self.windows):
+            if _in_window(minute, start, end):
+                return rate
+        return self.rate
+
+    def throttle(self, nbytes):
+        """
+        Waits until 'nbytes' may be sent. Returns the seconds waited.
+        """
+        with self._lock:
+            moment = self._clock()
+            if self._checked is None or moment - self._checked >= self._check_interval:
+                self._current = self.current_rate()
+                self._checked = moment
+            rate = self._current
+            if rate <= 0:
+                return 0.0
+            if self._bucket is None:
+                self._bucket = TokenBucket(rate, capacity=rate, clock=self._clock, sleep=self._sleep)
+            elif self._bucket.rate != rate:
+                self._bucket.set_rate(rate, capacity=rate)
+            bucket = self._bucket
+        return bucket.acquire(nbytes)
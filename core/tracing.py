@@ -0,0 +1,230 @@
+"""
+core/tracing.py
+
+Lightweight timing spans for finding where a command spends its time.
+
+    with span("cover.save", size=1200):
+        ...
+
+    @traced("update_id3_tags")
+    def update_id3_tags(...):
+        ...
+
+Tracing is off unless enable() is called ('djcli --profile'). While it is
+off, span() returns one shared no-op context manager and traced() adds a
+single flag check, so instrumented code costs next to nothing.
+
+While it is on, each finished span is recorded with its thread, start,
+duration and self time (duration minus its child spans). The spans can be
+exported as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)
+and summarized per name with print_summary().
+"""
+
+import os
+import json
+import time
+import datetime
+import functools
+import threading
+
+from config.settings import PROFILE_TRACE_DIR
+from core.color_utils import MSG_STATUS
+
+_enabled = False
+_events = []
+_threads = {}
+_local = threading.local()
+_origin = time.perf_counter()
+
+
+class _NoSpan:
+    """
+    What span() returns while tracing is off.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """
+    One timed region. set() adds arguments once they are known (e.g. the
+    number of bytes sent); an exception leaving the span is noted as 'error'.
+    """
+    __slots__ = ("name", "args", "start", "children")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = None
+        self.children = 0.0
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        stack = _local.stack
+        # Spans opened from callbacks may close out of order.
+        if stack and stack[-1] is self:
+            stack.pop()
+        elif self in stack:
+            stack.remove(self)
+        if stack:
+            stack[-1].children += duration
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        tid = threading.get_ident()
+        if tid not in _threads:
+            _threads[tid] = threading.current_thread().name
+        _events.append((self.name, self.start, duration, duration - self.children, tid, self.args))
+        return False
+
+
+def enable():
+    """
+    Starts recording spans (clears earlier ones).
+    """
+    global _enabled
+    reset()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    _events.clear()
+    _threads.clear()
+
+
+def span(name, **args):
+    """
+    A context manager timing the enclosed block as 'name' (a no-op while
+    tracing is off).
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return Span(name, args)
+
+
+def traced(name=None):
+    """
+    Decorator timing every call of the function as a span ('name' defaults
+    to the function's qualified name).
+    """
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def chrome_trace():
+    """
+    The recorded spans as a Chrome trace-event document (complete "X"
+    events in microseconds, plus thread names).
+    """
+    pid = os.getpid()
+    events = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in list(_threads.items())
+    ]
+    for name, start, duration, _, tid, args in list(_events):
+        events.append({
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": round((start - _origin) * 1e6, 3),
+            "dur": round(duration * 1e6, 3),
+            "pid": pid,
+            "tid": tid,
+            "args": args
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path):
+    """
+    Writes chrome_trace() to 'path' (atomically). Returns the path.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f, default=str)
+    os.replace(tmp_path, path)
+    return path
+
+
+def summary():
+    """
+    Per span name: count, total, self, mean and max seconds, slowest
+    total first.
+    """
+    rows = {}
+    for name, _, duration, self_time, _, _ in list(_events):
+        row = rows.setdefault(name, {"name": name, "count": 0, "total": 0.0, "self": 0.0, "max": 0.0})
+        row["count"] += 1
+        row["total"] += duration
+        row["self"] += self_time
+        row["max"] = max(row["max"], duration)
+    for row in rows.values():
+        row["mean"] = row["total"] / row["count"]
+    return sorted(rows.values(), key=lambda r: r["total"], reverse=True)
+
+
+def print_summary(rows=None):
+    rows = summary() if rows is None else rows
+    width = max([len("span")] + [len(r["name"]) for r in rows])
+    print(f"{'span':<{width}} {'count':>6} {'total':>10} {'self':>10} {'mean':>10} {'max':>10}")
+    for r in rows:
+        print(
+            f"{r['name']:<{width}} {r['count']:>6} {r['total'] * 1000:>8.1f}ms {r['self'] * 1000:>8.1f}ms "
+            f"{r['mean'] * 1000:>8.1f}ms {r['max'] * 1000:>8.1f}ms"
+        )
+
+
+def finish_profile(command, trace_file=None):
+    """
+    Ends a '--profile' run: prints the summary table and writes the Chrome
+    trace to 'trace_file' (default: PROFILE_TRACE_DIR/<command>-<time>.json).
+    Returns the trace path.
+    """
+    disable()
+    if not trace_file:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        trace_file = os.path.join(PROFILE_TRACE_DIR, f"{command or 'djcli'}-{stamp}.json")
+    print_summary()
+    path = export_chrome_trace(trace_file)
+    print(f"{MSG_STATUS}Trace written to {path} (open in chrome://tracing or ui.perfetto.dev)")
+    return path
@@ -0,0 +1,194 @@
+"""
+modules/covers/backfill.py
+
+Adds album art to library tracks that have none (djcli covers backfill).
+
+- Tracks are found with a tag-only read (TagTransaction parses the ID3 tag
+  or MP4 atoms, not the audio), so scanning a large pool is cheap.
+- Covers are resolved on a thread pool; every provider call goes through a
+  per-provider TokenBucket (COVER_PROVIDER_RATE_LIMITS).
+- Each cover is embedded with a single write per file.
+- Progress is appended to COVER_BACKFILL_STATE_FILE, so an interrupted run
+  resumes where it stopped. Tracks with no cover found are retried only
+  after COVER_BACKFILL_RETRY_DAYS, and COVER_BACKFILL_MAX_LOOKUPS caps the
+  lookups per run so nightly runs stay within API quotas.
+"""
+
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.settings import (
+    DJ_POOL_BASE_PATH,
+    COVER_BACKFILL_WORKERS,
+    COVER_BACKFILL_MAX_LOOKUPS,
+    COVER_BACKFILL_RETRY_DAYS,
+    COVER_BACKFILL_STATE_FILE,
+    COVER_PROVIDER_RATE_LIMITS
+)
+from core.color_utils import (
+    MSG_ERROR, MSG_NOTICE, MSG_SUCCESS, MSG_STATUS, MSG_WARNING, LINE_BREAK
+)
+from core.cover_utils import fetch_album_cover, download_and_crop_cover
+from core.metadata_utils import TagTransaction, glean_artist_title
+from core.rate_limit import TokenBucket
+from modules.organize.retag import find_taggable_files
+
+STATUS_EMBEDDED = "embedded"
+STATUS_NOT_FOUND = "not_found"
+STATUS_FAILED = "failed"
+
+
+#########################################################
+#              RESUMABLE STATE
+#########################################################
+
+def load_backfill_state(state_file=None):
+    """
+    Returns {file_path: entry} from the state file; the last line per file wins.
+    """
+    state_file = state_file or COVER_BACKFILL_STATE_FILE
+    state = {}
+    if not os.path.exists(state_file):
+        return state
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    state[entry["path"]] = entry
+                except (ValueError, KeyError):
+                    continue
+    except Exception as e:
+        print(f"{MSG_ERROR}Could not read backfill state {state_file}: {e}")
+    return state
+
+
+def record_backfill(state, file_path, status, state_file=None, **extra):
+    """
+    Records the outcome for file_path in memory and appends it to the state file.
+    """
+    state_file = state_file or COVER_BACKFILL_STATE_FILE
+    entry = {"path": file_path, "status": status, "time": time.time()}
+    entry.update(extra)
+    state[file_path] = entry
+    try:
+        os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+        with open(state_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        print(f"{MSG_ERROR}Could not write backfill state {state_file}: {e}")
+    return entry
+
+
+def should_look_up(entry, retry_days=COVER_BACKFILL_RETRY_DAYS, now=None):
+    """
+    False for tracks recently found to have no cover anywhere.
+    """
+    if not entry or entry.get("status") != STATUS_NOT_FOUND:
+        return True
+    now = now if now is not None else time.time()
+    return now - entry.get("time", 0) >= retry_days * 86400
+
+
+#########################################################
+#              SCAN & RESOLVE
+#########################################################
+
+def build_rate_limiters(limits=None):
+    """
+    One TokenBucket per provider with a positive rate.
+    """
+    limits = COVER_PROVIDER_RATE_LIMITS if limits is None else limits
+    return {name: TokenBucket(rate) for name, rate in limits.items() if rate > 0}
+
+
+def find_tracks_missing_covers(root, state=None, retry_days=COVER_BACKFILL_RETRY_DAYS):
+    """
+    Yields (file_path, artist, title) for tracks without embedded art,
+    skipping ones that shouldn't be looked up again yet.
+    """
+    state = state or {}
+    for file_path in find_taggable_files(root):
+        if not should_look_up(state.get(file_path), retry_days):
+            continue
+        try:
+            tags = TagTransaction(file_path)
+        except Exception:
+            continue
+        if tags.has_cover:
+            continue
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        artist, title = glean_artist_title(file_path, {"title": stem}, tags=tags)
+        yield file_path, artist, title
+
+
+def backfill_track(file_path, artist, title, rate_limiters=None):
+    """
+    Resolves and embeds a cover for one track.
+    Returns (status, cover_url or None).
+    """
+    cover_url = fetch_album_cover(title, artist, rate_limiters=rate_limiters)
+    if not cover_url:
+        return STATUS_NOT_FOUND, None
+
+    cover_data = download_and_crop_cover(cover_url)
+    if not cover_data:
+        return STATUS_FAILED, cover_url
+
+    with TagTransaction(file_path) as tags:
+        tags.set_cover(cover_data)
+    return STATUS_EMBEDDED, cover_url
+
+
+def backfill_covers(
+    root=DJ_POOL_BASE_PATH,
+    workers=COVER_BACKFILL_WORKERS,
+    max_lookups=COVER_BACKFILL_MAX_LOOKUPS,
+    retry_days=COVER_BACKFILL_RETRY_DAYS,
+    state_file=None
+):
+    """
+    Scans root for tracks without artwork and embeds covers for them.
+    Returns {status: count}.
+    """
+    counts = {STATUS_EMBEDDED: 0, STATUS_NOT_FOUND: 0, STATUS_FAILED: 0}
+    if not os.path.isdir(root):
+        print(f"{MSG_ERROR}Folder not found: {root}")
+        return counts
+
+    state = load_backfill_state(state_file)
+    rate_limiters = build_rate_limiters()
+    print(f"{MSG_STATUS}Scanning '{root}' for tracks without cover art...\n{LINE_BREAK}")
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for file_path, artist, title in find_tracks_missing_covers(root, state, retry_days):
+            if max_lookups and len(futures) >= max_lookups:
+                print(f"{MSG_NOTICE}Reached {max_lookups} lookups for this run; the rest will be picked up next time.")
+                break
+            future = pool.submit(backfill_track, file_path, artist, title, rate_limiters)
+            futures[future] = (file_path, artist, title)
+
+        for future in as_completed(futures):
+            file_path, artist, title = futures[future]
+            rel_path = os.path.relpath(file_path, root)
+            try:
+                status, cover_url = future.result()
+            except Exception as e:
+                status, cover_url = STATUS_FAILED, None
+                print(f"{MSG_ERROR}{rel_path}: {e}")
+
+            counts[status] += 1
+            record_backfill(state, file_path, status, state_file, cover_url=cover_url)
+            if status == STATUS_EMBEDDED:
+                print(f"{MSG_SUCCESS}Cover added: {rel_path}")
+            elif status == STATUS_NOT_FOUND:
+                print(f"{MSG_WARNING}No cover found: {artist} - {title}")
+
+    print(
+        f"{LINE_BREAK}\n{MSG_SUCCESS}{counts[STATUS_EMBEDDED]} cover(s) added, "
+        f"{counts[STATUS_NOT_FOUND]} not found, {counts[STATUS_FAILED]} failed."
+    )
+    return counts
@@ -16,6 +16,7 @@ from config.settings import (
     DESTINATION_FOLDER,
     OUTPUT_FOLDER
 )
+from core.tracing import span, traced
 
 # Color Codes & Message Prefixes
 COLOR_RESET  = "\033[0m"
@@ -56,6 +57,7 @@ def determine_font_scaling_main(config, mix_number):
 
     return base_scaling
 
+@traced("create_album_cover")
 def create_album_cover(config, image_path, mix_number, output_path):
     """
     Creates an album cover image using dynamic scaling & positions from config.
@@ -63,6 +65,8 @@ def create_album_cover(config, image_path, mix_number, output_path):
     """
     try:
         with Image.open(image_path) as img:
+            with span("cover.decode"):
+                img.load()
             width, height = img.size
             new_size = min(width, height)
 
@@ -199,7 +203,8 @@ def create_album_cover(config, image_path, mix_number, output_path):
                     img_with_overlay.paste(logo_img, (int(logo_x), int(logo_y)), logo_img)
 
             # Save final
-            img_with_overlay.save(output_path)
+            with span("cover.save"):
+                img_with_overlay.save(output_path)
             return True
 
     except IOError:
@@ -0,0 +1,62 @@
+"""
+modules/download/audio_policy.py
+
+Decides how downloaded audio is encoded, based on TRANSCODE_POLICY:
+- "always": every download is converted to MP3 at the requested quality
+  (the original behaviour).
+- "native": prefer an AAC (or MP3) source that meets NATIVE_MIN_KBPS and
+  keep it as-is: AAC is only remuxed into .m4a, MP3 is left untouched.
+  Other codecs (Opus/Vorbis, which CDJs can't play) are converted to MP3.
+
+The choice is expressed through yt_dlp itself: the format selector prefers
+the native formats, and FFmpegExtractAudio gets an "ext>target" mapping so
+it copies instead of re-encoding whenever the source is already acceptable.
+"""
+
+from config.settings import TRANSCODE_POLICY, NATIVE_MIN_KBPS
+
+POLICY_ALWAYS = "always"
+POLICY_NATIVE = "native"
+
+# Containers kept without re-encoding under the "native" policy.
+NATIVE_EXTENSIONS = ("m4a", "mp3")
+
+
+def audio_format_selector(policy=None):
+    """
+    Returns the yt_dlp "format" string for the policy.
+    """
+    policy = (policy or TRANSCODE_POLICY).lower()
+    if policy != POLICY_NATIVE:
+        return "bestaudio/best"
+    return (
+        f"bestaudio[acodec^=mp4a][abr>={NATIVE_MIN_KBPS}]"
+        f"/bestaudio[acodec=mp3][abr>={NATIVE_MIN_KBPS}]"
+        "/bestaudio/best"
+    )
+
+
+def audio_postprocessor(quality="320", policy=None):
+    """
+    Returns the FFmpegExtractAudio postprocessor entry for the policy.
+    """
+    policy = (policy or TRANSCODE_POLICY).lower()
+    if policy != POLICY_NATIVE:
+        preferredcodec = "mp3"
+    else:
+        # Source ext -> target: m4a and mp3 stay as they are, raw AAC is
+        # remuxed into m4a, anything else is transcoded to mp3.
+        preferredcodec = "m4a>m4a/mp3>mp3/aac>m4a/mp3"
+    return {
+        "key": "FFmpegExtractAudio",
+        "preferredcodec": preferredcodec,
+        "preferredquality": quality,
+    }
+
+
+def output_extensions(policy=None):
+    """
+    File extensions a download can end up with under the policy.
+    """
+    policy = (policy or TRANSCODE_POLICY).lower()
+    return NATIVE_EXTENSIONS if policy == POLICY_NATIVE else ("mp3",)
@@ -7,163 +7,428 @@ then updates:
 - Album artwork (if none present)
 - File renaming ("Artist - Title.mp3" for YouTube; keep parentheses for SoundCloud)
 
+Whether audio is transcoded to MP3 or kept in its native AAC/MP3 form is
+decided by TRANSCODE_POLICY (see modules/download/audio_policy.py).
+
+Playlists and SoundCloud sets are streamed: entries are submitted to a
+worker pool as yt_dlp lists them, and each one goes through the same
+download/tag/cover pipeline and is recorded in the download index.
+
 Utilizes:
-- core.file_utils (sanitize_filename, remove_unwanted_brackets)
-- core.cover_utils (has_embedded_cover, fetch_album_cover, download_crop_and_attach_cover)
-- core.metadata_utils (glean_year_genre, glean_artist_title, update_id3_tags, check_metadata)
+- core.file_utils (build_track_filename, remove_unwanted_brackets)
+- core.cover_utils (fetch_album_cover, download_and_crop_cover)
+- core.metadata_utils (TagTransaction, glean_year_genre, glean_artist_title, check_metadata)
+- modules.organize.duplicates (warn_if_duplicate)
+- modules.download.planner (plan_downloads) for file-based runs
+- core.log_utils for progress logs (per-track steps are DEBUG/INFO, so quiet
+  batch runs skip them)
 """
 
 import os
+import itertools
+import threading
 import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
 
-from config.settings import DOWNLOAD_FOLDER_NAME, LINKS_FILE, DEBUG_MODE
+from config.settings import DOWNLOAD_FOLDER_NAME, LINKS_FILE, PLAYLIST_WORKERS
 from core.color_utils import (
-    MSG_ERROR, MSG_NOTICE, MSG_DEBUG, MSG_SUCCESS, MSG_STATUS, MSG_WARNING, LINE_BREAK
+    MSG_ERROR, MSG_NOTICE, MSG_SUCCESS, MSG_STATUS, MSG_WARNING
 )
-from core.file_utils import sanitize_filename, remove_unwanted_brackets
-from core.cover_utils import (
-    has_embedded_cover,
-    fetch_album_cover,
-    download_crop_and_attach_cover
+from core.file_utils import (
+    build_track_filename, remove_unwanted_brackets, claim_file, unique_destination_path
 )
+from core.cover_utils import fetch_album_cover, download_and_crop_cover
 from core.metadata_utils import (
+    TagTransaction,
     glean_artist_title,
     glean_year_genre,
-    update_id3_tags,
     check_metadata
 )
+from modules.organize.duplicates import warn_if_duplicate
+from modules.download.link_index import (
+    load_link_index,
+    record_link,
+    is_link_done,
+    canonical_link_id,
+    STATUS_DONE,
+    STATUS_FAILED
+)
+from modules.download.planner import plan_downloads, get_media_id
+from modules.download.audio_policy import audio_format_selector, audio_postprocessor, output_extensions
+from core.log_utils import get_logger
+from core.tracing import span, traced, is_enabled as tracing_enabled
+
+log = get_logger(__name__)
+
+# Entries fetched per page when a playlist is listed lazily (PagedList).
+PLAYLIST_PAGE_SIZE = 50
+
+# Download names before rename_file. Playlist entries run in parallel, so
+# theirs carry the media id: two entries with the same title would
+# otherwise write to the same file.
+OUTTMPL = "%(title)s.%(ext)s"
+UNIQUE_OUTTMPL = "%(title)s [%(id)s].%(ext)s"
+
+
+class YdlTraceHooks:
+    """
+    yt_dlp progress/postprocessor hooks that time the network download
+    ("download.fetch") and each postprocessor, e.g. the ffmpeg conversion
+    ("download.postprocess"), as spans inside the yt_dlp call.
+    """
+
+    def __init__(self):
+        self.open = {}
+
+    def _start(self, key, name, **args):
+        if key not in self.open:
+            self.open[key] = span(name, **args).__enter__()
+
+    def _end(self, key):
+        active = self.open.pop(key, None)
+        if active is not None:
+            active.__exit__(None, None, None)
+
+    def progress(self, d):
+        if d.get("status") == "downloading":
+            self._start("fetch", "download.fetch")
+        elif d.get("status") in ("finished", "error"):
+            self._end("fetch")
+
+    def postprocessor(self, d):
+        name = d.get("postprocessor")
+        if d.get("status") == "started":
+            self._start(name, "download.postprocess", postprocessor=name)
+        elif d.get("status") == "finished":
+            self._end(name)
+
+    def close(self):
+        for key in reversed(list(self.open)):
+            self._end(key)
 
-def download_track(link, output_dir, quality="320"):
+
+@traced("download_track")
+def download_track(link, output_dir, quality="320", info=None, unique_name=False):
     """
     Downloads an audio track from a link (YouTube, SoundCloud, etc.) using yt_dlp.
     Returns (final_file_path, info_dict) or (None, info_dict).
 
+    If 'info' is a dict already resolved with extract_info(download=False)
+    (see modules/download/planner.py), it is downloaded directly instead of
+    resolving the link again.
+
+    Playlists are not downloaded here: their entries are listed flat and
+    (None, playlist_info) is returned, so the caller can hand them to
+    download_playlist.
+
+    With 'unique_name', the file is downloaded under a name that includes
+    the media id (used for parallel playlist entries).
+
     After download:
       1) Identify if it's SoundCloud or another source.
       2) Gather artist/title from info_dict or ID3 (depending on source).
       3) Glean year/genre.
       4) Update ID3 tags.
       5) If missing cover, fetch and embed album art.
+         (Steps 2-5 share one TagTransaction: one tag read, one file write.)
       6) Rename the file:
          - For SoundCloud: "title.mp3" (keeping parentheses).
          - Otherwise: "Artist - Title.mp3" (with bracketed text removed).
       7) Print final metadata.
+      8) Warn if the track is already in the DJ pool.
+    From the download until the return, the file is claimed (see
+    core/file_utils.claim_file), so 'org_dl --watch' doesn't move it
+    halfway through.
     """
-    print(f"{MSG_STATUS}Downloading from link: {link}")
+    log.info("Downloading from link: %s", link)
 
     ydl_opts = {
-        "format": "bestaudio/best",
-        "outtmpl": f"{output_dir}/%(title)s.%(ext)s",
-        "postprocessors": [{
-            "key": "FFmpegExtractAudio",
-            "preferredcodec": "mp3",
-            "preferredquality": quality,
-        }],
+        "format": audio_format_selector(),
+        "outtmpl": os.path.join(output_dir, UNIQUE_OUTTMPL if unique_name else OUTTMPL),
+        "extract_flat": "in_playlist",
+        "postprocessors": [audio_postprocessor(quality)],
     }
+    hooks = None
+    locks = []
+    if tracing_enabled():
+        hooks = YdlTraceHooks()
+        ydl_opts["progress_hooks"] = [hooks.progress]
+        ydl_opts["postprocessor_hooks"] = [hooks.postprocessor]
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(link, download=True)
+            with span("yt_dlp"):
+                if info:
+                    info_dict = ydl.process_ie_result(info, download=True)
+                else:
+                    info_dict = ydl.extract_info(link, download=True)
+                if hooks:
+                    hooks.close()
 
             if not info_dict:
-                print(f"{MSG_ERROR}No info returned by yt_dlp.")
+                log.error("No info returned by yt_dlp.")
                 return None, None
 
-            # If the result is a playlist, use the first entry.
-            if "entries" in info_dict and info_dict["entries"]:
-                info_dict = info_dict["entries"][0]
+            if info_dict.get("_type") == "playlist":
+                log.notice("Link is a playlist; its entries are downloaded separately.")
+                return None, info_dict
 
-            # Use prepare_filename to get the expected file path.
-            downloaded_file_path = ydl.prepare_filename(info_dict)
+            # Path after postprocessing (the audio may have been kept as .m4a).
+            requested = info_dict.get("requested_downloads") or [{}]
+            downloaded_file_path = requested[0].get("filepath")
 
-            # Fix extension if needed:
-            if downloaded_file_path:
-                if downloaded_file_path.endswith(".opus"):
-                    downloaded_file_path = downloaded_file_path.rsplit('.', 1)[0] + ".mp3"
-                elif downloaded_file_path.endswith(".NA"):
-                    downloaded_file_path = downloaded_file_path.rsplit('.', 1)[0] + ".mp3"
+            if not downloaded_file_path:
+                # Fall back to prepare_filename and fix the extension.
+                downloaded_file_path = ydl.prepare_filename(info_dict)
+                if downloaded_file_path:
+                    base, ext = os.path.splitext(downloaded_file_path)
+                    if ext.lstrip(".") not in output_extensions():
+                        downloaded_file_path = base + ".mp3"
 
             if not downloaded_file_path or not os.path.exists(downloaded_file_path):
-                print(f"{MSG_ERROR}File not found after download. Possibly a postprocessing error. Expected path: {downloaded_file_path}")
+                log.error("File not found after download. Possibly a postprocessing error. Expected path: %s", downloaded_file_path)
                 return None, info_dict
 
-            print(f"{MSG_SUCCESS}Downloaded file: {downloaded_file_path}")
+            log.success("Downloaded file: %s", downloaded_file_path)
+            _claim(downloaded_file_path, locks)
 
             # 1) Determine if the source is SoundCloud.
             soundcloud = ("soundcloud.com" in link.lower())
 
+            # Read the tags once; every edit below is written in a single save.
+            try:
+                with span("tags.read"):
+                    tags = TagTransaction(downloaded_file_path)
+            except Exception as e:
+                log.error("Could not read tags from %s: %s", downloaded_file_path, e)
+                return downloaded_file_path, info_dict
+
             # 2) Get artist/title.
             if soundcloud:
                 # For SoundCloud, use uploader and exact title.
                 artist = info_dict.get("uploader", "Unknown Artist")
                 title = info_dict.get("title", "Unknown Title")
-                print(f"{MSG_DEBUG}SoundCloud link detected; using SoundCloud-specific logic.")
+                log.debug("SoundCloud link detected; using SoundCloud-specific logic.")
             else:
-                artist, title = glean_artist_title(downloaded_file_path, info_dict)
+                artist, title = glean_artist_title(downloaded_file_path, info_dict, tags=tags)
                 title = remove_unwanted_brackets(title)
 
             # 3) Glean year & genre.
             year, genre = glean_year_genre(info_dict, artist, title)
 
-            # 4) Update ID3 tags.
-            success = update_id3_tags(downloaded_file_path, artist, title, year, genre)
-
-            final_path = downloaded_file_path
-            if success:
-                # 5) If missing cover, attempt to fetch and embed.
-                if not has_embedded_cover(downloaded_file_path):
-                    cover_url = info_dict.get("thumbnail") if soundcloud else None
-                    if not cover_url:
-                        cover_url = fetch_album_cover(title, artist)
-                    if cover_url:
-                        download_crop_and_attach_cover(downloaded_file_path, cover_url)
-                    else:
-                        print(f"{MSG_WARNING}No album cover found.")
-
-                # 6) Rename file.
+            # 4) Stage ID3 tags.
+            tags.set(
+                title=title,
+                artist=artist,
+                year=year.strip() or "Unknown Year",
+                genre=genre.strip() or "Unknown Genre"
+            )
+
+            # 5) If missing cover, attempt to fetch and stage it.
+            if not tags.has_cover:
+                cover_url = info_dict.get("thumbnail") if soundcloud else None
+                if not cover_url:
+                    cover_url = fetch_album_cover(title, artist)
+                with span("cover.download"):
+                    cover_data = download_and_crop_cover(cover_url) if cover_url else None
+                if cover_data:
+                    tags.set_cover(cover_data)
+                    log.success("Album cover added to %s", downloaded_file_path)
+                else:
+                    log.warning("No album cover found.")
+
+            # Write tags and cover in one pass.
+            try:
+                with span("tags.write"):
+                    tags.commit()
+            except Exception as e:
+                log.error("Could not update ID3 for %s: %s", downloaded_file_path, e)
+                return downloaded_file_path, info_dict
+
+            # 6) Rename file.
+            with span("rename"):
                 final_path = rename_file(downloaded_file_path, artist, title, soundcloud)
+            if final_path != downloaded_file_path:
+                _claim(final_path, locks)
 
-                # 7) Print final metadata.
-                check_metadata(final_path)
+            # 7) Print final metadata (from memory, no re-read).
+            check_metadata(final_path, tags=tags)
+
+            # 8) Check the DJ pool for duplicates. Only a warning: a busy or
+            #    broken index must not fail a finished download.
+            with span("duplicate_check"):
+                try:
+                    warn_if_duplicate(final_path)
+                except Exception as e:
+                    log.error("Could not check %s against the DJ pool: %s", final_path, e)
 
             return final_path, info_dict
 
     except Exception as e:
-        if DEBUG_MODE:
-            print(f"{MSG_ERROR}Exception: {str(e)}")
-        else:
-            print(f"{MSG_ERROR}Download failed for link: {link}")
+        log.error("Download failed for link: %s", link)
+        log.debug("Exception: %s", e)
         return None, None
+    finally:
+        if hooks:
+            hooks.close()
+        for lock in locks:
+            try:
+                os.remove(lock)
+            except OSError:
+                pass
+
+
+def _claim(path, locks):
+    try:
+        locks.append(claim_file(path))
+    except OSError as e:
+        log.debug("Could not mark %s as in progress: %s", path, e)
+
+
+_RENAME_LOCK = threading.Lock()
 
 
 def rename_file(original_path, artist, title, soundcloud=False):
     """
-    Renames the downloaded file.
+    Renames the downloaded file, keeping its extension (.mp3 or .m4a).
     For SoundCloud: filename becomes "title.mp3" (retaining parentheses).
     For other sources: "Artist - Title.mp3" with bracketed text removed.
+    An existing file is never replaced: the name gets a " (1)" style suffix
+    (e.g. an Extended Mix and a Radio Edit of the same song in one playlist).
     """
     try:
-        if soundcloud:
-            new_basename = sanitize_filename(f"{title}.mp3")
-        else:
-            if not artist.strip():
-                artist = "Unknown Artist"
-            if not title.strip():
-                title = "Unknown Title"
-            new_basename = sanitize_filename(f"{artist} - {title}.mp3")
-
+        ext = os.path.splitext(original_path)[1].lstrip(".") or "mp3"
+        new_basename = build_track_filename(artist, title, soundcloud, ext)
         new_path = os.path.join(os.path.dirname(original_path), new_basename)
-        if new_path != original_path:
+        if new_path == original_path:
+            return original_path
+        # Playlist workers rename in parallel; pick and take the name atomically.
+        with _RENAME_LOCK:
+            new_path = unique_destination_path(new_path)
             os.rename(original_path, new_path)
-            print(f"{MSG_SUCCESS}Renamed file to: {new_path}")
-            return new_path
-        return original_path
+        log.success("Renamed file to: %s", new_path)
+        return new_path
 
     except Exception as e:
-        print(f"{MSG_ERROR}Could not rename file: {e}")
+        log.error("Could not rename file: %s", e)
         return original_path
 
 
+def is_playlist_link(link):
+    """
+    True for URLs that are known to be playlists/sets without resolving them.
+    """
+    link_id = canonical_link_id(link)
+    return link_id.startswith("youtube:playlist:") or (
+        link_id.startswith("soundcloud:") and "/sets/" in link_id
+    )
+
+
+def _iter_entries(entries):
+    """
+    Yields playlist entries as yt_dlp produces them. Handles lists,
+    generators/LazyList and PagedList (fetched one page at a time).
+    """
+    if hasattr(entries, "getslice"):
+        for start in itertools.count(0, PLAYLIST_PAGE_SIZE):
+            page = entries.getslice(start, start + PLAYLIST_PAGE_SIZE)
+            if not page:
+                return
+            yield from page
+            if len(page) < PLAYLIST_PAGE_SIZE:
+                return
+    else:
+        yield from entries or []
+
+
+def _entry_link(entry):
+    """
+    Returns a downloadable URL for a (possibly flat) playlist entry.
+    """
+    url = entry.get("webpage_url") or entry.get("url")
+    if url and "://" not in url and (entry.get("ie_key") or "").lower() == "youtube":
+        url = f"https://www.youtube.com/watch?v={url}"
+    return url
+
+
+def download_playlist(link, output_dir, link_index, info=None, max_workers=PLAYLIST_WORKERS, force=False):
+    """
+    Downloads every entry of a playlist/set in parallel.
+
+    Without 'info', the playlist is resolved with process=False, so entries
+    are submitted as yt_dlp pages through them rather than after the whole
+    list is resolved. Entries already recorded as downloaded are skipped,
+    unless 'force' is True.
+    Each entry is recorded on its own; the playlist link is recorded as done
+    only if every entry succeeded.
+    Returns the list of final file paths.
+    """
+    if info is None:
+        log.info("Listing playlist: %s", link)
+        try:
+            with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True}) as ydl:
+                info = ydl.extract_info(link, download=False, process=False)
+        except Exception as e:
+            log.error("Could not list playlist %s: %s", link, e)
+            record_link(link_index, link, STATUS_FAILED)
+            return []
+
+    title = info.get("title") or link
+    log.info("Downloading playlist '%s' with %d worker(s)", title, max_workers)
+
+    futures = []
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for entry in _iter_entries(info.get("entries")):
+            entry_link = _entry_link(entry) if entry else None
+            if not entry_link:
+                continue
+            if not force and is_link_done(link_index, entry_link):
+                skipped += 1
+                continue
+            futures.append(pool.submit(download_and_record, entry_link, output_dir, link_index, unique_name=True))
+
+    paths = [f.result() for f in futures]
+    downloaded = [p for p in paths if p]
+    failed = len(paths) - len(downloaded)
+
+    if skipped:
+        log.notice("Skipped %d already-downloaded playlist entr%s.", skipped, "y" if skipped == 1 else "ies")
+    if failed:
+        log.warning("%d of %d playlist entries failed: '%s'", failed, len(paths), title)
+    else:
+        log.success("Playlist complete (%d downloaded): '%s'", len(downloaded), title)
+
+    record_link(
+        link_index, link, STATUS_FAILED if failed else STATUS_DONE,
+        media_id=get_media_id(info), entry_count=len(paths) + skipped
+    )
+    return downloaded
+
+
+def download_and_record(link, output_dir, link_index, info=None, unique_name=False, force=False):
+    """
+    Downloads a link (optionally from pre-resolved info) and records the
+    outcome in the download index. Playlists are handed to download_playlist
+    (with 'force', their finished entries are downloaded again).
+    'unique_name' is passed on to download_track.
+    Returns the final file path (a list of paths for playlists) or None.
+    """
+    if (info and info.get("_type") == "playlist") or (info is None and is_playlist_link(link)):
+        return download_playlist(link, output_dir, link_index, info=info, force=force)
+
+    final_path, info_dict = download_track(link, output_dir, info=info, unique_name=unique_name)
+    if info_dict and info_dict.get("_type") == "playlist":
+        return download_playlist(link, output_dir, link_index, info=info_dict, force=force)
+
+    status = STATUS_DONE if final_path else STATUS_FAILED
+    record_link(
+        link_index, link, status, file_path=final_path,
+        media_id=get_media_id(info_dict or info)
+    )
+    return final_path
+
+
 def process_links_interactively():
     """
     Prompts user for links in a loop and downloads them.
@@ -173,6 +438,8 @@ def process_links_interactively():
         os.makedirs(DOWNLOAD_FOLDER_NAME)
         print(f"{MSG_NOTICE}Created download folder: {DOWNLOAD_FOLDER_NAME}")
 
+    link_index = load_link_index()
+
     while True:
         link = input("Enter YouTube/SoundCloud link (or 'q' to quit): ").strip()
         if link.lower() in ("q", "quit", "exit"):
@@ -182,13 +449,18 @@ def process_links_interactively():
             print(f"{MSG_WARNING}No link provided. Try again.\n")
             continue
 
-        download_track(link, DOWNLOAD_FOLDER_NAME)
+        if is_link_done(link_index, link):
+            print(f"{MSG_NOTICE}Already downloaded before; downloading again.")
+        download_and_record(link, DOWNLOAD_FOLDER_NAME, link_index)
 
 
-def process_links_from_file():
+def process_links_from_file(force=False):
     """
     Reads a list of links from LINKS_FILE and downloads them.
     If the file does not exist, creates it and prompts the user.
+
+    Links already downloaded successfully (per the download index) and
+    repeated links are skipped, unless 'force' is True.
     """
     dir_path = os.path.dirname(LINKS_FILE)
     if dir_path and not os.path.exists(dir_path):
@@ -221,10 +493,34 @@ def process_links_from_file():
         os.makedirs(DOWNLOAD_FOLDER_NAME)
         print(f"{MSG_NOTICE}Created download folder: {DOWNLOAD_FOLDER_NAME}")
 
-    print(f"{MSG_STATUS}Processing {len(links)} links from file '{LINKS_FILE}'\n{LINE_BREAK}")
+    link_index = load_link_index()
+    pending = []
+    seen_ids = set()
+    skipped = 0
     for link in links:
-        download_track(link, DOWNLOAD_FOLDER_NAME)
-    print(f"{MSG_NOTICE}All downloads completed from {LINKS_FILE}")
+        link_id = canonical_link_id(link)
+        if link_id in seen_ids or (not force and is_link_done(link_index, link)):
+            skipped += 1
+            continue
+        seen_ids.add(link_id)
+        pending.append(link)
+
+    if skipped:
+        log.notice("Skipping %d already-downloaded or repeated link(s).", skipped)
+    if not pending:
+        log.success("Nothing new to download from '%s'.", LINKS_FILE)
+        return
+
+    queue, skipped_media = plan_downloads(pending, link_index, force=force)
+    for link, reason, media_id in skipped_media:
+        if not force and reason != "same media as an earlier link":
+            # Remember it, so the next run doesn't resolve it again.
+            record_link(link_index, link, STATUS_DONE, media_id=media_id)
+
+    log.info("Processing %d links from file '%s'", len(queue), LINKS_FILE)
+    for item in queue:
+        download_and_record(item["link"], DOWNLOAD_FOLDER_NAME, link_index, info=item["info"], force=force)
+    log.notice("All downloads completed from %s", LINKS_FILE)
 
 
 def main():
@@ -0,0 +1,154 @@
+"""
+modules/download/link_index.py
+
+Persistent record of processed download links, so re-running a links file
+only fetches new or previously failed items.
+
+- Links are keyed by a canonical media ID normalized from the URL
+  ("youtube:<video id>", "soundcloud:<user>/<track>"), so different URL
+  forms of the same track share one entry.
+- Entries are appended to DOWNLOAD_INDEX_FILE as JSON lines; the last line
+  for an ID wins. The file is compacted when it grows well past the number
+  of live entries.
+"""
+
+import os
+import re
+import json
+import datetime
+import threading
+from urllib.parse import urlparse, parse_qs
+
+from config.settings import DOWNLOAD_INDEX_FILE
+from core.color_utils import MSG_ERROR, MSG_WARNING
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Playlist entries are recorded from worker threads.
+_record_lock = threading.Lock()
+
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_YOUTUBE_HOSTS = ("youtube.com", "youtu.be", "youtube-nocookie.com")
+
+
+def _strip_host(netloc):
+    host = netloc.lower().split(":")[0]
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+
+def canonical_link_id(link):
+    """
+    Returns a stable ID for a YouTube/SoundCloud URL:
+      https://youtu.be/abc123DEF45            -> youtube:abc123DEF45
+      https://www.youtube.com/watch?v=abc...  -> youtube:abc123DEF45
+      https://soundcloud.com/Artist/Track?x=1 -> soundcloud:artist/track
+    Anything else falls back to "url:<scheme-less URL without query>".
+    """
+    link = link.strip()
+    parsed = urlparse(link if "://" in link else f"https://{link}")
+    host = _strip_host(parsed.netloc)
+    parts = [p for p in parsed.path.split("/") if p]
+
+    if host.endswith(_YOUTUBE_HOSTS):
+        video_id = None
+        if host == "youtu.be" and parts:
+            video_id = parts[0]
+        elif parts and parts[0] in ("shorts", "embed", "live", "v") and len(parts) > 1:
+            video_id = parts[1]
+        else:
+            video_id = parse_qs(parsed.query).get("v", [None])[0]
+        if video_id and _YOUTUBE_ID.match(video_id):
+            return f"youtube:{video_id}"
+        list_id = parse_qs(parsed.query).get("list", [None])[0]
+        if list_id:
+            return f"youtube:playlist:{list_id}"
+
+    if host == "soundcloud.com" and len(parts) >= 2:
+        return "soundcloud:" + "/".join(p.lower() for p in parts)
+
+    return "url:" + (host + parsed.path).rstrip("/")
+
+
+def load_link_index(index_file=None):
+    """
+    Reads the index file (default DOWNLOAD_INDEX_FILE) and returns
+    {link_id: entry}. Rewrites the file compactly if it holds many
+    superseded lines.
+    """
+    index_file = index_file or DOWNLOAD_INDEX_FILE
+    entries = {}
+    if not os.path.exists(index_file):
+        return entries
+
+    line_count = 0
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                line_count += 1
+                try:
+                    entry = json.loads(line)
+                    entries[entry["id"]] = entry
+                except (ValueError, KeyError):
+                    print(f"{MSG_WARNING}Ignoring malformed line in {index_file}")
+    except Exception as e:
+        print(f"{MSG_ERROR}Could not read download index {index_file}: {e}")
+        return {}
+
+    if line_count > 2 * len(entries) + 100:
+        _rewrite_index(index_file, entries)
+    return entries
+
+
+def _rewrite_index(index_file, entries):
+    tmp_path = f"{index_file}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, index_file)
+    except Exception as e:
+        print(f"{MSG_ERROR}Could not compact download index {index_file}: {e}")
+
+
+def record_link(entries, link, status, file_path=None, index_file=None, **extra):
+    """
+    Records the outcome for `link` in memory and appends it to the index file
+    (default DOWNLOAD_INDEX_FILE). Safe to call from worker threads.
+    Returns the new entry.
+    """
+    index_file = index_file or DOWNLOAD_INDEX_FILE
+    entry = {
+        "id": canonical_link_id(link),
+        "link": link,
+        "status": status,
+        "file_path": file_path,
+        "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    entry.update(extra)
+
+    with _record_lock:
+        entries[entry["id"]] = entry
+        try:
+            index_dir = os.path.dirname(index_file)
+            if index_dir:
+                os.makedirs(index_dir, exist_ok=True)
+            with open(index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"{MSG_ERROR}Could not write download index {index_file}: {e}")
+    return entry
+
+
+def is_link_done(entries, link):
+    """
+    True if `link` (in any URL form) was already downloaded successfully.
+    """
+    entry = entries.get(canonical_link_id(link))
+    return bool(entry) and entry.get("status") == STATUS_DONE
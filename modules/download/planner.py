@@ -0,0 +1,166 @@
+"""
+modules/download/planner.py
+
+Planning pass for file-based downloads. Before anything is fetched, the
+metadata for every link is resolved concurrently with
+yt_dlp.extract_info(download=False), then:
+- Links that point to the same media (same extractor + ID) are collapsed
+- Media already recorded as downloaded, or whose final filename already
+  exists in the DJ pool, is skipped
+- The remaining work is sorted by expected download size (smallest first)
+
+Playlists are listed flat (entries are not resolved one by one here); the
+downloader streams their entries later.
+
+The resolved info dicts are handed to download_track, so the expensive
+download/transcode phase doesn't resolve each link a second time.
+"""
+
+import yt_dlp
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import DJ_POOL_BASE_PATH, PLANNER_WORKERS
+from core.color_utils import MSG_STATUS, MSG_WARNING
+from core.file_utils import build_track_filename
+from core.library_index import library_files
+from core.log_utils import get_logger
+from core.metadata_utils import glean_artist_title_from_info
+from modules.download.link_index import STATUS_DONE
+from modules.download.audio_policy import audio_format_selector, output_extensions
+
+log = get_logger(__name__)
+
+# Assumed bitrate (kbps) when a source reports neither size nor bitrate.
+DEFAULT_ABR_KBPS = 160
+
+
+def resolve_link_metadata(link):
+    """
+    Resolves metadata for a single link without downloading.
+    Returns (link, info_dict or None).
+    """
+    ydl_opts = {
+        "format": audio_format_selector(),
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "extract_flat": "in_playlist",
+    }
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return link, ydl.extract_info(link, download=False)
+    except Exception as e:
+        log.debug("Could not resolve %s: %s", link, e)
+        return link, None
+
+
+def get_media_id(info):
+    """
+    Returns "<extractor>:<id>" for an info dict, or None.
+    """
+    if not info or not info.get("id"):
+        return None
+    extractor = (info.get("extractor_key") or info.get("extractor") or "media").lower()
+    return f"{extractor}:{info['id']}"
+
+
+def expected_size(info):
+    """
+    Best guess of the download size in bytes for an info dict.
+    Playlists report the sum of their entries.
+    """
+    if info.get("entries"):
+        return sum(expected_size(e) for e in info["entries"] if e)
+
+    candidates = [info] + list(info.get("requested_formats") or [])
+    for item in candidates:
+        size = item.get("filesize") or item.get("filesize_approx")
+        if size:
+            return int(size)
+
+    duration = info.get("duration") or 0
+    abr = info.get("abr") or info.get("tbr") or DEFAULT_ABR_KBPS
+    return int(duration * abr * 1000 / 8)
+
+
+def expected_basename(link, info, ext="mp3"):
+    """
+    Predicts the final file name download_track will give this media.
+    """
+    soundcloud = "soundcloud.com" in link.lower()
+    if soundcloud:
+        artist = info.get("uploader") or "Unknown Artist"
+        title = info.get("title") or "Unknown Title"
+    else:
+        artist, title = glean_artist_title_from_info(info)
+    return build_track_filename(artist, title, soundcloud, ext)
+
+
+def collect_pool_basenames(root=DJ_POOL_BASE_PATH):
+    """
+    Returns the set of lowercase file names under the DJ pool.
+    """
+    return {entry.name.lower() for entry in library_files(root)}
+
+
+def plan_downloads(links, link_index=None, pool_names=None, max_workers=PLANNER_WORKERS, force=False):
+    """
+    Resolves all links concurrently and builds the work queue.
+    With 'force', media already downloaded or in the DJ pool is queued
+    again (repeated links are still collapsed).
+
+    Returns (queue, skipped):
+      queue   - [{"link", "info", "media_id", "expected_size"}, ...] sorted by
+                expected size; links that could not be resolved come last
+                with info=None so download_track can retry them.
+      skipped - [(link, reason, media_id), ...]
+    """
+    link_index = link_index or {}
+    if force:
+        pool_names, done_media = set(), set()
+    else:
+        if pool_names is None:
+            pool_names = collect_pool_basenames()
+        done_media = {
+            entry["media_id"] for entry in link_index.values()
+            if entry.get("status") == STATUS_DONE and entry.get("media_id")
+        }
+
+    print(f"{MSG_STATUS}Resolving metadata for {len(links)} link(s) with {max_workers} worker(s)...")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        resolved = list(pool.map(resolve_link_metadata, links))
+
+    queue, unresolved, skipped = [], [], []
+    seen = set()
+    for link, info in resolved:
+        if not info:
+            unresolved.append({"link": link, "info": None, "media_id": None, "expected_size": 0})
+            continue
+
+        mid = get_media_id(info)
+        if mid in seen:
+            skipped.append((link, "same media as an earlier link", mid))
+            continue
+        seen.add(mid)
+
+        if mid in done_media:
+            skipped.append((link, "already downloaded", mid))
+            continue
+        if info.get("_type") != "playlist" and any(
+            expected_basename(link, info, ext).lower() in pool_names for ext in output_extensions()
+        ):
+            skipped.append((link, "already in DJ pool", mid))
+            continue
+
+        queue.append({"link": link, "info": info, "media_id": mid, "expected_size": expected_size(info)})
+
+    queue.sort(key=lambda item: item["expected_size"])
+
+    total_mb = sum(item["expected_size"] for item in queue) / (1024 * 1024)
+    print(f"{MSG_STATUS}Planned {len(queue)} download(s), ~{total_mb:.1f} MB expected.")
+    for link, reason, _ in skipped:
+        log.notice("Skipping (%s): %s", reason, link)
+    if unresolved:
+        print(f"{MSG_WARNING}{len(unresolved)} link(s) could not be resolved; they will be tried last.")
+
+    return queue + unresolved, skipped
@@ -9,12 +9,13 @@ date-based folders, as well as other post-download tasks:
 """
 
 import os
-import shutil
 import datetime
 from config.settings import DJ_POOL_BASE_PATH, DOWNLOAD_FOLDER_NAME
 from core.color_utils import (
     MSG_ERROR, MSG_NOTICE, MSG_DEBUG, MSG_SUCCESS, MSG_STATUS, MSG_WARNING, LINE_BREAK
 )
+from core.file_utils import unique_destination_path
+from core.move_engine import move_file
 
 def move_to_date_based_folder(file_path):
     """
@@ -38,8 +39,10 @@ def move_to_date_based_folder(file_path):
         if not os.path.exists(final_folder):
             os.makedirs(final_folder)
 
-        destination_path = os.path.join(final_folder, os.path.basename(file_path))
-        shutil.move(file_path, destination_path)
+        destination_path = unique_destination_path(
+            os.path.join(final_folder, os.path.basename(file_path))
+        )
+        move_file(file_path, destination_path)
         print(f"{MSG_SUCCESS}Moved: {file_path} => {destination_path}")
         return destination_path
     except Exception as e:
@@ -0,0 +1,383 @@
+"""
+modules/mixcloud/fake_server.py
+
+Local stand-in for the parts of the Mixcloud API the uploader talks to, so
+uploads can be tested and load-tested end to end without the network.
+
+- GET  /oauth/authorize      redirects to redirect_uri with a code
+- POST /oauth/access_token   trades any code for a new access token
+- GET  /me/                  200 for a known token, OAuthException otherwise
+- POST /upload/              reads the multipart body as it streams in
+                             (Content-Length or chunked), recording each
+                             part's size and BLAKE2 digest, never the file
+
+Upload responses follow a fault schedule, one entry per upload request:
+    ok              normal success
+    rate_limit[:N]  403 RateLimitException with retry_after N (default 60)
+    500, 503, ...   that server error
+    slow:S          success after an extra S seconds
+e.g. "rate_limit:30,503,slow:2". Once the schedule runs out every upload
+succeeds, unless it repeats.
+
+Usage:
+    python -m modules.mixcloud.fake_server --port 8002 --faults "ok,rate_limit:30"
+    MIXCLOUD_API_URL=http://127.0.0.1:8002 MIXCLOUD_OAUTH_URL=http://127.0.0.1:8002/oauth djcli up_mixes
+"""
+
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+import http.server
+from urllib.parse import urlparse, parse_qs, urlencode
+
+FAKE_USER = "djcli-fake"
+READ_CHUNK = 64 * 1024
+
+
+def parse_faults(spec):
+    """
+    "ok,rate_limit:30,503,slow:2" (or a list of such entries) ->
+    [("ok", None), ("rate_limit", 30.0), ("error", 503), ("slow", 2.0)].
+    Raises ValueError.
+    """
+    entries = spec.split(",") if isinstance(spec, str) else list(spec)
+    faults = []
+    for entry in entries:
+        entry = str(entry).strip().lower()
+        if not entry:
+            continue
+        kind, _, arg = entry.partition(":")
+        if kind == "ok":
+            faults.append(("ok", None))
+        elif kind == "rate_limit":
+            faults.append(("rate_limit", float(arg or 60)))
+        elif kind == "slow":
+            faults.append(("slow", float(arg or 1)))
+        elif kind.isdigit() and 500 <= int(kind) <= 599:
+            faults.append(("error", int(kind)))
+        else:
+            raise ValueError(f"unknown fault '{entry}'")
+    return faults
+
+
+class MultipartReader:
+    """
+    Incremental multipart/form-data parser. Text fields are kept; file
+    parts are only counted and hashed, so memory stays flat.
+    """
+
+    def __init__(self, boundary):
+        self._delimiter = b"\r\n--" + boundary
+        self._buffer = b"\r\n"  # lets the first boundary match the delimiter
+        self._state = "preamble"
+        self._part = None
+        self.parts = []
+        self.complete = False
+
+    def feed(self, data):
+        self._buffer += data
+        while not self.complete:
+            if self._state == "headers":
+                end = self._buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    return
+                self._start_part(self._buffer[:end].decode("utf-8", "replace"))
+                self._buffer = self._buffer[end + 4:]
+                self._state = "body"
+                continue
+
+            at = self._buffer.find(self._delimiter)
+            if at < 0:
+                keep = len(self._delimiter) - 1
+                if len(self._buffer) > keep:
+                    self._consume(self._buffer[:-keep])
+                    self._buffer = self._buffer[-keep:]
+                return
+            after = at + len(self._delimiter)
+            self._consume(self._buffer[:at])
+            if len(self._buffer) < after + 2:
+                self._buffer = self._buffer[at:]
+                return
+            self._end_part()
+            if self._buffer[after:after + 2] == b"--":
+                self.complete = True
+                self._buffer = b""
+                return
+            self._buffer = self._buffer[after + 2:]
+            self._state = "headers"
+
+    def _start_part(self, header_text):
+        name = re.search(r'\bname="([^"]*)"', header_text)
+        filename = re.search(r'\bfilename="([^"]*)"', header_text)
+        self._part = {
+            "name": name.group(1) if name else "",
+            "filename": filename.group(1) if filename else None,
+            "size": 0,
+            "digest": hashlib.blake2b(digest_size=16),
+            "value": bytearray()
+        }
+
+    def _consume(self, data):
+        if self._state != "body" or self._part is None or not data:
+            return
+        self._part["size"] += len(data)
+        self._part["digest"].update(data)
+        if self._part["filename"] is None:
+            self._part["value"] += data
+
+    def _end_part(self):
+        part, self._part = self._part, None
+        if part is None:
+            return
+        part["digest"] = part["digest"].hexdigest()
+        part["value"] = bytes(part["value"]).decode("utf-8", "replace") if part["filename"] is None else None
+        self.parts.append(part)
+
+    def fields(self):
+        return {p["name"]: p["value"] for p in self.parts if p["filename"] is None}
+
+    def files(self):
+        return {p["name"]: p for p in self.parts if p["filename"] is not None}
+
+
+def _boundary(content_type):
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    return match.group(1).encode("latin-1") if match else None
+
+
+class FakeMixcloudHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "FakeMixcloud/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _oauth_error(self):
+        self._send_json(401, {"error": {"type": "OAuthException", "message": "Invalid access token."}})
+
+    def _query(self):
+        return {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+
+    def _body_chunks(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                remaining = size
+                while remaining:
+                    chunk = self.rfile.read(min(READ_CHUNK, remaining))
+                    if not chunk:
+                        return
+                    remaining -= len(chunk)
+                    yield chunk
+                self.rfile.readline()
+        else:
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining:
+                chunk = self.rfile.read(min(READ_CHUNK, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        query = self._query()
+        if path == "/oauth/authorize":
+            target = query.get("redirect_uri", "")
+            self.send_response(302)
+            self.send_header("Location", f"{target}?{urlencode({'code': 'fake-code'})}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif path == "/me/":
+            if self.server.token_ok(query.get("access_token")):
+                self._send_json(200, {"username": FAKE_USER, "key": f"/{FAKE_USER}/"})
+            else:
+                self._oauth_error()
+        else:
+            self._send_json(404, {"error": {"type": "NotFound", "message": path}})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/oauth/access_token":
+            form = {k: v[0] for k, v in parse_qs(b"".join(self._body_chunks()).decode("utf-8")).items()}
+            if not form.get("code"):
+                self._send_json(400, {"error": {"type": "OAuthException", "message": "Missing code."}})
+                return
+            self._send_json(200, {"access_token": self.server.issue_token()})
+        elif path == "/upload/":
+            self._handle_upload()
+        else:
+            self._send_json(404, {"error": {"type": "NotFound", "message": path}})
+
+    def _handle_upload(self):
+        started = time.monotonic()
+        boundary = _boundary(self.headers.get("Content-Type"))
+        reader = MultipartReader(boundary) if boundary else None
+        received = 0
+        for chunk in self._body_chunks():
+            received += len(chunk)
+            if reader is not None:
+                reader.feed(chunk)
+
+        token_ok = self.server.token_ok(self._query().get("access_token"))
+        fault, arg = self.server.next_fault() if token_ok else ("ok", None)
+        record = {
+            "bytes": received,
+            "seconds": time.monotonic() - started,
+            "fields": reader.fields() if reader else {},
+            "files": {
+                name: {"filename": p["filename"], "size": p["size"], "digest": p["digest"]}
+                for name, p in (reader.files() if reader else {}).items()
+            },
+            "fault": fault
+        }
+
+        # Decide and record first, so a client that has its response can
+        # already see the upload in server.uploads.
+        if not token_ok:
+            status = 403
+            payload = {"error": {"type": "OAuthException", "message": "Invalid access token."}}
+        elif fault == "rate_limit":
+            status = 403
+            payload = {"error": {
+                "type": "RateLimitException",
+                "message": "You are being rate limited.",
+                "retry_after": int(arg)
+            }}
+        elif fault == "error":
+            status = arg
+            payload = {"error": {"type": "ServerError", "message": "Injected failure."}}
+        elif reader is None or not reader.complete or "mp3" not in record["files"] or not record["fields"].get("name"):
+            status = 400
+            payload = {"error": {"type": "InvalidFormException", "message": "Missing name or mp3."}}
+        else:
+            if fault == "slow":
+                time.sleep(arg)
+            status = 200
+            slug = re.sub(r"[^a-z0-9]+", "-", record["fields"]["name"].lower()).strip("-")
+            payload = {"result": {
+                "success": True,
+                "message": "Uploaded",
+                "key": f"/{FAKE_USER}/{slug}/"
+            }}
+        record["status"] = status
+        self.server.record_upload(record)
+        self._send_json(status, payload)
+
+
+class FakeMixcloudServer(http.server.ThreadingHTTPServer):
+    """
+    Threaded fake Mixcloud API. Use as a context manager (serves in a
+    background thread) or call serve_forever() yourself.
+    Every upload request is appended to 'uploads'.
+    """
+
+    # Handler threads are joined by server_close(), so stop() returns only
+    # after every request has been answered and recorded.
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, host="127.0.0.1", port=0, faults=(), repeat=False,
+                 tokens=("fake-token",), verbose=False):
+        super().__init__((host, port), FakeMixcloudHandler)
+        self.faults = parse_faults(faults)
+        self.repeat = repeat
+        self.verbose = verbose
+        self.uploads = []
+        self._tokens = set(tokens)
+        self._issued = 0
+        self._fault_index = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def issue_token(self):
+        with self._lock:
+            self._issued += 1
+            token = f"fake-token-{self._issued}"
+            self._tokens.add(token)
+            return token
+
+    def token_ok(self, token):
+        with self._lock:
+            return token in self._tokens
+
+    def next_fault(self):
+        with self._lock:
+            if not self.faults:
+                return "ok", None
+            if self._fault_index >= len(self.faults):
+                if not self.repeat:
+                    return "ok", None
+                self._fault_index = 0
+            fault = self.faults[self._fault_index]
+            self._fault_index += 1
+            return fault
+
+    def record_upload(self, record):
+        with self._lock:
+            self.uploads.append(record)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake Mixcloud API for upload testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--faults", default="", help='e.g. "ok,rate_limit:30,503,slow:2"')
+    parser.add_argument("--repeat", action="store_true", help="Cycle through the fault schedule.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+    try:
+        server = FakeMixcloudServer(args.host, args.port, args.faults, args.repeat, verbose=args.verbose)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Fake Mixcloud API on {server.url} (token: fake-token)")
+    print(f"  MIXCLOUD_API_URL={server.url} MIXCLOUD_OAUTH_URL={server.url}/oauth")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{len(server.uploads)} upload request(s) served.")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
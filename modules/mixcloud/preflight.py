@@ -0,0 +1,178 @@
+"""
+modules/mixcloud/preflight.py
+
+Checks a whole upload batch before the first byte is sent, so a bad file
+fails the batch in seconds instead of after a multi-hundred-MB transfer.
+
+- Tracks: the header is parsed (mutagen), and duration, bitrate and file
+  size are checked against MIXCLOUD_* limits. A file much smaller than
+  its header's duration x bitrate is reported as truncated.
+- Covers: format, dimensions and file size are checked. Covers that are
+  too large or not JPEG/PNG are re-encoded (JPEG, at most
+  MIXCLOUD_COVER_MAX_DIMENSION per side) into PREFLIGHT_COVER_DIR. The
+  plan uploads the new file ("cover") and keeps the original in
+  "source_cover", which is what gets moved to FINISHED_DIRECTORY.
+- All tracks and covers are probed at once on PREFLIGHT_WORKERS threads.
+"""
+
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import mutagen
+from PIL import Image
+
+from config.settings import (
+    MIXCLOUD_MAX_UPLOAD_MB,
+    MIXCLOUD_MIN_DURATION_SECONDS,
+    MIXCLOUD_MIN_BITRATE_KBPS,
+    MIXCLOUD_COVER_MAX_MB,
+    MIXCLOUD_COVER_MAX_DIMENSION,
+    MIXCLOUD_COVER_MIN_DIMENSION,
+    PREFLIGHT_WORKERS,
+    PREFLIGHT_COVER_DIR
+)
+from core.color_utils import MSG_ERROR, MSG_STATUS, MSG_SUCCESS, MSG_WARNING
+from core.cover_utils import image_to_jpeg_bytes
+
+COVER_FORMATS = ("JPEG", "PNG")
+# Files below this share of header duration x bitrate are treated as truncated.
+MIN_SIZE_RATIO = 0.5
+
+
+def probe_track(path):
+    """
+    Returns (info, errors, warnings) for one track; info has
+    size, duration (seconds) and bitrate (kbps) when readable.
+    """
+    errors, warnings = [], []
+    info = {"size": 0, "duration": None, "bitrate": None}
+    try:
+        info["size"] = os.path.getsize(path)
+    except OSError as e:
+        return info, [f"not readable: {e}"], warnings
+
+    if info["size"] == 0:
+        return info, ["file is empty"], warnings
+    if info["size"] > MIXCLOUD_MAX_UPLOAD_MB * 1024 * 1024:
+        errors.append(f"{info['size'] / 1e6:.0f} MB exceeds the {MIXCLOUD_MAX_UPLOAD_MB} MB upload limit")
+
+    try:
+        audio = mutagen.File(path)
+    except Exception as e:
+        return info, errors + [f"corrupt audio header: {e}"], warnings
+    if audio is None or getattr(audio, "info", None) is None:
+        return info, errors + ["not a recognized audio file"], warnings
+
+    duration = getattr(audio.info, "length", 0) or 0
+    bitrate = (getattr(audio.info, "bitrate", 0) or 0) // 1000
+    info["duration"], info["bitrate"] = duration, bitrate
+
+    if duration < MIXCLOUD_MIN_DURATION_SECONDS:
+        errors.append(f"duration {duration:.0f}s is under {MIXCLOUD_MIN_DURATION_SECONDS}s")
+    if bitrate and bitrate < MIXCLOUD_MIN_BITRATE_KBPS:
+        warnings.append(f"low bitrate ({bitrate} kbps)")
+    if bitrate and duration:
+        expected = duration * bitrate * 1000 / 8
+        if info["size"] < expected * MIN_SIZE_RATIO:
+            errors.append(
+                f"looks truncated ({info['size'] / 1e6:.1f} MB for {duration / 60:.0f} min at {bitrate} kbps)"
+            )
+    return info, errors, warnings
+
+
+def _reencode_cover(path, out_dir):
+    with Image.open(path) as img:
+        if img.format == "JPEG":
+            img.draft("RGB", (MIXCLOUD_COVER_MAX_DIMENSION, MIXCLOUD_COVER_MAX_DIMENSION))
+        img.thumbnail((MIXCLOUD_COVER_MAX_DIMENSION, MIXCLOUD_COVER_MAX_DIMENSION))
+        data = image_to_jpeg_bytes(img, quality=90)
+    os.makedirs(out_dir, exist_ok=True)
+    # Covers with the same name in different folders must not overwrite each other.
+    tag = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=4).hexdigest()
+    out_path = os.path.join(out_dir, f"{os.path.splitext(os.path.basename(path))[0]}-{tag}.jpg")
+    with open(out_path, "wb") as f:
+        f.write(data)
+    return out_path
+
+
+def probe_cover(path, out_dir=None):
+    """
+    Returns (cover path to upload, errors, warnings). The path is a
+    re-encoded copy when the original is too large or not JPEG/PNG.
+    """
+    out_dir = out_dir or PREFLIGHT_COVER_DIR
+    errors, warnings = [], []
+    try:
+        size = os.path.getsize(path)
+        with Image.open(path) as img:
+            fmt, (width, height) = img.format, img.size
+            img.verify()
+    except Exception as e:
+        return path, [f"unreadable cover image: {e}"], warnings
+
+    if min(width, height) < MIXCLOUD_COVER_MIN_DIMENSION:
+        warnings.append(f"cover is only {width}x{height}")
+    if width != height:
+        warnings.append(f"cover isn't square ({width}x{height})")
+
+    reasons = []
+    if fmt not in COVER_FORMATS:
+        reasons.append(f"{fmt} format")
+    if max(width, height) > MIXCLOUD_COVER_MAX_DIMENSION:
+        reasons.append(f"{width}x{height}")
+    if size > MIXCLOUD_COVER_MAX_MB * 1024 * 1024:
+        reasons.append(f"{size / 1e6:.1f} MB")
+    if not reasons:
+        return path, errors, warnings
+
+    try:
+        new_path = _reencode_cover(path, out_dir)
+    except Exception as e:
+        return path, [f"could not re-encode cover ({', '.join(reasons)}): {e}"], warnings
+    if os.path.getsize(new_path) > MIXCLOUD_COVER_MAX_MB * 1024 * 1024:
+        errors.append(f"cover still over {MIXCLOUD_COVER_MAX_MB} MB after re-encoding")
+    else:
+        warnings.append(f"cover re-encoded ({', '.join(reasons)})")
+    return new_path, errors, warnings
+
+
+def preflight_plan(plan, workers=PREFLIGHT_WORKERS, out_dir=None):
+    """
+    Probes every track and cover in an upload plan concurrently.
+    Re-encoded covers replace item["cover"] (the original is kept in
+    item["source_cover"]); each item also gets the track's "size" for
+    later reporting.
+    Returns the list of error messages (empty when the batch can go).
+    """
+    if not plan:
+        return []
+    print(f"{MSG_STATUS}Pre-flight: checking {len(plan)} track(s) and their covers...")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        track_jobs = [pool.submit(probe_track, item["track"]) for item in plan]
+        cover_jobs = [
+            pool.submit(probe_cover, item["cover"], out_dir) if item.get("cover") else None
+            for item in plan
+        ]
+
+        errors = []
+        for item, track_job, cover_job in zip(plan, track_jobs, cover_jobs):
+            name = os.path.basename(item["track"])
+            info, problems, notes = track_job.result()
+            item["size"] = info["size"]
+            if cover_job is not None:
+                cover, cover_problems, cover_notes = cover_job.result()
+                if cover != item["cover"]:
+                    item["source_cover"], item["cover"] = item["cover"], cover
+                problems, notes = problems + cover_problems, notes + cover_notes
+            for note in notes:
+                print(f"{MSG_WARNING}{name}: {note}")
+            for problem in problems:
+                print(f"{MSG_ERROR}{name}: {problem}")
+                errors.append(f"{name}: {problem}")
+
+    if errors:
+        print(f"{MSG_ERROR}Pre-flight failed ({len(errors)} problem(s)); nothing was uploaded.")
+    else:
+        print(f"{MSG_SUCCESS}Pre-flight passed.")
+    return errors
@@ -0,0 +1,185 @@
+"""
+modules/mixcloud/schedule.py
+
+Publish-date planner for scheduled Mixcloud uploads.
+
+Instead of reading (and rewriting) a dates file line by line, publish
+slots are generated on demand from a weekly pattern, e.g. every Tue/Fri
+at PUBLISHED_HOUR:PUBLISHED_MINUTE in PUBLISH_TIMEZONE from a start date.
+
+- Slots are built from local calendar dates and localized one by one, so
+  each keeps its wall-clock time across DST changes (12:00 EST is 17:00Z,
+  12:00 EDT is 16:00Z).
+- Taken slots live in a small SQLite table; claiming one is a single
+  INSERT on its primary key, so concurrent runs never get the same slot
+  and a failed upload can give its slot back.
+"""
+
+import os
+import sqlite3
+import datetime
+import threading
+from functools import lru_cache
+
+import pytz
+
+from config.settings import (
+    PUBLISHED_HOUR,
+    PUBLISHED_MINUTE,
+    PUBLISH_TIMEZONE,
+    PUBLISH_SCHEDULE_DAYS,
+    PUBLISH_SCHEDULE_START,
+    PUBLISH_SCHEDULE_DB
+)
+from core.color_utils import MSG_ERROR
+
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+MAX_SCAN_DAYS = 366 * 20  # give up instead of looping forever
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name=PUBLISH_TIMEZONE):
+    """
+    pytz timezone, built once per name.
+    """
+    return pytz.timezone(name)
+
+
+def parse_weekdays(days):
+    """
+    "Tue,Fri" (or "tuesday, friday") -> sorted weekday numbers. Raises ValueError.
+    """
+    numbers = set()
+    for part in days.split(","):
+        key = part.strip().lower()[:3]
+        if key not in WEEKDAYS:
+            raise ValueError(f"unknown weekday '{part.strip()}'")
+        numbers.add(WEEKDAYS[key])
+    return sorted(numbers)
+
+
+def localize(day, hour, minute, tz):
+    """
+    Aware UTC datetime for hour:minute local time on 'day'. A time skipped
+    by a DST jump moves forward an hour; a repeated time uses the first one.
+    """
+    naive = datetime.datetime.combine(day, datetime.time(hour, minute))
+    try:
+        local = tz.localize(naive, is_dst=None)
+    except pytz.NonExistentTimeError:
+        local = tz.localize(naive + datetime.timedelta(hours=1), is_dst=True)
+    except pytz.AmbiguousTimeError:
+        local = tz.localize(naive, is_dst=True)
+    return local.astimezone(pytz.utc)
+
+
+class PublishSchedule:
+    """
+    Weekly publish slots plus the store of slots already used.
+    """
+
+    def __init__(self, days=PUBLISH_SCHEDULE_DAYS, start=PUBLISH_SCHEDULE_START or None,
+                 hour=PUBLISHED_HOUR, minute=PUBLISHED_MINUTE, timezone=PUBLISH_TIMEZONE,
+                 db_path=PUBLISH_SCHEDULE_DB):
+        self.weekdays = parse_weekdays(days)
+        if isinstance(start, str):
+            start = datetime.datetime.strptime(start, "%Y-%m-%d").date()
+        self.start = start or datetime.date.today()
+        self.hour = hour
+        self.minute = minute
+        self.tz = get_timezone(timezone)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS slots (
+                slot TEXT PRIMARY KEY,
+                label TEXT,
+                claimed_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def slots(self, after=None):
+        """
+        Yields slot timestamps (UTC strings) in order, starting at the
+        schedule's start date and skipping any not later than 'after'
+        (an aware datetime).
+        """
+        day = self.start
+        for _ in range(MAX_SCAN_DAYS):
+            if day.weekday() in self.weekdays:
+                slot = localize(day, self.hour, self.minute, self.tz)
+                if after is None or slot > after:
+                    yield slot.strftime(TIMESTAMP_FORMAT)
+            day += datetime.timedelta(days=1)
+
+    def _now(self, now):
+        return now or datetime.datetime.now(pytz.utc)
+
+    def _taken(self):
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT slot FROM slots")}
+
+    def peek(self, count, now=None):
+        """
+        The next 'count' free future slots, without claiming them.
+        """
+        taken, upcoming = self._taken(), []
+        for slot in self.slots(after=self._now(now)):
+            if len(upcoming) >= count:
+                break
+            if slot not in taken:
+                upcoming.append(slot)
+        return upcoming
+
+    def claim(self, label="", now=None):
+        """
+        Takes the next free future slot. Returns its timestamp, or None if
+        the schedule has no slots left.
+        """
+        for slot in self.slots(after=self._now(now)):
+            with self._lock:
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO slots (slot, label, claimed_at) VALUES (?, ?, ?)",
+                    (slot, label, datetime.datetime.now(pytz.utc).strftime(TIMESTAMP_FORMAT))
+                )
+                self.conn.commit()
+            if cur.rowcount:
+                return slot
+        return None
+
+    def release(self, slot):
+        """
+        Frees a claimed slot (its upload failed).
+        """
+        with self._lock:
+            self.conn.execute("DELETE FROM slots WHERE slot = ?", (slot,))
+            self.conn.commit()
+
+
+def open_publish_schedule():
+    """
+    The configured PublishSchedule, or None when PUBLISH_SCHEDULE_DAYS is
+    empty (publish dates then come from the PUBLISHED_DATES file).
+    """
+    if not PUBLISH_SCHEDULE_DAYS:
+        return None
+    try:
+        return PublishSchedule()
+    except (ValueError, OSError, sqlite3.Error, pytz.UnknownTimeZoneError) as e:
+        print(f"{MSG_ERROR}Invalid publish schedule ({PUBLISH_SCHEDULE_DAYS}): {e}")
+        return None
@@ -0,0 +1,87 @@
+"""
+modules/mixcloud/token_store.py
+
+Keeps the Mixcloud OAuth access token between runs, so uploads (including
+scheduled/cron ones) don't need the browser flow every time.
+
+- Stored as JSON in MIXCLOUD_TOKEN_FILE, readable by the owner only
+  (0600 file in a 0700 folder), written atomically.
+- check_access_token() asks the API whether the token still works; the
+  uploader only re-authorizes when Mixcloud rejects it.
+"""
+
+import os
+import json
+import time
+import requests
+
+from config.settings import MIXCLOUD_TOKEN_FILE, MIXCLOUD_API_URL
+from core.color_utils import MSG_ERROR, MSG_WARNING
+
+MIXCLOUD_ME_URL = f"{MIXCLOUD_API_URL}/me/"
+
+
+def load_token(token_file=None):
+    """
+    Returns the stored access token, or None.
+    """
+    token_file = token_file or MIXCLOUD_TOKEN_FILE
+    try:
+        with open(token_file, "r", encoding="utf-8") as f:
+            return json.load(f).get("access_token") or None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"{MSG_WARNING}Could not read Mixcloud token {token_file}: {e}")
+        return None
+
+
+def save_token(token, token_file=None):
+    """
+    Writes the token with owner-only permissions.
+    """
+    token_file = token_file or MIXCLOUD_TOKEN_FILE
+    folder = os.path.dirname(token_file) or "."
+    try:
+        os.makedirs(folder, mode=0o700, exist_ok=True)
+        tmp_path = f"{token_file}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"access_token": token, "obtained_at": time.time()}, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, token_file)
+    except OSError as e:
+        print(f"{MSG_ERROR}Could not save Mixcloud token to {token_file}: {e}")
+
+
+def clear_token(token_file=None):
+    """
+    Forgets the stored token (after Mixcloud rejected it).
+    """
+    token_file = token_file or MIXCLOUD_TOKEN_FILE
+    try:
+        os.remove(token_file)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"{MSG_ERROR}Could not remove Mixcloud token {token_file}: {e}")
+
+
+def check_access_token(token, timeout=10):
+    """
+    True if Mixcloud accepts the token, False if it rejects it, and None
+    when it couldn't be checked (network down); callers then just try it.
+    """
+    try:
+        resp = requests.get(MIXCLOUD_ME_URL, params={"access_token": token}, timeout=timeout)
+    except requests.RequestException:
+        return None
+    if resp.ok:
+        return True
+    try:
+        err_type = resp.json().get("error", {}).get("type", "")
+    except ValueError:
+        err_type = ""
+    if err_type == "OAuthException" or resp.status_code == 401:
+        return False
+    return None  # e.g. RateLimitException or a server error
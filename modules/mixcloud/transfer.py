@@ -0,0 +1,219 @@
+"""
+modules/mixcloud/transfer.py
+
+Transfer side of Mixcloud uploads: the multipart body is streamed from disk
+(instead of requests building it in memory), shaped by a shared bandwidth
+limiter, and measured.
+
+- MultipartStream is a file-like request body with a known length, so
+  requests sends it with a Content-Length header chunk by chunk; every
+  chunk waits on the limiter first.
+- The limiter caps all uploads together at MIXCLOUD_UPLOAD_LIMIT_MBPS, or
+  at the rate of the MIXCLOUD_UPLOAD_LIMIT_PROFILES window for the time of
+  day (0 = unlimited).
+- Each upload attempt appends a line to UPLOAD_METRICS_FILE: bytes sent,
+  seconds, average and peak Mbit/s, retries, the limit in effect and the
+  outcome.
+"""
+
+import os
+import json
+import time
+import uuid
+import mimetypes
+import threading
+
+from config.settings import (
+    MIXCLOUD_UPLOAD_LIMIT_MBPS,
+    MIXCLOUD_UPLOAD_LIMIT_PROFILES,
+    UPLOAD_METRICS_FILE
+)
+from core.color_utils import MSG_ERROR, MSG_WARNING
+from core.rate_limit import BandwidthLimiter, parse_time_windows
+
+BYTES_PER_MBIT = 125000
+CHUNK_SIZE = 64 * 1024
+
+
+def to_mbps(nbytes, seconds):
+    return nbytes / BYTES_PER_MBIT / seconds if seconds > 0 else 0.0
+
+
+class TransferMeter:
+    """
+    Counts bytes sent and keeps the average and peak throughput; the peak
+    is the best rate over any 'window' seconds of the transfer.
+    """
+
+    def __init__(self, clock=time.monotonic, window=1.0):
+        self._clock = clock
+        self._window = window
+        self.bytes = 0
+        self.started = None
+        self.finished = None
+        self._peak = 0.0
+        self._window_start = None
+        self._window_bytes = 0
+
+    def start(self):
+        self.started = self._window_start = self._clock()
+
+    def add(self, nbytes):
+        if self.started is None:
+            self.start()
+        now = self._clock()
+        self.bytes += nbytes
+        self._window_bytes += nbytes
+        elapsed = now - self._window_start
+        if elapsed >= self._window:
+            self._peak = max(self._peak, to_mbps(self._window_bytes, elapsed))
+            self._window_start, self._window_bytes = now, 0
+
+    def finish(self):
+        self.finished = self._clock()
+
+    def summary(self):
+        """
+        {"bytes", "seconds", "avg_mbps", "peak_mbps"}; transfers shorter
+        than one window report their average as the peak.
+        """
+        if self.started is None:
+            return {"bytes": 0, "seconds": 0.0, "avg_mbps": 0.0, "peak_mbps": 0.0}
+        end = self.finished if self.finished is not None else self._clock()
+        seconds = end - self.started
+        avg = to_mbps(self.bytes, seconds)
+        return {
+            "bytes": self.bytes,
+            "seconds": round(seconds, 3),
+            "avg_mbps": round(avg, 3),
+            "peak_mbps": round(max(self._peak, avg), 3)
+        }
+
+
+class MultipartStream:
+    """
+    multipart/form-data body read lazily from the given fields and files.
+    'files' is a list of (field name, path); the files are opened right
+    away (so a missing file fails before the request) and closed by close().
+    """
+
+    def __init__(self, fields, files, limiter=None, meter=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.fields = dict(fields)
+        self.file_fields = [name for name, _ in files]
+        self.limiter = limiter
+        self.meter = meter
+        self._handles = []
+        self._parts = []
+        for name, value in self.fields.items():
+            self._parts.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n".encode("utf-8")
+            )
+        try:
+            for name, path in files:
+                handle = open(path, "rb")
+                self._handles.append(handle)
+                filename = os.path.basename(path).replace('"', "")
+                ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                self._parts.append(
+                    f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                    f'filename="{filename}"\r\nContent-Type: {ctype}\r\n\r\n'.encode("utf-8")
+                )
+                self._parts.append(handle)
+                self._parts.append(b"\r\n")
+        except OSError:
+            self.close()
+            raise
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._length = sum(
+            len(part) if isinstance(part, bytes) else os.fstat(part.fileno()).st_size
+            for part in self._parts
+        )
+        self._index = 0
+        self._offset = 0
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._length
+        out = bytearray()
+        while len(out) < size and self._index < len(self._parts):
+            part = self._parts[self._index]
+            want = size - len(out)
+            if isinstance(part, bytes):
+                piece = part[self._offset:self._offset + want]
+                self._offset += len(piece)
+                if self._offset >= len(part):
+                    self._index, self._offset = self._index + 1, 0
+            else:
+                piece = part.read(want)
+                if not piece:
+                    self._index += 1
+                    continue
+            out += piece
+        if out:
+            if self.limiter is not None:
+                self.limiter.throttle(len(out))
+            if self.meter is not None:
+                self.meter.add(len(out))
+        return bytes(out)
+
+    def close(self):
+        for handle in self._handles:
+            handle.close()
+
+
+_upload_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def build_upload_limiter(limit_mbps=MIXCLOUD_UPLOAD_LIMIT_MBPS, profiles=MIXCLOUD_UPLOAD_LIMIT_PROFILES):
+    """
+    BandwidthLimiter for the configured cap and time-of-day profiles
+    (Mbit/s). An invalid profile string is reported and ignored.
+    """
+    try:
+        windows = parse_time_windows(profiles)
+    except ValueError as e:
+        print(f"{MSG_ERROR}Invalid MIXCLOUD_UPLOAD_LIMIT_PROFILES ({profiles}): {e}")
+        windows = []
+    return BandwidthLimiter(
+        limit_mbps * BYTES_PER_MBIT,
+        [(start, end, mbps * BYTES_PER_MBIT) for start, end, mbps in windows]
+    )
+
+
+def get_upload_limiter():
+    """
+    The limiter shared by every upload in this process.
+    """
+    global _upload_limiter
+    with _limiter_lock:
+        if _upload_limiter is None:
+            _upload_limiter = build_upload_limiter()
+        return _upload_limiter
+
+
+def record_upload_metrics(entry, metrics_file=None):
+    """
+    Appends one upload's telemetry as a JSON line.
+    """
+    metrics_file = metrics_file or UPLOAD_METRICS_FILE
+    entry = dict(entry, time=time.time())
+    try:
+        os.makedirs(os.path.dirname(metrics_file) or ".", exist_ok=True)
+        with open(metrics_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"{MSG_WARNING}Could not write upload metrics to {metrics_file}: {e}")
@@ -4,7 +4,8 @@
 A single file integrating Mixcloud uploading, scheduling, and OAuth logic.
 References:
 - config.settings for environment variables (paths, Mixcloud creds, etc.)
-- core.color_utils for colored logs.
+- core.color_utils for colored prompts; core.log_utils for upload progress logs.
+- core.library_index for the track and cover folders (no repeated scans).
 
 Usage:
     python modules/mixcloud/uploader.py
@@ -15,7 +16,6 @@ import os
 import sys
 import csv
 import re
-import glob
 import time
 import json
 import pytz
@@ -45,7 +45,10 @@ from config.settings import (
     MIXCLOUD_PORT,
     MIXCLOUD_REDIRECT_URI,
     MIXCLOUD_AUTH_URL,
+    MIXCLOUD_API_URL,
+    MIXCLOUD_OAUTH_URL,
     MIXCLOUD_ENABLED,
+    MIXCLOUD_OAUTH_TIMEOUT,
     # Track/Cover Paths + Upload Lists
     USE_EXTERNAL_TRACK_DIR,
     LOCAL_TRACK_DIR,
@@ -58,12 +61,24 @@ from config.settings import (
     MAX_UPLOADS,
     PUBLISHED_HOUR,
     PUBLISHED_MINUTE,
+    PUBLISH_TIMEZONE,
     TRACK_TAGS
 )
 
 # Additional optional references (if you want them):
 # from config.settings import DJ_POOL_BASE_PATH, DOWNLOAD_FOLDER_NAME, LINKS_FILE
 
+from core.library_index import library_files, parse_filename_date, parse_mix_number
+from modules.mixcloud.token_store import load_token, save_token, clear_token, check_access_token
+from modules.mixcloud.schedule import get_timezone, open_publish_schedule
+from modules.mixcloud.preflight import preflight_plan
+from modules.mixcloud.transfer import (
+    MultipartStream, TransferMeter, get_upload_limiter, record_upload_metrics, to_mbps
+)
+
+from core.log_utils import get_logger
+from core.tracing import span, traced
+
 # Colored logs
 from core.color_utils import (
     MSG_ERROR, MSG_NOTICE, MSG_DEBUG, MSG_SUCCESS,
@@ -72,26 +87,25 @@ from core.color_utils import (
     COLOR_BLUE, COLOR_CYAN, COLOR_RESET
 )
 
-# Global Access Token (set after OAuth)
+log = get_logger(__name__)
+
+# Global Access Token (set after OAuth or loaded from the token file)
 ACCESS_TOKEN = None
+# Set by the OAuth handler once a code has been exchanged (or failed to)
+TOKEN_READY = threading.Event()
+_oauth_server = None
 
 #########################################################
 #                 GENERIC HELPERS
 #########################################################
 
 def extract_number(filename: str):
-    match = re.search(r'(\d+)', filename)
-    return int(match.group(1)) if match else float('inf')
+    number = parse_mix_number(filename)
+    return number if number is not None else float('inf')
 
 
 def extract_date_from_filename(filename: str):
-    match = re.search(r'(\d{4}-\d{2}-\d{2})', filename)
-    if match:
-        try:
-            return datetime.datetime.strptime(match.group(1), "%Y-%m-%d")
-        except ValueError:
-            return None
-    return None
+    return parse_filename_date(filename)
 
 
 def extract_date_from_url(url: str):
@@ -114,12 +128,11 @@ def remove_first_line(file_path):
         if lines:
             with open(file_path, 'w') as f:
                 f.writelines(lines[1:])
-            if DEBUG:
-                print(f"{MSG_DEBUG}Removed first line from {file_path}.")
+            log.debug("Removed first line from %s.", file_path)
         else:
-            print(f"{MSG_WARNING}{file_path} is empty. No lines to remove.")
+            log.warning("%s is empty. No lines to remove.", file_path)
     except Exception as e:
-        print(f"{MSG_ERROR}Error removing first line from {file_path}: {e}")
+        log.error("Error removing first line from %s: %s", file_path, e)
 
 # Track is not moved to finished directory
 def move_to_finished(track_path, cover_path, finished_dir):
@@ -131,7 +144,7 @@ def move_to_finished(track_path, cover_path, finished_dir):
         # if cover_path and os.path.exists(cover_path):
         shutil.move(cover_path, os.path.join(finished_dir, os.path.basename(cover_path)))
     except Exception as e:
-        print(f"{MSG_ERROR}Error moving files to finished directory: {e}")
+        log.error("Error moving files to finished directory: %s", e)
 
 
 #########################################################
@@ -165,6 +178,9 @@ class OAuthHandler(http.server.SimpleHTTPRequestHandler):
         if auth_code:
             print(f"{MSG_STATUS}Authorization code received.")
             ACCESS_TOKEN = get_access_token(auth_code)
+            if ACCESS_TOKEN:
+                save_token(ACCESS_TOKEN)
+            TOKEN_READY.set()
             threading.Thread(target=shutdown_server, args=(self.server,)).start()
 
 
@@ -180,7 +196,7 @@ def get_access_token(auth_code: str):
         print(f"{MSG_ERROR}Mixcloud not fully configured. Check your .env or settings.")
         return None
 
-    token_url = "https://www.mixcloud.com/oauth/access_token"
+    token_url = f"{MIXCLOUD_OAUTH_URL}/access_token"
     payload = {
         "client_id": CLIENT_ID,
         "redirect_uri": MIXCLOUD_REDIRECT_URI,
@@ -199,31 +215,89 @@ def get_access_token(auth_code: str):
 
 
 def start_oauth_server():
+    global _oauth_server
     if not MIXCLOUD_ENABLED:
         print(f"{MSG_WARNING}Mixcloud is disabled. OAuth server will not start.")
         return
     with socketserver.TCPServer(("", MIXCLOUD_PORT), OAuthHandler) as httpd:
+        _oauth_server = httpd
         print(f"{MSG_STATUS}Starting OAuth server at {MIXCLOUD_REDIRECT_URI}")
         webbrowser.open(MIXCLOUD_AUTH_URL)
         httpd.serve_forever()
+    _oauth_server = None
+
+
+def ensure_access_token(interactive=True, timeout=MIXCLOUD_OAUTH_TIMEOUT):
+    """
+    Sets ACCESS_TOKEN from the token file if Mixcloud still accepts it.
+    Otherwise (and only if 'interactive') runs the browser OAuth flow and
+    waits up to 'timeout' seconds for it. Returns the token or None.
+    """
+    global ACCESS_TOKEN
+
+    token = load_token()
+    if token:
+        valid = check_access_token(token)
+        if valid is not False:
+            if valid is None:
+                print(f"{MSG_WARNING}Could not verify the saved Mixcloud token; using it anyway.")
+            else:
+                print(f"{MSG_SUCCESS}Using saved Mixcloud access token.")
+            ACCESS_TOKEN = token
+            return token
+        print(f"{MSG_WARNING}Saved Mixcloud token was rejected; authorization needed.")
+        clear_token()
+
+    if not interactive:
+        print(f"{MSG_ERROR}No valid Mixcloud token. Run an interactive upload once to authorize.")
+        return None
+
+    TOKEN_READY.clear()
+    threading.Thread(target=start_oauth_server, daemon=True).start()
+    if not TOKEN_READY.wait(timeout):
+        print(f"{MSG_ERROR}No Mixcloud authorization within {int(timeout)} seconds.")
+        if _oauth_server is not None:
+            _oauth_server.shutdown()
+        return None
+    return ACCESS_TOKEN
 
 
 #########################################################
 #            TRACK & COVER DISCOVERY
 #########################################################
 
+TRACK_EXTENSIONS = (".mp3", ".m4a")
+COVER_EXTENSIONS = (".png", ".jpg")
+
+
 def traverse_external_directory(start_date, max_uploads):
     track_files = []
-    for root, dirs, files in os.walk(EXTERNAL_TRACK_DIR):
-        for f in files:
-            if f.lower().endswith((".mp3", ".m4a")) and not f.startswith("._"):
-                dt = extract_date_from_filename(f)
-                if dt and (start_date is None or dt > start_date):
-                    track_files.append((os.path.join(root, f), dt))
+    for entry in library_files(EXTERNAL_TRACK_DIR, TRACK_EXTENSIONS):
+        if entry.name.startswith("._") or not entry.date:
+            continue
+        dt = datetime.datetime.strptime(entry.date, "%Y-%m-%d")
+        if start_date is None or dt > start_date:
+            track_files.append((entry.path, dt))
     sorted_tracks = sorted(track_files, key=lambda x: x[1])
     return [fp for fp, dt in sorted_tracks][:max_uploads]
 
 
+def find_local_tracks():
+    """
+    Tracks directly in LOCAL_TRACK_DIR (from the library index).
+    """
+    entries = library_files(LOCAL_TRACK_DIR, TRACK_EXTENSIONS, recursive=False)
+    return [entry.path for entry in entries if not entry.name.startswith(".")]
+
+
+def find_cover_images():
+    """
+    Cover images directly in COVER_IMAGE_DIRECTORY (from the library index).
+    """
+    entries = library_files(COVER_IMAGE_DIRECTORY, COVER_EXTENSIONS, recursive=False)
+    return [entry.path for entry in entries if not entry.name.startswith(".")]
+
+
 def sort_tracks_by_date(files):
     with_dates = []
     for f in files:
@@ -244,6 +318,18 @@ def sort_cover_images_by_mix_number(files):
 #           TITLES & PUBLISHED DATES
 #########################################################
 
+def to_publish_timestamp(date_str: str):
+    """
+    "YYYY-MM-DD" -> the UTC publish timestamp Mixcloud expects, at
+    PUBLISHED_HOUR:PUBLISHED_MINUTE in PUBLISH_TIMEZONE. Raises ValueError.
+    """
+    date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d")
+    date_obj = date_obj.replace(hour=PUBLISHED_HOUR, minute=PUBLISHED_MINUTE)
+    local_dt = get_timezone(PUBLISH_TIMEZONE).localize(date_obj)
+    utc_dt = local_dt.astimezone(pytz.utc)
+    return utc_dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 def parse_published_dates_from_file(file_path: str):
     results = []
     try:
@@ -251,12 +337,7 @@ def parse_published_dates_from_file(file_path: str):
             for line in f:
                 ds = line.strip()
                 try:
-                    date_obj = datetime.datetime.strptime(ds, "%Y-%m-%d")
-                    date_obj = date_obj.replace(hour=PUBLISHED_HOUR, minute=PUBLISHED_MINUTE)
-                    eastern = pytz.timezone("US/Eastern")
-                    local_dt = eastern.localize(date_obj)
-                    utc_dt = local_dt.astimezone(pytz.utc)
-                    results.append(utc_dt.strftime("%Y-%m-%dT%H:%M:%SZ"))
+                    results.append(to_publish_timestamp(ds))
                 except ValueError:
                     print(f"{MSG_WARNING}Invalid date in {file_path}: {ds}")
         return results
@@ -318,12 +399,7 @@ def display_upload_info(track_files, cover_images, published_dates, start_mix, t
     print(f"{MSG_STATUS}Upload Information:")
     for i, track_fp in enumerate(track_files):
         mix_num = start_mix + i
-        cimg = None
-        for cov in cover_images:
-            cnum = extract_number(os.path.basename(cov))
-            if cnum == mix_num:
-                cimg = cov
-                break
+        cimg = find_cover_for_mix(cover_images, mix_num)
 
         pub_d = published_dates[i] if i < len(published_dates) else "No publish date"
         dt = extract_date_from_filename(os.path.basename(track_fp))
@@ -341,11 +417,18 @@ def display_upload_info(track_files, cover_images, published_dates, start_mix, t
         print("------")
 
 
+@traced("upload_track")
 def upload_track(
-    file_path, cover_path, mix_number, title, description, publish_date=None, remove_files=True
+    file_path, cover_path, mix_number, title, description, publish_date=None, remove_files=True,
+    consume_date=True, retries=0, source_cover=None
 ):
     """
     Actually uploads the track to Mixcloud, referencing global ACCESS_TOKEN.
+    With 'consume_date', the used line is removed from PUBLISHED_DATES.
+    The body is streamed through the shared bandwidth limiter, and the
+    transfer is logged to UPLOAD_METRICS_FILE ('retries' = earlier attempts).
+    'source_cover' is the original of a re-encoded cover_path; it is the
+    one moved to FINISHED_DIRECTORY.
     """
     global ACCESS_TOKEN
 
@@ -356,7 +439,7 @@ def upload_track(
     else:
         track_name = f"{title} #{mix_number}"
 
-    upload_url = "https://api.mixcloud.com/upload/"
+    upload_url = f"{MIXCLOUD_API_URL}/upload/"
     data = {
         "name": track_name,
         "description": description
@@ -371,62 +454,181 @@ def upload_track(
         data["publish_date"] = publish_date
 
     if not ACCESS_TOKEN:
-        print(f"{MSG_ERROR}No Mixcloud Access Token. OAuth may have failed.")
+        log.error("No Mixcloud Access Token. OAuth may have failed.")
         return False
 
-    files = {"mp3": open(file_path, "rb")}
+    files = [("mp3", file_path)]
     if cover_path and os.path.exists(cover_path):
-        files["picture"] = open(cover_path, "rb")
+        files.append(("picture", cover_path))
+    limiter = get_upload_limiter()
+    meter = TransferMeter()
+    body = MultipartStream(data, files, limiter=limiter, meter=meter)
 
-    if DEBUG:
-        print(f"{MSG_DEBUG}Track: {track_name}")
-        print(f"{MSG_DEBUG}Data: {data}")
-        print(f"{MSG_DEBUG}Files: {list(files.keys())}")
+    log.debug("Track: %s", track_name)
+    log.debug("Data: %s", data)
+    log.debug("Files: %s", body.file_fields)
 
+    outcome = {"status": "error", "http_status": None}
     try:
-        resp = requests.post(
-            upload_url,
-            params={"access_token": ACCESS_TOKEN},
-            data=data,
-            files=files
-        )
+        meter.start()
+        with span("upload.post", bytes=len(body)):
+            resp = requests.post(
+                upload_url,
+                params={"access_token": ACCESS_TOKEN},
+                data=body,
+                headers={"Content-Type": body.content_type}
+            )
+        meter.finish()
+        outcome["http_status"] = resp.status_code
         if resp.ok:
-            print(f"{MSG_SUCCESS}Successfully uploaded: {track_name}")
+            outcome["status"] = "ok"
+            log.success("Successfully uploaded: %s", track_name, extra={"mix_number": mix_number})
 
             if not DEBUG and remove_files:
-                move_to_finished(file_path, cover_path, FINISHED_DIRECTORY) # ! Track is not moved to finished directory by default
+                move_to_finished(file_path, source_cover or cover_path, FINISHED_DIRECTORY) # ! Track is not moved to finished directory by default
 
-            remove_first_line(PUBLISHED_DATES)
+            if consume_date:
+                remove_first_line(PUBLISHED_DATES)
             result_data = resp.json()
             up_key = result_data.get("result", {}).get("key", "")
             if up_key:
                 link_url = f"https://www.mixcloud.com{up_key}"
                 with open(UPLOAD_LINKS_FILE, 'a') as f:
                     f.write(f"{link_url}\n")
+                log.success("Mixcloud link: %s", link_url)
 
-            print(f"{MSG_SUCCESS}Response Code: {resp.status_code}")
-            print(f"{MSG_SUCCESS}Response Text:\n{resp.text}")
+            log.debug("Response %s: %s", resp.status_code, resp.text)
             return True
         else:
-            print(f"{MSG_ERROR}Error uploading {file_path}: {resp.status_code}\n{resp.text}")
-            if resp.status_code == 403:
+            log.error("Error uploading %s: %s\n%s", file_path, resp.status_code, resp.text)
+            if resp.status_code in (400, 401, 403):
                 err = resp.json()
                 err_type = err.get("error", {}).get("type", "")
-                if err_type == "RateLimitException":
+                if err_type == "OAuthException":
+                    log.warning("Mixcloud rejected the access token; it will be renewed next run.")
+                    clear_token()
+                    ACCESS_TOKEN = None
+                elif err_type == "RateLimitException":
+                    outcome["status"] = "rate_limited"
                     ra = err.get("error", {}).get("retry_after", 0)
                     wait_minutes = (ra // 60) + 1
-                    print(f"{MSG_NOTICE}Rate limit reached. Wait {wait_minutes} minutes.")
+                    log.notice("Rate limit reached. Wait %s minutes.", wait_minutes)
                     return {"retry_after": wait_minutes * 60}
             return False
 
     except Exception as e:
-        print(f"{MSG_ERROR}Exception: {e}")
+        log.error("Exception: %s", e)
         return False
 
     finally:
-        files["mp3"].close()
-        if "picture" in files:
-            files["picture"].close()
+        body.close()
+        if meter.finished is None:
+            meter.finish()
+        stats = meter.summary()
+        limit = limiter.current_rate()
+        record_upload_metrics(dict(
+            stats,
+            file=os.path.basename(file_path),
+            mix_number=mix_number,
+            retries=retries,
+            limit_mbps=round(to_mbps(limit, 1), 3) if limit else None,
+            **outcome
+        ))
+        log.info(
+            "Sent %.1f MB in %.1fs (avg %.1f Mbit/s, peak %.1f Mbit/s)",
+            stats["bytes"] / 1e6, stats["seconds"], stats["avg_mbps"], stats["peak_mbps"]
+        )
+
+def find_cover_for_mix(cover_images, mix_number):
+    for cimg in cover_images:
+        if extract_number(os.path.basename(cimg)) == mix_number:
+            return cimg
+    return None
+
+
+def find_upload_tracks(last_date):
+    """
+    Returns (track files in upload order, whether to move them when done).
+    """
+    if USE_EXTERNAL_TRACK_DIR:
+        return traverse_external_directory(last_date, 1000), False
+    return sort_tracks_by_date(find_local_tracks()), True
+
+
+def build_upload_plan(track_files, cover_images, published_dates, start_mix):
+    """
+    Pairs each track with its mix number, cover and publish date.
+    """
+    plan = []
+    for i, track_fp in enumerate(track_files):
+        mix_num = start_mix + i
+        plan.append({
+            "track": track_fp,
+            "cover": find_cover_for_mix(cover_images, mix_num),
+            "mix_number": mix_num,
+            "publish_date": published_dates[i] if i < len(published_dates) else None
+        })
+    return plan
+
+
+def upload_plan(plan, title, description, remove_after, consume_dates=True, schedule=None):
+    """
+    Uploads every planned track in order, waiting out rate limits.
+    With a PublishSchedule, each upload claims the next free publish slot
+    (given back if the upload fails) instead of the planned date; if the
+    schedule has no slot left, the remaining tracks count as failed.
+    Returns (uploaded, failed).
+    """
+    total = len(plan)
+    uploaded = failed = 0
+    slot = None
+    retries = 0
+    i = 0
+    while i < total:
+        item = plan[i]
+        publish_date = item["publish_date"]
+        if schedule is not None:
+            if slot is None:
+                slot = schedule.claim(label=os.path.basename(item["track"]))
+            if slot is None:
+                # Without a slot the upload would publish right away.
+                log.error("No free publish slot left; stopping with %d track(s) not uploaded.", total - i)
+                failed += total - i
+                break
+            publish_date = slot
+        log.info("Uploading Track %d/%d => %s", i + 1, total, item["track"])
+        result = upload_track(
+            item["track"], item["cover"], item["mix_number"],
+            title, description,
+            publish_date=publish_date, remove_files=remove_after,
+            consume_date=consume_dates and schedule is None, retries=retries,
+            source_cover=item.get("source_cover")
+        )
+
+        if result is True:
+            # Successful upload, move to next track
+            uploaded += 1
+            slot = None
+            retries = 0
+            i += 1
+        elif isinstance(result, dict) and "retry_after" in result:
+            # Rate limit reached, wait and retry
+            secs = result["retry_after"]
+            log.notice("Rate limit => Wait %d minutes.", secs // 60)
+            for remain in range(int(secs), 0, -60):
+                time.sleep(60)
+            retries += 1
+            log.info("Retrying upload.")
+        else:
+            # Error occurred, skip to next track
+            if slot is not None:
+                schedule.release(slot)
+                slot = None
+            failed += 1
+            retries = 0
+            i += 1
+    return uploaded, failed
+
 
 #########################################################
 #              MAIN EXECUTION
@@ -451,13 +653,9 @@ def main():
     #     print(f"{MSG_WARNING}Please fill in the necessary details and run again.")
     #     sys.exit(0)
 
-    # Start OAuth in a thread
-    t = threading.Thread(target=start_oauth_server)
-    t.start()
-
-    # Wait for token
-    while ACCESS_TOKEN is None:
-        time.sleep(1)
+    # Saved token, or OAuth in the browser if there is none (or it was rejected)
+    if not ensure_access_token():
+        sys.exit(1)
 
     # Load titles
     titles_data = load_titles_descriptions(TITLES_FILE)
@@ -508,95 +706,60 @@ def main():
         print(f"{MSG_WARNING}Starting from mix #{start_mix} instead of {next_mixnum}")
 
     # Covers
-    cover_imgs = sort_cover_images_by_mix_number(
-        glob.glob(os.path.join(COVER_IMAGE_DIRECTORY, "*.png")) +
-        glob.glob(os.path.join(COVER_IMAGE_DIRECTORY, "*.jpg"))
-    )
+    cover_imgs = sort_cover_images_by_mix_number(find_cover_images())
 
-    # Published dates
-    published_dates = parse_published_dates_from_file(PUBLISHED_DATES)
+    # Published dates: generated slots if a schedule is configured, else the dates file
+    schedule = open_publish_schedule()
+    try:
+        if schedule is None:
+            published_dates = parse_published_dates_from_file(PUBLISHED_DATES)
 
-    # Determine track list
-    if USE_EXTERNAL_TRACK_DIR:
-        t_files = traverse_external_directory(last_date, 1000)
-        remove_after = False
-    else:
-        all_files = glob.glob(os.path.join(LOCAL_TRACK_DIR, "*.mp3")) + glob.glob(os.path.join(LOCAL_TRACK_DIR, "*.m4a"))
-        t_files = sort_tracks_by_date(all_files)
-        remove_after = True
+        # Determine track list
+        t_files, remove_after = find_upload_tracks(last_date)
 
-    if not t_files:
-        print(f"{MSG_WARNING}No new tracks found.")
-        sys.exit(0)
+        if not t_files:
+            print(f"{MSG_WARNING}No new tracks found.")
+            sys.exit(0)
 
-    # Ask the user how many tracks to upload
-    print(f"{MSG_STATUS}{len(t_files)} tracks found.")
-    default_up = min(MAX_UPLOADS, len(t_files))
-    try:
-        inp = input(f"{MSG_NOTICE}How many to upload? (Default: {default_up}): ").strip()
-        if not inp:
+        # Ask the user how many tracks to upload
+        print(f"{MSG_STATUS}{len(t_files)} tracks found.")
+        default_up = min(MAX_UPLOADS, len(t_files))
+        try:
+            inp = input(f"{MSG_NOTICE}How many to upload? (Default: {default_up}): ").strip()
+            if not inp:
+                num_up = default_up
+            else:
+                num_up = int(inp)
+                if num_up > len(t_files):
+                    num_up = len(t_files)
+        except ValueError:
+            print(f"{MSG_WARNING}Invalid input. Using default => {default_up}")
             num_up = default_up
-        else:
-            num_up = int(inp)
-            if num_up > len(t_files):
-                num_up = len(t_files)
-    except ValueError:
-        print(f"{MSG_WARNING}Invalid input. Using default => {default_up}")
-        num_up = default_up
-
-    # Limit to the number of uploads
-    t_files = t_files[:num_up]
-
-    # Show info
-    display_upload_info(t_files, cover_imgs, published_dates, start_mix, selected_title)
-
-    # Confirm upload
-    confirm = input(f"{MSG_WARNING}Confirm upload of {num_up} tracks? (y/n): ").lower()
-    if confirm != "y":
-        print(f"{MSG_NOTICE}Upload cancelled. Exiting.")
-        return
-
-    # For each track, upload
-    total = len(t_files)
-    i = 0
-    while i < total:
-        track_fp = t_files[i]
 
-        # Find the corresponding cover image based on the expected mix number
-        mix_num = start_mix + i
-        cpath = None
-        for cimg in cover_imgs:
-            cnum = extract_number(os.path.basename(cimg))
-            if cnum == mix_num:
-                cpath = cimg
-                break
+        # Limit to the number of uploads
+        t_files = t_files[:num_up]
+        if schedule is not None:
+            published_dates = schedule.peek(num_up)
 
-        # Find the corresponding published date
-        pub_date = published_dates[i] if i < len(published_dates) else None
+        # Show info
+        display_upload_info(t_files, cover_imgs, published_dates, start_mix, selected_title)
 
-        # Upload the track
-        print(f"{MSG_STATUS}Uploading Track {i+1}/{total} => {track_fp}")
-        result = upload_track(
-            track_fp, cpath, mix_num, 
-            selected_title, selected_description,
-            publish_date=pub_date, remove_files=remove_after
-        )
+        # Confirm upload
+        confirm = input(f"{MSG_WARNING}Confirm upload of {num_up} tracks? (y/n): ").lower()
+        if confirm != "y":
+            print(f"{MSG_NOTICE}Upload cancelled. Exiting.")
+            return
 
-        if result is True:
-            # Successful upload, move to next track
-            i += 1
-        elif isinstance(result, dict) and "retry_after" in result:
-            # Rate limit reached, wait and retry
-            secs = result["retry_after"]
-            print(f"{MSG_NOTICE}Rate limit => Wait {secs//60} minutes.")
-            for remain in range(int(secs), 0, -60):
-                time.sleep(60)
-            print(f"{MSG_STATUS}Retrying upload.")
-        else:
-            # Error occurred, skip to next track
-            i += 1
+        # Check every file before sending anything, then upload each track
+        plan = build_upload_plan(t_files, cover_imgs, published_dates, start_mix)
+        if preflight_plan(plan):
+            return
+        upload_plan(plan, selected_title, selected_description, remove_after, schedule=schedule)
 
-    print(f"{MSG_SUCCESS}All uploads completed.")
+        print(f"{MSG_SUCCESS}All uploads completed.")
+    finally:
+        if schedule is not None:
+            schedule.close()
 
 #########################################################
 #           DRY RUN
@@ -638,10 +801,7 @@ def dry_run_upload():
     if USE_EXTERNAL_TRACK_DIR:
         t_files = traverse_external_directory(None, 1)
     else:
-        all_files = glob.glob(os.path.join(LOCAL_TRACK_DIR, "*.mp3")) + glob.glob(
-            os.path.join(LOCAL_TRACK_DIR, "*.m4a")
-        )
-        t_files = sort_tracks_by_date(all_files)
+        t_files = sort_tracks_by_date(find_local_tracks())
 
     if not t_files:
         print(f"{MSG_WARNING}No tracks found for dry-run.")
@@ -652,10 +812,7 @@ def dry_run_upload():
     print(f"{MSG_STATUS}Track Selected: {track_fp}")
 
     # Check for cover images
-    cover_imgs = sort_cover_images_by_mix_number(
-        glob.glob(os.path.join(COVER_IMAGE_DIRECTORY, "*.png")) +
-        glob.glob(os.path.join(COVER_IMAGE_DIRECTORY, "*.jpg"))
-    )
+    cover_imgs = sort_cover_images_by_mix_number(find_cover_images())
 
     # Determine the mix number and find matching cover image
     mix_number = get_last_uploaded_mix_number(UPLOAD_LINKS_FILE) + 1
@@ -684,4 +841,132 @@ def dry_run_upload():
         title=selected_title
     )
 
-    print(f"{MSG_SUCCESS}Dry-Run Complete. No uploads performed.")
\ No newline at end of file
+    print(f"{MSG_SUCCESS}Dry-Run Complete. No uploads performed.")
+
+
+#########################################################
+#           BATCH (NON-INTERACTIVE) UPLOADS
+#########################################################
+
+BATCH_DEFAULTS = {
+    "title_index": 1,       # 1-based row in TITLES_FILE
+    "start_mix": "auto",    # or a number; "auto" continues after UPLOAD_LINKS_FILE
+    "count": MAX_UPLOADS,
+    "dates": "auto",        # "schedule", "file" (PUBLISHED_DATES), "none", ["YYYY-MM-DD", ...],
+                            # or "auto": the schedule if PUBLISH_SCHEDULE_DAYS is set, else the file
+    "dry_run": False
+}
+
+
+def load_batch_spec(spec_path=None, overrides=None):
+    """
+    Reads a JSON batch spec (see config/default_uploadBatch.json), applies
+    CLI overrides (None values are ignored) and fills in defaults.
+    Raises ValueError for unknown keys or bad values.
+    """
+    spec = dict(BATCH_DEFAULTS)
+    if spec_path:
+        with open(spec_path, "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        if not isinstance(loaded, dict):
+            raise ValueError("batch spec must be a JSON object")
+        spec.update(loaded)
+    spec.update({k: v for k, v in (overrides or {}).items() if v is not None})
+
+    unknown = set(spec) - set(BATCH_DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown batch spec key(s): {', '.join(sorted(unknown))}")
+    if not isinstance(spec["title_index"], int) or spec["title_index"] < 1:
+        raise ValueError("title_index must be a positive number")
+    if spec["start_mix"] != "auto" and not isinstance(spec["start_mix"], int):
+        raise ValueError("start_mix must be \"auto\" or a number")
+    if not isinstance(spec["count"], int) or spec["count"] < 1:
+        raise ValueError("count must be a positive number")
+    if not (spec["dates"] in ("auto", "schedule", "file", "none") or isinstance(spec["dates"], list)):
+        raise ValueError("dates must be \"auto\", \"schedule\", \"file\", \"none\" or a list of YYYY-MM-DD dates")
+    return spec
+
+
+def resolve_batch_dates(dates, count, schedule=None):
+    """
+    Publish timestamps for a spec's "dates" value (scheduled slots are
+    only previewed here; upload_plan claims them).
+    """
+    if dates == "schedule":
+        return schedule.peek(count)
+    if dates == "file":
+        return parse_published_dates_from_file(PUBLISHED_DATES)
+    if dates == "none":
+        return []
+    return [to_publish_timestamp(str(d)) for d in dates]
+
+
+def run_upload_batch(spec):
+    """
+    Runs an upload batch without prompts.
+    Returns (uploaded, failed), or None if the batch couldn't start.
+    """
+    if not MIXCLOUD_ENABLED:
+        print(f"{MSG_WARNING}Mixcloud is disabled in config.")
+        return None
+
+    track_dir = EXTERNAL_TRACK_DIR if USE_EXTERNAL_TRACK_DIR else LOCAL_TRACK_DIR
+    if not os.path.isdir(track_dir):
+        print(f"{MSG_ERROR}Track directory does not exist => {track_dir}")
+        return None
+
+    titles_data = load_titles_descriptions(TITLES_FILE)
+    if spec["title_index"] > len(titles_data):
+        print(f"{MSG_ERROR}title_index {spec['title_index']} not found in {TITLES_FILE} ({len(titles_data)} titles).")
+        return None
+    title_item = titles_data[spec["title_index"] - 1]
+
+    start_mix = spec["start_mix"]
+    if start_mix == "auto":
+        start_mix = get_last_uploaded_mix_number(UPLOAD_LINKS_FILE) + 1
+
+    dates = spec["dates"]
+    schedule = None
+    if dates in ("auto", "schedule"):
+        schedule = open_publish_schedule()
+        if schedule is None and dates == "schedule":
+            print(f"{MSG_ERROR}Batch asks for scheduled dates but PUBLISH_SCHEDULE_DAYS isn't set.")
+            return None
+        dates = "schedule" if schedule is not None else "file"
+
+    try:
+        t_files, remove_after = find_upload_tracks(get_last_uploaded_date(UPLOAD_LINKS_FILE))
+        t_files = t_files[:spec["count"]]
+        if not t_files:
+            print(f"{MSG_NOTICE}Upload queue is empty.")
+            return 0, 0
+
+        try:
+            published_dates = resolve_batch_dates(dates, len(t_files), schedule)
+        except ValueError as e:
+            print(f"{MSG_ERROR}Invalid date in batch spec: {e}")
+            return None
+
+        print(f"{MSG_STATUS}Batch: '{title_item['title']}', mixes #{start_mix}-#{start_mix + len(t_files) - 1}")
+        cover_imgs = sort_cover_images_by_mix_number(find_cover_images())
+        display_upload_info(t_files, cover_imgs, published_dates, start_mix, title_item["title"])
+        plan = build_upload_plan(t_files, cover_imgs, published_dates, start_mix)
+        if preflight_plan(plan):
+            return None
+        if spec["dry_run"]:
+            print(f"{MSG_SUCCESS}Dry-run batch. No uploads performed.")
+            return 0, 0
+
+        # A cron job can't answer the browser prompt; only a terminal run may re-authorize.
+        if not ensure_access_token(interactive=sys.stdin.isatty()):
+            return None
+
+        uploaded, failed = upload_plan(
+            plan, title_item["title"], title_item["description"], remove_after,
+            consume_dates=dates == "file", schedule=schedule
+        )
+        print(f"{MSG_SUCCESS}Batch complete: {uploaded} uploaded, {failed} failed.")
+        return uploaded, failed
+    finally:
+        if schedule is not None:
+            schedule.close()
@@ -0,0 +1,210 @@
+"""
+modules/organize/duplicates.py
+
+Duplicate and near-duplicate detection across the DJ pool, built on the
+acoustic fingerprints in core/fingerprint_utils.py:
+- Checking an incoming file against the pool index
+- Applying DUPLICATE_POLICY (flag / skip / merge) at organize time
+- Warning about duplicates right after a download
+- Scanning DJ_POOL_BASE_PATH and reporting duplicate groups
+"""
+
+import os
+import mutagen
+from send2trash import send2trash
+
+from config.settings import (
+    DJ_POOL_BASE_PATH, DUPLICATE_DETECTION, DUPLICATE_POLICY, FINGERPRINT_DB_PATH
+)
+from core.color_utils import (
+    MSG_ERROR, MSG_NOTICE, MSG_SUCCESS, MSG_STATUS, MSG_WARNING, LINE_BREAK
+)
+from core.fingerprint_utils import (
+    FingerprintIndex, ffmpeg_available, compute_fingerprint, index_file
+)
+
+
+def open_fingerprint_index(db_path=FINGERPRINT_DB_PATH):
+    """
+    Returns a FingerprintIndex, or None if duplicate detection is disabled
+    or ffmpeg is not available.
+    """
+    if not DUPLICATE_DETECTION:
+        return None
+    if not ffmpeg_available():
+        print(f"{MSG_NOTICE}ffmpeg not found; skipping duplicate detection.")
+        return None
+    try:
+        return FingerprintIndex(db_path)
+    except Exception as e:
+        print(f"{MSG_ERROR}Could not open fingerprint index '{db_path}': {e}")
+        return None
+
+
+def get_bitrate(file_path):
+    """
+    Returns the audio bitrate in bits/s, or 0 if it can't be read.
+    """
+    try:
+        audio = mutagen.File(file_path)
+        return getattr(audio.info, "bitrate", 0) or 0
+    except Exception:
+        return 0
+
+
+def check_pool_for_duplicates(file_path, index):
+    """
+    Fingerprints file_path and looks it up in the index.
+    Returns (fingerprint, [(pool_path, score), ...]). Matches whose files
+    have disappeared are dropped from the index.
+    """
+    fingerprint = compute_fingerprint(file_path)
+    if fingerprint is None:
+        return None, []
+
+    matches = []
+    for path, score in index.lookup(fingerprint, exclude=file_path):
+        if os.path.exists(path):
+            matches.append((path, score))
+        else:
+            index.remove(path)
+    return fingerprint, matches
+
+
+def resolve_duplicate(file_path, matches, index, policy=DUPLICATE_POLICY, trash=None):
+    """
+    Applies the duplicate policy to file_path, which matched `matches`.
+    Returns True if the file should still be moved into the pool.
+    'trash' is called with the copy the merge policy drops (default:
+    send2trash); organize runs pass one that defers it into their log.
+    """
+    trash = trash or send2trash
+    best_path, best_score = matches[0]
+    print(f"{MSG_WARNING}'{os.path.basename(file_path)}' matches '{best_path}' ({best_score:.0%} similar)")
+
+    if policy == "skip":
+        print(f"{MSG_NOTICE}Duplicate policy 'skip': leaving {file_path} in place.")
+        return False
+
+    if policy == "merge":
+        new_rate, old_rate = get_bitrate(file_path), get_bitrate(best_path)
+        try:
+            if new_rate > old_rate:
+                trash(best_path)
+                index.remove(best_path)
+                print(f"{MSG_NOTICE}Replaced lower-bitrate copy ({old_rate // 1000} kbps): {best_path}")
+                return True
+            trash(file_path)
+            print(f"{MSG_NOTICE}Kept existing copy ({old_rate // 1000} kbps); trashed {file_path}")
+            return False
+        except Exception as e:
+            print(f"{MSG_ERROR}Could not merge duplicates: {e}")
+            return False
+
+    if policy != "flag":
+        print(f"{MSG_WARNING}Unknown DUPLICATE_POLICY '{policy}'; treating as 'flag'.")
+    return True
+
+
+def warn_if_duplicate(file_path):
+    """
+    Checks a freshly downloaded file against the pool index and prints any
+    matches. Returns the list of matches.
+    """
+    index = open_fingerprint_index()
+    if index is None:
+        return []
+    with index:
+        _, matches = check_pool_for_duplicates(file_path, index)
+    for path, score in matches:
+        print(f"{MSG_WARNING}Already in DJ pool ({score:.0%} similar): {path}")
+    return matches
+
+
+#########################################################
+#              POOL SCAN & REPORT
+#########################################################
+
+def scan_pool(index, root=DJ_POOL_BASE_PATH):
+    """
+    Incrementally fingerprints every audio file under root.
+    Files whose size/mtime are unchanged are not decoded again.
+    Returns the number of newly (re)indexed files.
+    """
+    from modules.organize.organize_files import is_audio_file
+
+    removed = index.prune_missing()
+    if removed:
+        print(f"{MSG_NOTICE}Removed {removed} missing file(s) from the index.")
+
+    indexed = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if name.startswith("._") or not is_audio_file(path) or index.is_current(path):
+                continue
+            if index_file(index, path) is not None:
+                indexed += 1
+                if indexed % 100 == 0:
+                    print(f"{MSG_STATUS}Indexed {indexed} file(s)...")
+    return indexed
+
+
+def find_duplicate_groups(index):
+    """
+    Groups indexed tracks that match each other.
+    Returns a list of path lists, each with two or more entries.
+    """
+    parent = {}
+
+    def find(p):
+        while parent.get(p, p) != p:
+            p = parent[p]
+        return p
+
+    for path in index.paths():
+        for match, _ in index.lookup(index.get_fingerprint(path), exclude=path):
+            root_a, root_b = find(path), find(match)
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    groups = {}
+    for path in parent:
+        groups.setdefault(find(path), set()).add(path)
+    for root, members in groups.items():
+        members.add(root)
+    return [sorted(members) for members in groups.values()]
+
+
+def report_pool_duplicates(rebuild=False, root=DJ_POOL_BASE_PATH):
+    """
+    Updates the fingerprint index for the DJ pool and prints duplicate groups.
+    """
+    if not os.path.isdir(root):
+        print(f"{MSG_ERROR}DJ pool folder not found: {root}")
+        return []
+
+    if rebuild and os.path.exists(FINGERPRINT_DB_PATH):
+        os.remove(FINGERPRINT_DB_PATH)
+        print(f"{MSG_NOTICE}Rebuilding fingerprint index from scratch.")
+
+    index = open_fingerprint_index()
+    if index is None:
+        return []
+
+    with index:
+        print(f"{MSG_STATUS}Scanning '{root}' for audio fingerprints...")
+        indexed = scan_pool(index, root)
+        print(f"{MSG_STATUS}{indexed} file(s) fingerprinted, {len(index)} in index.\n{LINE_BREAK}")
+        groups = find_duplicate_groups(index)
+
+    if not groups:
+        print(f"{MSG_SUCCESS}No duplicates found.")
+        return []
+
+    print(f"{MSG_WARNING}{len(groups)} duplicate group(s) found:")
+    for i, group in enumerate(groups, start=1):
+        print(f"{MSG_NOTICE}Group {i}:")
+        for path in group:
+            print(f"    {path}")
+    return groups
@@ -0,0 +1,260 @@
+"""
+modules/organize/oplog.py
+
+Operation log for organize runs, so a batch that stops halfway (disk full,
+permissions, Ctrl+C) can be rolled back with 'djcli org_dl --undo'.
+
+Each run writes one JSONL file in ORGANIZE_LOG_DIR:
+    {"op": "plan", "moves": [[src, dest], ...],   every move, before any happens
+     "trash": [[path, held], ...]}                 copies dropped by DUPLICATE_POLICY=merge
+    {"op": "trash", "src": ..., "dest": ...}      one per dropped copy set aside
+    {"op": "done", "src": ..., "dest": ...}       one per completed move
+    {"op": "failed", "src": ..., "dest": ..., "error": ...}
+    {"op": "finish"}
+Dropped duplicates are not deleted but moved into the run's trash folder
+(the log path without ".jsonl", plus ".trash"), so undo can put them back
+(and re-index them). Only the last ORGANIZE_TRASH_KEEP_RUNS runs keep
+their trash: starting a run empties the older folders, and
+'djcli org_dl --purge-trash' empties all of them.
+Undoing appends "undo" lines (one per move put back) and, once nothing is
+left to put back, a final "undone"; an interrupted or failed undo can
+simply be run again. A planned move with no "done" line whose file is
+already at its destination (the run stopped before the line was written)
+is moved back too.
+"""
+
+import os
+import json
+import time
+import shutil
+import datetime
+
+from config.settings import ORGANIZE_LOG_DIR, ORGANIZE_TRASH_KEEP_RUNS
+from core.color_utils import MSG_ERROR, MSG_NOTICE, MSG_STATUS, MSG_SUCCESS, MSG_WARNING
+from core.file_utils import unique_destination_path
+from core.fingerprint_utils import index_file
+from core.move_engine import move_file
+
+
+def trash_dir(path):
+    """
+    The trash folder of the run logged at 'path'.
+    """
+    return os.path.splitext(path)[0] + ".trash"
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class OrganizeLog:
+    """
+    Append-only log for one organize run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not _ends_with_newline(path):
+            self._file.write("\n")  # don't append to a line cut off by a crash
+
+    @classmethod
+    def create(cls, log_dir=None):
+        """
+        Starts a new run log named after the current time (and empties the
+        trash folders of runs older than the last ORGANIZE_TRASH_KEEP_RUNS).
+        """
+        log_dir = log_dir or ORGANIZE_LOG_DIR
+        purge_trash(log_dir, ORGANIZE_TRASH_KEEP_RUNS)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return cls(os.path.join(log_dir, f"organize-{stamp}.jsonl"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write(self, entry, sync=False):
+        entry["time"] = time.time()
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    @property
+    def trash_dir(self):
+        """
+        Where this run sets aside the duplicates it drops.
+        """
+        return trash_dir(self.path)
+
+    def plan(self, pairs, trash=()):
+        entry = {"op": "plan", "moves": [list(pair) for pair in pairs]}
+        if trash:
+            entry["trash"] = [list(pair) for pair in trash]
+        self._write(entry, sync=True)
+
+    def done(self, src, dest):
+        self._write({"op": "done", "src": src, "dest": dest})
+
+    def trashed(self, src, dest):
+        self._write({"op": "trash", "src": src, "dest": dest})
+
+    def failed(self, src, dest, error):
+        self._write({"op": "failed", "src": src, "dest": dest, "error": str(error)})
+
+    def undo(self, src, dest):
+        self._write({"op": "undo", "src": src, "dest": dest})
+
+    def finish(self, op="finish"):
+        self._write({"op": op}, sync=True)
+
+    def close(self):
+        self._file.close()
+
+
+def read_run(path):
+    """
+    Parses a run log into {"planned", "done", "failed", "trash", "undone",
+    "finished", "rolled_back"} ("trash": the planned set-asides of dropped
+    duplicates). A truncated last line (crash mid-write) is ignored.
+    """
+    run = {
+        "planned": [], "done": [], "failed": set(), "trash": set(), "undone": set(),
+        "finished": False, "rolled_back": False
+    }
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            op = entry.get("op")
+            if op == "plan":
+                run["planned"].extend(tuple(pair) for pair in entry["moves"])
+                run["planned"].extend(tuple(pair) for pair in entry.get("trash", []))
+                run["trash"].update(tuple(pair) for pair in entry.get("trash", []))
+            elif op in ("done", "trash"):
+                run["done"].append((entry["src"], entry["dest"]))
+            elif op == "failed":
+                run["failed"].add((entry["src"], entry["dest"]))
+            elif op == "undo":
+                run["undone"].add((entry["src"], entry["dest"]))
+            elif op == "finish":
+                run["finished"] = True
+            elif op == "undone":
+                run["rolled_back"] = True
+    return run
+
+
+def list_runs(log_dir=None):
+    """
+    Run log paths, oldest first.
+    """
+    log_dir = log_dir or ORGANIZE_LOG_DIR
+    if not os.path.isdir(log_dir):
+        return []
+    return sorted(
+        os.path.join(log_dir, name) for name in os.listdir(log_dir)
+        if name.startswith("organize-") and name.endswith(".jsonl")
+    )
+
+
+def moves_to_undo(run):
+    """
+    The (src, dest) pairs undo has to move back, in the order they were
+    made: the logged ones, then planned moves that happened but were never
+    logged (their source is gone and their destination exists).
+    """
+    logged = set(run["done"]) | run["failed"]
+    unlogged = [
+        (src, dest) for src, dest in run["planned"]
+        if (src, dest) not in logged and os.path.exists(dest) and not os.path.exists(src)
+    ]
+    return [pair for pair in run["done"] + unlogged if pair not in run["undone"]]
+
+
+def undo_run(path, index=None):
+    """
+    Moves every completed move of a run (see moves_to_undo) back, newest first.
+    Files that are gone from the pool are skipped; a file that reappeared
+    at its original path is restored under a numbered name instead.
+    With a fingerprint index, moved-back files leave it and restored pool
+    copies (dropped duplicates) are indexed again.
+    Returns the number of files moved back.
+    """
+    run = read_run(path)
+    restored, errors = 0, 0
+    with OrganizeLog(path) as log:
+        for src, dest in reversed(moves_to_undo(run)):
+            if not os.path.exists(dest):
+                print(f"{MSG_WARNING}Not in the pool anymore, skipping: {dest}")
+                continue
+            target = unique_destination_path(src)
+            if target != src:
+                print(f"{MSG_NOTICE}'{src}' exists again; restoring as '{target}'")
+            try:
+                os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                move_file(dest, target)
+            except OSError as e:
+                print(f"{MSG_ERROR}Could not move back {dest}: {e}")
+                errors += 1
+                continue
+            log.undo(src, dest)
+            if index is not None:
+                index.remove(dest)
+                if (src, dest) in run["trash"]:
+                    index_file(index, target)
+            print(f"{MSG_SUCCESS}Moved back: {dest} => {target}")
+            restored += 1
+        if not errors:
+            log.finish("undone")
+            try:
+                os.rmdir(log.trash_dir)
+            except OSError:
+                pass  # missing, or holds something undo didn't put there
+    return restored
+
+
+def purge_trash(log_dir=None, keep=ORGANIZE_TRASH_KEEP_RUNS):
+    """
+    Deletes the trash folders of all runs but the newest 'keep' ones
+    (keep=0: all of them); those runs can then no longer put their
+    dropped duplicates back. Returns the number of files deleted.
+    """
+    runs = list_runs(log_dir)
+    removed = 0
+    for path in runs[:max(0, len(runs) - keep)]:
+        folder = trash_dir(path)
+        if not os.path.isdir(folder):
+            continue
+        removed += sum(len(files) for _, _, files in os.walk(folder))
+        shutil.rmtree(folder, ignore_errors=True)
+    if removed:
+        print(f"{MSG_STATUS}Emptied old organize trash: {removed} dropped duplicate(s) deleted.")
+    return removed
+
+
+def undo_last_run(log_dir=None, index=None):
+    """
+    Rolls back the most recent organize run that hasn't been undone yet.
+    Returns the number of files moved back.
+    """
+    for path in reversed(list_runs(log_dir)):
+        run = read_run(path)
+        if run["rolled_back"] or not moves_to_undo(run):
+            continue
+        state = "completed" if run["finished"] else "interrupted"
+        print(
+            f"{MSG_STATUS}Undoing {state} organize run {os.path.basename(path)} "
+            f"({len(run['done'])} of {len(run['planned'])} planned move(s) done)"
+        )
+        restored = undo_run(path, index=index)
+        print(f"{MSG_SUCCESS}{restored} file(s) moved back.")
+        return restored
+    print(f"{MSG_NOTICE}No organize run to undo.")
+    return 0
@@ -9,15 +9,34 @@ Enhances the organizing logic to prompt the user for a destination folder strate
 Usage:
 - If 'requested' is True, uses 'Requested Songs' subdirectory when choosing date-based.
 - If a manual or reused folder is chosen, it overrides the date-based logic.
+- Files already in the DJ pool (by acoustic fingerprint) are handled per DUPLICATE_POLICY.
+- If routing rules are configured (modules/organize/rules.py), matching files go
+  straight to their crate folders; only the rest use the folder strategy prompt.
+- Files are moved with core/move_engine.py: renames on the same drive,
+  parallel verified copies when the DJ pool is on another drive.
+- Every run writes an operation log (modules/organize/oplog.py) that
+  'djcli org_dl --undo' replays backwards.
 """
 
 import os
-import shutil
 import datetime
 from config.settings import DJ_POOL_BASE_PATH, DOWNLOAD_FOLDER_NAME
 from core.color_utils import (
-    MSG_ERROR, MSG_NOTICE, MSG_DEBUG, MSG_SUCCESS, MSG_STATUS, MSG_WARNING, LINE_BREAK
+    MSG_ERROR, MSG_NOTICE, MSG_SUCCESS, MSG_STATUS, MSG_WARNING, LINE_BREAK
 )
+from core.file_utils import unique_destination_path
+from core.library_index import library_files
+from core.log_utils import get_logger
+from core.move_engine import move_file, move_files
+from core.tracing import span, traced
+from modules.organize.duplicates import (
+    open_fingerprint_index, check_pool_for_duplicates, resolve_duplicate
+)
+from modules.organize.rules import load_rules, load_download_sources, route_files
+from modules.organize.oplog import OrganizeLog, undo_last_run
+
+# 'log' is the OrganizeLog (operation log) throughout this module.
+logger = get_logger(__name__)
 
 AUDIO_EXTENSIONS = {".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg", ".wma", ".aiff", ".alac"}
 
@@ -114,25 +133,127 @@ def ask_folder_choice(requested=False):
     return folder
 
 
-def move_audio_file(file_path, destination_folder):
+@traced("move_audio_file")
+def move_audio_file(file_path, destination_folder, index=None):
     """
     Moves 'file_path' to 'destination_folder' if it's an audio file.
+    An existing file with the same name is never overwritten; the moved
+    file gets a numbered name instead.
+    If a fingerprint index is given, the file is first checked against the
+    DJ pool and DUPLICATE_POLICY decides whether it is moved.
     Returns the new path or None on failure/skip.
     """
     if not is_audio_file(file_path):
-        print(f"{MSG_DEBUG}Skipping non-audio file: {file_path}")
+        logger.debug("Skipping non-audio file: %s", file_path)
         return None
+
+    fingerprint = None
+    if index is not None:
+        with span("duplicate_check"):
+            fingerprint, matches = check_pool_for_duplicates(file_path, index)
+        if matches and not resolve_duplicate(file_path, matches, index):
+            return None
+
     try:
-        dest = os.path.join(destination_folder, os.path.basename(file_path))
-        shutil.move(file_path, dest)
-        print(f"{MSG_SUCCESS}Moved: {file_path} => {dest}")
+        dest = unique_destination_path(os.path.join(destination_folder, os.path.basename(file_path)))
+        move_file(file_path, dest)
+        logger.success("Moved: %s => %s", file_path, dest)
+        if index is not None and fingerprint is not None:
+            index.add(dest, fingerprint)
         return dest
     except Exception as e:
-        print(f"{MSG_ERROR}Could not move file: {file_path}")
-        print(f"{MSG_ERROR}{str(e)}")
+        logger.error("Could not move file: %s (%s)", file_path, e)
         return None
 
 
+def move_audio_files(routed, index=None, log=None):
+    """
+    Batch version of move_audio_file for {destination_folder: [file paths]}.
+    Duplicate checks and destination names are settled first, then all
+    files are moved together (cross-drive copies in parallel).
+    With an OrganizeLog, the full plan is logged before anything moves and
+    each move as it completes, so the run can be undone. Copies dropped by
+    DUPLICATE_POLICY=merge are then part of the plan too: they are moved
+    into the run's trash folder (first) instead of being deleted.
+    Returns (new paths, paths left in place).
+    """
+    pairs, fingerprints, left = [], {}, []
+    reserved = set()
+    dropped = []
+    trash = dropped.append if log is not None else None
+    for destination_folder, paths in routed.items():
+        for file_path in paths:
+            if not is_audio_file(file_path):
+                logger.debug("Skipping non-audio file: %s", file_path)
+                left.append(file_path)
+                continue
+            if index is not None:
+                fingerprint, matches = check_pool_for_duplicates(file_path, index)
+                if matches and not resolve_duplicate(file_path, matches, index, trash=trash):
+                    left.append(file_path)
+                    continue
+                fingerprints[file_path] = fingerprint
+
+            dest = os.path.join(destination_folder, os.path.basename(file_path))
+            if dest not in dropped or dest in reserved:
+                # A pool copy being replaced frees its name; anything else doesn't.
+                dest = unique_destination_path(dest, reserved)
+            reserved.add(dest)
+            pairs.append((file_path, dest))
+
+    trash_pairs = []
+    if dropped:
+        held = set()
+        for path in dropped:
+            target = unique_destination_path(os.path.join(log.trash_dir, os.path.basename(path)), held)
+            held.add(target)
+            trash_pairs.append((path, target))
+
+    moved = []
+    if log is not None:
+        log.plan(pairs, trash=trash_pairs)
+
+    if trash_pairs:
+        os.makedirs(log.trash_dir, exist_ok=True)
+        kept = set()
+
+        def on_trashed(src, dest, error):
+            if error is not None:
+                logger.error("Could not set aside duplicate %s: %s", src, error)
+                kept.add(src)
+                log.failed(src, dest, error)
+                return
+            log.trashed(src, dest)
+
+        move_files(trash_pairs, on_done=on_trashed)
+        if kept:
+            # Never move a file onto a pool copy that is still there.
+            left.extend(src for src, dest in pairs if dest in kept)
+            pairs = [(src, dest) for src, dest in pairs if dest not in kept]
+
+    def on_done(src, dest, error):
+        if error is not None:
+            logger.error("Could not move file: %s (%s)", src, error)
+            left.append(src)
+            if log is not None:
+                log.failed(src, dest, error)
+            return
+        if log is not None:
+            log.done(src, dest)
+        logger.success("Moved: %s => %s", src, dest)
+        moved.append(dest)
+        if index is not None and fingerprints.get(src) is not None:
+            index.add(dest, fingerprints[src])
+
+    if pairs:
+        with span("move_files", files=len(pairs)):
+            stats = move_files(pairs, on_done=on_done)
+        print(f"{MSG_STATUS}Moves: {stats.summary()}")
+    if log is not None:
+        log.finish()
+    return moved, left
+
+
 def organize_downloads(requested=False):
     """
     - Looks for files in DOWNLOAD_FOLDER_NAME.
@@ -145,30 +266,54 @@ def organize_downloads(requested=False):
         print(f"{MSG_ERROR}Download folder '{DOWNLOAD_FOLDER_NAME}' not found.")
         return
 
-    all_files = [
-        f for f in os.listdir(DOWNLOAD_FOLDER_NAME)
-        if os.path.isfile(os.path.join(DOWNLOAD_FOLDER_NAME, f))
+    audio_files = [
+        entry.name for entry in
+        library_files(DOWNLOAD_FOLDER_NAME, AUDIO_EXTENSIONS, recursive=False)
     ]
-    audio_files = [f for f in all_files if is_audio_file(os.path.join(DOWNLOAD_FOLDER_NAME, f))]
 
     if not audio_files:
         print(f"{MSG_WARNING}No audio files to organize in '{DOWNLOAD_FOLDER_NAME}'.")
         return
 
-    folder_path = ask_folder_choice(requested=requested)
-    if not folder_path:
-        print(f"{MSG_ERROR}No valid destination folder selected. Aborting.")
-        return
-
-    print(
-        f"{MSG_STATUS}Organizing {len(audio_files)} file(s) from '{DOWNLOAD_FOLDER_NAME}'...\n"
-        f"Destination: {folder_path}\n{LINE_BREAK}"
-    )
-    for fname in audio_files:
-        src = os.path.join(DOWNLOAD_FOLDER_NAME, fname)
-        move_audio_file(src, folder_path)
+    audio_paths = [os.path.join(DOWNLOAD_FOLDER_NAME, f) for f in audio_files]
+    routed, unmatched = {}, audio_paths
+    ruleset = load_rules()
+    if ruleset is not None:
+        routed, unmatched = route_files(audio_paths, ruleset, load_download_sources())
+
+    if unmatched:
+        folder_path = ask_folder_choice(requested=requested)
+        if not folder_path:
+            print(f"{MSG_ERROR}No valid destination folder selected. Aborting.")
+            return
+        routed.setdefault(folder_path, []).extend(unmatched)
+
+    print(f"{MSG_STATUS}Organizing {len(audio_files)} file(s) from '{DOWNLOAD_FOLDER_NAME}'...\n{LINE_BREAK}")
+    index = open_fingerprint_index()
+    try:
+        for folder_path, paths in routed.items():
+            print(f"{MSG_STATUS}Destination: {folder_path} ({len(paths)} file(s))")
+            os.makedirs(folder_path, exist_ok=True)
+        with OrganizeLog.create() as log:
+            move_audio_files(routed, index=index, log=log)
+    finally:
+        if index is not None:
+            index.close()
 
     print(f"{MSG_NOTICE}All available audio files have been organized.")
+    print(f"{MSG_NOTICE}Run 'djcli org_dl --undo' to move them back. Log: {log.path}")
+
+
+def undo_organize():
+    """
+    Rolls back the last organize run from its operation log.
+    """
+    index = open_fingerprint_index()
+    try:
+        return undo_last_run(index=index)
+    finally:
+        if index is not None:
+            index.close()
 
 
 def main():
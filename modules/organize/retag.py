@@ -0,0 +1,117 @@
+"""
+modules/organize/retag.py
+
+Bulk retagging of an existing library (DJ_POOL_BASE_PATH by default).
+Reapplies the same cleaning/gleaning rules download_track uses:
+- Artist/title from existing tags, or parsed from "Artist - Title" file names
+- Bracketed text without 'feat'/'featuring' removed
+- Missing genre filled with the usual "Unknown Genre" placeholder (the
+  year is left alone: ID3 dates can't hold "Unknown Year", so filling it
+  would make every run report a change)
+
+Files are processed on a process pool. Each file's tags are read once and
+only written (in a single save) when something actually changes. In
+dry-run mode a compact diff is printed and nothing is written.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from config.settings import DJ_POOL_BASE_PATH, RETAG_WORKERS
+from core.color_utils import (
+    MSG_ERROR, MSG_NOTICE, MSG_SUCCESS, MSG_STATUS, LINE_BREAK
+)
+from core.metadata_utils import TagTransaction, glean_artist_title, glean_year_genre
+
+# Formats TagTransaction can write.
+RETAG_EXTENSIONS = (".mp3", ".m4a", ".mp4")
+
+# Files handed to each worker at a time.
+RETAG_CHUNK_SIZE = 32
+
+
+def find_taggable_files(root):
+    """
+    Yields every .mp3/.m4a file under root (skipping macOS '._' files).
+    """
+    for dirpath, _, filenames in os.walk(root):
+        for name in sorted(filenames):
+            if name.startswith("._") or not name.lower().endswith(RETAG_EXTENSIONS):
+                continue
+            yield os.path.join(dirpath, name)
+
+
+def compute_retag(tags, file_path):
+    """
+    Returns the cleaned {field: value} for an open TagTransaction.
+    """
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    artist, title = glean_artist_title(file_path, {"title": stem}, tags=tags)
+    genre = tags.get("genre").strip() or glean_year_genre({}, artist, title)[1]
+    return {"title": title, "artist": artist, "genre": genre}
+
+
+def retag_file(file_path, dry_run=False):
+    """
+    Retags one file. Returns (file_path, changes, error) where changes is
+    {field: (old, new)} for the fields that differ.
+    """
+    try:
+        tags = TagTransaction(file_path)
+        wanted = compute_retag(tags, file_path)
+        changes = {
+            field: (tags.get(field), value)
+            for field, value in wanted.items()
+            if tags.get(field) != value
+        }
+        if changes and not dry_run:
+            tags.set(**wanted)
+            tags.commit()
+        return file_path, changes, None
+    except Exception as e:
+        return file_path, {}, str(e)
+
+
+def _retag_worker(args):
+    return retag_file(*args)
+
+
+def format_changes(changes):
+    """
+    One-line diff: "title: 'Old' -> 'New'; genre: '' -> 'Unknown Genre'".
+    """
+    return "; ".join(f"{field}: {old!r} -> {new!r}" for field, (old, new) in changes.items())
+
+
+def retag_library(root=DJ_POOL_BASE_PATH, dry_run=False, workers=RETAG_WORKERS):
+    """
+    Retags every taggable file under root with a pool of worker processes.
+    Returns {"scanned", "changed", "failed"} counts.
+    """
+    if not os.path.isdir(root):
+        print(f"{MSG_ERROR}Folder not found: {root}")
+        return {"scanned": 0, "changed": 0, "failed": 0}
+
+    mode = "Dry run" if dry_run else "Retagging"
+    print(f"{MSG_STATUS}{mode}: '{root}' with {workers} worker(s)...\n{LINE_BREAK}")
+
+    jobs = ((path, dry_run) for path in find_taggable_files(root))
+    counts = {"scanned": 0, "changed": 0, "failed": 0}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_path, changes, error in pool.map(_retag_worker, jobs, chunksize=RETAG_CHUNK_SIZE):
+            counts["scanned"] += 1
+            rel_path = os.path.relpath(file_path, root)
+            if error:
+                counts["failed"] += 1
+                print(f"{MSG_ERROR}{rel_path}: {error}")
+            elif changes:
+                counts["changed"] += 1
+                print(f"{MSG_NOTICE}{rel_path}: {format_changes(changes)}")
+
+    verb = "would change" if dry_run else "changed"
+    print(
+        f"{LINE_BREAK}\n{MSG_SUCCESS}{counts['scanned']} file(s) scanned, "
+        f"{counts['changed']} {verb}, {counts['failed']} failed."
+    )
+    return counts
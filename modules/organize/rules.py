@@ -0,0 +1,252 @@
+"""
+modules/organize/rules.py
+
+Declarative routing rules for organizing, loaded from ORGANIZE_RULES_PATH
+(JSON; see config/default_organizeRules.json for an example):
+
+    {
+      "rules": [
+        {"name": "Amapiano", "match": {"genre": ["amapiano", "afro house"]},
+         "dest": "Crates/Amapiano"},
+        {"name": "DnB", "match": {"bpm": [160, 180]}, "dest": "Crates/DnB/{key}"},
+        {"match": {"source": "soundcloud", "artist": "re:^dj "}, "dest": "Crates/SoundCloud DJs"}
+      ]
+    }
+
+- Match fields: genre, artist, key (a value or list, case-insensitive;
+  "re:" prefixes a regular expression), bpm ([min, max), either end may be
+  null), source ("youtube", "soundcloud", ... from the download index).
+  All fields of a rule must match; the first matching rule wins.
+- "dest" is relative to DJ_POOL_BASE_PATH (or absolute) and may use
+  {genre}, {artist}, {key}, {bpm}, {year} and {source}; any other
+  placeholder is rejected when the rules are loaded.
+- Rules are compiled once into predicate functions; each file's tags are
+  read once (TagTransaction) into a TrackInfo that every rule checks.
+Files no rule matches fall back to the regular organize destination.
+"""
+
+import os
+import re
+import json
+import string
+
+from config.settings import DJ_POOL_BASE_PATH, ORGANIZE_RULES_PATH
+from core.color_utils import MSG_ERROR, MSG_STATUS, MSG_WARNING
+from core.file_utils import sanitize_filename
+from core.metadata_utils import TagTransaction
+from modules.download.link_index import load_link_index
+
+MATCH_FIELDS = ("genre", "artist", "key", "bpm", "source")
+DEST_FIELDS = ("genre", "artist", "key", "bpm", "year", "source")
+
+
+class RuleError(ValueError):
+    """Raised for a malformed routing rule."""
+
+
+class TrackInfo:
+    """
+    The tag values rules look at, read once per file.
+    """
+
+    __slots__ = ("path", "genre", "artist", "key", "bpm", "year", "source")
+
+    def __init__(self, path, genre="", artist="", key="", bpm=None, year="", source=""):
+        self.path = path
+        self.genre = genre
+        self.artist = artist
+        self.key = key
+        self.bpm = bpm
+        self.year = year
+        self.source = source
+
+    @classmethod
+    def from_file(cls, path, source=""):
+        """
+        Reads genre/artist/key/bpm/year with a single tag parse.
+        Unreadable or untagged files get empty values.
+        """
+        try:
+            tags = TagTransaction(path)
+        except Exception:
+            return cls(path, source=source)
+        try:
+            bpm = float(tags.get("bpm")) or None
+        except ValueError:
+            bpm = None
+        return cls(
+            path,
+            genre=tags.get("genre"),
+            artist=tags.get("artist"),
+            key=tags.get("key"),
+            bpm=bpm,
+            year=tags.get("year")[:4],
+            source=source
+        )
+
+
+def _normalize(text):
+    return re.sub(r"\s+", "", str(text)).lower()
+
+
+def _text_matcher(field, spec):
+    """
+    Predicate for genre/artist/key: exact (case/space-insensitive) values
+    looked up in a set, plus any "re:" patterns.
+    """
+    values = spec if isinstance(spec, list) else [spec]
+    exact, patterns = set(), []
+    for value in values:
+        value = str(value)
+        if value.startswith("re:"):
+            patterns.append(re.compile(value[3:], re.IGNORECASE))
+        else:
+            exact.add(_normalize(value))
+
+    def match(track):
+        text = getattr(track, field) or ""
+        if _normalize(text) in exact:
+            return True
+        return any(p.search(text) for p in patterns)
+    return match
+
+
+def _bpm_matcher(spec):
+    if not isinstance(spec, list) or len(spec) != 2:
+        raise RuleError(f"bpm must be [min, max], got {spec!r}")
+    low = float(spec[0]) if spec[0] is not None else float("-inf")
+    high = float(spec[1]) if spec[1] is not None else float("inf")
+
+    def match(track):
+        return track.bpm is not None and low <= track.bpm < high
+    return match
+
+
+def _check_dest(name, dest):
+    """
+    Rejects a dest template that would fail when formatted: unknown or
+    positional placeholders, attribute/index access and unbalanced braces.
+    """
+    if not isinstance(dest, str):
+        raise RuleError(f"{name}: 'dest' must be a string")
+    try:
+        fields = list(string.Formatter().parse(dest))
+    except ValueError as e:
+        raise RuleError(f"{name}: invalid dest '{dest}': {e}")
+    for _, field, spec, _ in fields:
+        if field is None:
+            continue
+        if field not in DEST_FIELDS:
+            raise RuleError(
+                f"{name}: unknown placeholder '{{{field}}}' in dest (use {', '.join(DEST_FIELDS)})"
+            )
+        if spec and "{" in spec:
+            _check_dest(name, spec)
+
+
+class Rule:
+    """
+    One compiled rule: a list of predicates and a destination template.
+    """
+
+    def __init__(self, spec, index=0):
+        if "dest" not in spec or not isinstance(spec.get("match"), dict):
+            raise RuleError(f"rule #{index + 1} needs 'match' (object) and 'dest'")
+        self.name = spec.get("name") or f"rule #{index + 1}"
+        self.dest = spec["dest"]
+        _check_dest(self.name, self.dest)
+        self.predicates = []
+        for field, value in spec["match"].items():
+            if field not in MATCH_FIELDS:
+                raise RuleError(f"{self.name}: unknown match field '{field}'")
+            if field == "bpm":
+                self.predicates.append(_bpm_matcher(value))
+            else:
+                self.predicates.append(_text_matcher(field, value))
+
+    def matches(self, track):
+        return all(predicate(track) for predicate in self.predicates)
+
+    def destination(self, track, base=DJ_POOL_BASE_PATH):
+        values = {
+            field: sanitize_filename(str(getattr(track, field) or f"Unknown {field.title()}"))
+            for field in ("genre", "artist", "key", "year", "source")
+        }
+        values["bpm"] = str(int(round(track.bpm))) if track.bpm else "Unknown BPM"
+        return os.path.join(base, self.dest.format(**values))
+
+
+class RuleSet:
+    """
+    Ordered, compiled rules. route() returns the first match's folder.
+    """
+
+    def __init__(self, specs):
+        self.rules = [Rule(spec, i) for i, spec in enumerate(specs)]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def route(self, track, base=DJ_POOL_BASE_PATH):
+        """
+        Returns (destination folder, rule name) or (None, None).
+        """
+        for rule in self.rules:
+            if rule.matches(track):
+                return rule.destination(track, base), rule.name
+        return None, None
+
+
+def load_rules(path=None):
+    """
+    Loads and compiles the rules file. Returns a RuleSet, or None when the
+    file doesn't exist, has no rules, or is invalid (an error is printed).
+    """
+    path = path or ORGANIZE_RULES_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        ruleset = RuleSet(data.get("rules", []))
+    except (ValueError, RuleError, re.error) as e:
+        print(f"{MSG_ERROR}Invalid organize rules in '{path}': {e}")
+        return None
+    if not len(ruleset):
+        return None
+    print(f"{MSG_STATUS}Loaded {len(ruleset)} organize rule(s) from {path}")
+    return ruleset
+
+
+def load_download_sources():
+    """
+    Maps downloaded file names (lowercase) to their source site
+    ("youtube", "soundcloud", ...) using the download index.
+    """
+    sources = {}
+    for link_id, entry in load_link_index().items():
+        if entry.get("file_path"):
+            sources[os.path.basename(entry["file_path"]).lower()] = link_id.split(":", 1)[0]
+    return sources
+
+
+def route_files(paths, ruleset, sources=None, base=DJ_POOL_BASE_PATH):
+    """
+    Routes every path through the rules in one pass.
+    Returns ({destination: [paths]}, [unmatched paths]).
+    """
+    sources = sources or {}
+    routed, unmatched = {}, []
+    for path in paths:
+        track = TrackInfo.from_file(path, sources.get(os.path.basename(path).lower(), ""))
+        destination, _ = ruleset.route(track, base)
+        if destination:
+            routed.setdefault(destination, []).append(path)
+        else:
+            unmatched.append(path)
+    if routed:
+        total = sum(len(v) for v in routed.values())
+        print(f"{MSG_STATUS}Rules routed {total} file(s) into {len(routed)} folder(s).")
+    if unmatched and routed:
+        print(f"{MSG_WARNING}{len(unmatched)} file(s) matched no rule.")
+    return routed, unmatched
@@ -0,0 +1,295 @@
+"""
+modules/organize/watcher.py
+
+Non-interactive watch mode for the Downloads folder (djcli org_dl --watch).
+
+- New files are picked up through inotify on Linux (via ctypes, no extra
+  dependency); other platforms, or a failed inotify setup, fall back to
+  polling the folder's mtime and listing it only when it changed.
+- A file is only moved once its size and mtime have stopped changing for
+  WATCH_SETTLE_SECONDS, and never while it still has a partial-download
+  name (.part, .ytdl, .tmp) or a download is still tagging or renaming it
+  (core/file_utils.claim_file).
+- Destinations come from the organize routing rules (if configured), then
+  WATCH_ROUTING_STRATEGY ("date", "requested", or a fixed folder path)
+  instead of the ask_folder_choice prompt.
+- Settled files are moved in batches, sharing one fingerprint index
+  (cross-drive copies run in parallel, see core/move_engine.py). Each
+  batch writes its own operation log, so 'org_dl --undo' rolls back the
+  last batch.
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+from config.settings import (
+    DOWNLOAD_FOLDER_NAME,
+    WATCH_ROUTING_STRATEGY,
+    WATCH_SETTLE_SECONDS,
+    WATCH_BATCH_SIZE,
+    WATCH_BATCH_SECONDS,
+    WATCH_POLL_INTERVAL
+)
+from core.color_utils import MSG_ERROR, MSG_NOTICE, MSG_STATUS, MSG_SUCCESS
+from core.file_utils import is_file_claimed
+from modules.organize.organize_files import (
+    is_audio_file, build_date_based_folder, move_audio_files
+)
+from modules.organize.duplicates import open_fingerprint_index
+from modules.organize.oplog import OrganizeLog
+from modules.organize.rules import load_rules, load_download_sources, route_files
+
+PARTIAL_SUFFIXES = (".part", ".ytdl", ".tmp", ".crdownload", ".download")
+
+
+#########################################################
+#              FOLDER WATCHERS
+#########################################################
+
+class PollingWatcher:
+    """
+    Portable watcher: stats the folder every interval and lists it only
+    when its mtime changed (a file was added, removed or renamed).
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._dir_mtime = None
+
+    def wait(self, timeout):
+        """
+        Sleeps up to 'timeout' seconds. Returns the names in the folder if
+        it changed since the last call, otherwise an empty set.
+        """
+        time.sleep(timeout)
+        return self.changed_names()
+
+    def changed_names(self):
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return set()
+        if mtime == self._dir_mtime:
+            return set()
+        self._dir_mtime = mtime
+        with os.scandir(self.folder) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Linux watcher on the inotify API. Returns the names of files that were
+    written, created or moved into the folder.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, folder):
+        self.folder = folder
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {folder}")
+        self._fallback = PollingWatcher(folder)
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+
+        names, offset = set(), 0
+        while offset + self._EVENT.size <= len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; list the folder once to catch up.
+                self._fallback._dir_mtime = None
+                names |= self._fallback.changed_names()
+            elif name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(folder):
+    """
+    InotifyWatcher where available, otherwise PollingWatcher.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError) as e:
+            print(f"{MSG_NOTICE}inotify unavailable ({e}); polling '{folder}' instead.")
+    return PollingWatcher(folder)
+
+
+#########################################################
+#              SETTLE / ROUTE / BATCH
+#########################################################
+
+def resolve_destination(strategy=WATCH_ROUTING_STRATEGY):
+    """
+    Folder for a batch: "date" and "requested" build the usual date-based
+    path; anything else is used as a fixed folder path.
+    """
+    if strategy == "date":
+        return build_date_based_folder(requested=False)
+    if strategy == "requested":
+        return build_date_based_folder(requested=True)
+    return os.path.expanduser(strategy)
+
+
+class WatchOrganizer:
+    """
+    Tracks candidate files until they settle, then moves them in batches.
+    tick() does one round of work and is driven by watch_downloads().
+    """
+
+    def __init__(self, folder, strategy=WATCH_ROUTING_STRATEGY, settle_seconds=WATCH_SETTLE_SECONDS,
+                 batch_size=WATCH_BATCH_SIZE, batch_seconds=WATCH_BATCH_SECONDS, clock=time.monotonic,
+                 ruleset=None):
+        self.folder = folder
+        self.ruleset = ruleset
+        self.strategy = strategy
+        self.settle_seconds = settle_seconds
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.clock = clock
+        self.pending = {}   # name -> (size, mtime_ns, time the stat last changed)
+        self.batch = []
+        self.batch_started = None
+        self.moved = []
+        self.left_behind = set()  # not moved (e.g. DUPLICATE_POLICY=skip); don't retry
+
+    def notice(self, names):
+        """
+        Registers names reported by a watcher (non-audio and partial files are ignored).
+        """
+        for name in names:
+            if name.startswith(".") or name.lower().endswith(PARTIAL_SUFFIXES):
+                continue
+            if name in self.pending or name in self.batch or name in self.left_behind:
+                continue
+            if is_audio_file(name):
+                self.pending[name] = (None, None, self.clock())
+
+    def _check_settled(self, now):
+        for name, (size, mtime, changed_at) in list(self.pending.items()):
+            path = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[name]  # moved away or deleted
+                continue
+            if is_file_claimed(path):
+                # The downloader still owns it; settle from when it lets go.
+                self.pending[name] = (None, None, now)
+            elif (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self.pending[name] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - changed_at >= self.settle_seconds:
+                del self.pending[name]
+                if not self.batch:
+                    self.batch_started = now
+                self.batch.append(name)
+
+    def tick(self, names=(), force_flush=False):
+        """
+        Notices new names, promotes settled files to the batch and flushes
+        it when it is full or old enough. Returns the paths moved.
+        """
+        now = self.clock()
+        self.notice(names)
+        self._check_settled(now)
+        if self.batch and (force_flush or len(self.batch) >= self.batch_size
+                           or now - self.batch_started >= self.batch_seconds):
+            return self.flush()
+        return []
+
+    def flush(self):
+        """
+        Moves the current batch with one fingerprint index. Returns the new paths.
+        """
+        batch, self.batch = self.batch, []
+        paths = [os.path.join(self.folder, name) for name in batch]
+        routed, unmatched = {}, paths
+        if self.ruleset is not None:
+            routed, unmatched = route_files(paths, self.ruleset, load_download_sources())
+        if unmatched:
+            routed.setdefault(resolve_destination(self.strategy), []).extend(unmatched)
+
+        print(f"{MSG_STATUS}Organizing {len(batch)} settled file(s)")
+        index = open_fingerprint_index()
+        try:
+            for destination in list(routed):
+                try:
+                    os.makedirs(destination, exist_ok=True)
+                except OSError as e:
+                    print(f"{MSG_ERROR}Could not create folder '{destination}': {e}")
+                    del routed[destination]
+            # One operation log per batch, so 'org_dl --undo' works for watch runs too.
+            with OrganizeLog.create() as log:
+                moved, left = move_audio_files(routed, index=index, log=log)
+            self.left_behind.update(os.path.basename(p) for p in left)
+        finally:
+            if index is not None:
+                index.close()
+        self.moved.extend(moved)
+        return moved
+
+
+def watch_downloads(folder=DOWNLOAD_FOLDER_NAME, strategy=WATCH_ROUTING_STRATEGY, initial_scan=True):
+    """
+    Watches 'folder' and organizes audio files as they settle, until Ctrl+C.
+    With 'initial_scan', audio files already in the folder are picked up too.
+    """
+    if not os.path.isdir(folder):
+        print(f"{MSG_ERROR}Download folder '{folder}' not found.")
+        return
+
+    organizer = WatchOrganizer(folder, strategy=strategy, ruleset=load_rules())
+    watcher = open_watcher(folder)
+    print(f"{MSG_STATUS}Watching '{folder}' ({type(watcher).__name__}, strategy: {strategy}). Press Ctrl+C to stop.")
+
+    if initial_scan:
+        with os.scandir(folder) as entries:
+            organizer.notice(entry.name for entry in entries if entry.is_file())
+
+    try:
+        while True:
+            names = watcher.wait(WATCH_POLL_INTERVAL)
+            organizer.tick(names)
+    except KeyboardInterrupt:
+        organizer.tick(force_flush=True)
+        print(f"\n{MSG_SUCCESS}Stopped watching. {len(organizer.moved)} file(s) organized.")
+    finally:
+        watcher.close()
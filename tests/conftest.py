@@ -0,0 +1,34 @@
+# tests/conftest.py
+
+"""
+tests/conftest.py
+
+Shared fixtures. Tests never write to the user's own caches or logs: the
+shared cover store and the organize run logs go to pytest temp folders.
+"""
+
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.cover_store import CoverStore
+
+
+@pytest.fixture(autouse=True)
+def isolated_cover_store(tmp_path_factory):
+    store = CoverStore(str(tmp_path_factory.mktemp("cover_store")))
+    with patch("core.cover_utils.get_cover_store", return_value=store):
+        yield store
+    store.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_organize_logs(tmp_path_factory):
+    log_dir = str(tmp_path_factory.mktemp("organize_runs"))
+    with patch("modules.organize.oplog.ORGANIZE_LOG_DIR", log_dir):
+        yield log_dir
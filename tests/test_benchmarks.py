@@ -0,0 +1,96 @@
+# tests/test_benchmarks.py
+
+"""
+tests/test_benchmarks.py
+
+Tests for the 'djcli bench' runner:
+- Stages run against synthetic fixtures and report timings/memory
+- Baselines round-trip and regressions are flagged past the threshold
+- The synthetic library is deterministic and readable by the real code
+"""
+
+import os
+import sys
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import mutagen
+
+from benchmarks.runner import compare_to_baseline, load_baseline, run_benchmarks, save_baseline
+from benchmarks.synthetic import generate_library
+from modules.mixcloud.uploader import extract_date_from_filename, extract_number
+
+
+def test_run_benchmarks_measures_stages(tmp_path):
+    results = run_benchmarks(["id3_write", "organize_moves"], repeat=1, items=3, workdir=str(tmp_path))
+    for name in ("id3_write", "organize_moves"):
+        result = results[name]
+        assert result["items"] == 3 and result["median"] > 0
+        assert result["memory"] == "python_peak" and result["peak_kb"] >= 0
+    with pytest.raises(ValueError):
+        run_benchmarks(["no_such_stage"])
+
+
+def test_baseline_roundtrip_and_regressions(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    base = {
+        "id3_write": {"items": 10, "median": 0.5, "peak_kb": 1000, "memory": "python_peak"},
+        "cover_render": {"skipped": "no font"}
+    }
+    save_baseline(base, path)
+    baseline = load_baseline(path)
+    assert list(baseline) == ["id3_write"]
+
+    current = {"id3_write": {"items": 10, "median": 0.7, "peak_kb": 1100, "memory": "python_peak"}}
+    regressions = compare_to_baseline(current, baseline, threshold=20)
+    assert [(r[0], r[1]) for r in regressions] == [("id3_write", "time")]
+    assert regressions[0][4] == pytest.approx(40)
+
+    # Other sizes aren't comparable; small slowdowns are within the threshold.
+    assert compare_to_baseline({"id3_write": dict(current["id3_write"], items=20)}, baseline) == []
+    assert compare_to_baseline({"id3_write": dict(current["id3_write"], median=0.55)}, baseline) == []
+
+
+def _tree(root):
+    files = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            if name != "manifest.json":
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def test_synthetic_library_is_deterministic(tmp_path):
+    first = generate_library(str(tmp_path / "a"), tracks=60, downloads=10, mixes=12, images=2, seed=3, workers=4)
+    generate_library(str(tmp_path / "b"), tracks=60, downloads=10, mixes=12, images=2, seed=3, workers=1)
+    generate_library(str(tmp_path / "c"), tracks=60, downloads=10, mixes=12, images=2, seed=4)
+    assert _tree(tmp_path / "a") == _tree(tmp_path / "b")
+    assert _tree(tmp_path / "a") != _tree(tmp_path / "c")
+    assert first["files"] >= 60 + 10 + 12 + 12 + 2
+
+
+def test_synthetic_library_matches_what_the_code_expects(tmp_path):
+    root = tmp_path / "lib"
+    generate_library(str(root), tracks=40, mixes=5, images=3, seed=1)
+
+    tracks = [os.path.join(d, n) for d, _, names in os.walk(root / "pool") for n in names]
+    assert len(tracks) == 40
+    tagged = {p: mutagen.File(p) for p in tracks}
+    assert all(audio is not None and audio.info.length > 0 for audio in tagged.values())
+    with_tags = {p: audio.tags for p, audio in tagged.items() if audio.tags}
+    assert with_tags and any(tags.getall("APIC") for tags in with_tags.values())
+    for path, tags in with_tags.items():
+        assert os.path.basename(path) == f"{tags['TPE1']} - {tags['TIT2']}.mp3"
+
+    mixes = sorted(n for n in os.listdir(root / "mixes") if not n.startswith("._"))
+    dated = [extract_date_from_filename(n) for n in mixes]
+    assert sum(d is not None for d in dated) == 5
+    assert sorted(extract_number(n) for n in os.listdir(root / "covers")) == [1, 2, 3, 4, 5]
+
+    photo_ids = (root / "pexels" / "downloaded_pexel_photos.txt").read_text().split()
+    assert sorted(f"{i}.jpg" for i in photo_ids) == sorted(n for n in os.listdir(root / "pexels") if n.endswith(".jpg"))
@@ -178,4 +178,143 @@ def test_fetch_album_cover_deezer(
     """
     result = fetch_album_cover("Another Title", "Another Artist")
     assert result == "http://cover.example.com/deezer.jpg"
-    mock_deezer_cover.assert_called_once()
\ No newline at end of file
+    mock_deezer_cover.assert_called_once()
+
+
+################################################
+# M4A (MP4 atom) covers
+################################################
+
+@patch("core.cover_utils.MP3")
+@patch("core.cover_utils.MP4")
+def test_attach_cover_to_m4a_uses_covr_atom(mock_mp4, mock_mp3, tmp_path):
+    """
+    .m4a files get a 'covr' atom instead of an ID3 APIC frame.
+    """
+    mock_audio = MagicMock()
+    mock_audio.tags = {}
+    mock_mp4.return_value = mock_audio
+
+    attach_cover_to_mp3(str(tmp_path / "track.m4a"), b"jpeg-bytes")
+
+    mock_mp3.assert_not_called()
+    assert bytes(mock_audio.tags["covr"][0]) == b"jpeg-bytes"
+    mock_audio.save.assert_called_once()
+
+    mock_audio.tags = {"covr": [b"jpeg-bytes"]}
+    assert has_embedded_cover(str(tmp_path / "track.m4a"))
+
+################################################
+# Rate limiting & library backfill
+################################################
+
+from core.rate_limit import TokenBucket
+from modules.covers import backfill
+
+
+def test_token_bucket_spaces_out_calls():
+    now = [0.0]
+    waits = []
+
+    def fake_sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(2, capacity=1, clock=lambda: now[0], sleep=fake_sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert waits == [0.5, 0.5]
+    assert not bucket.try_acquire()
+    now[0] += 0.5
+    assert bucket.try_acquire()
+
+
+@patch("modules.covers.backfill.download_and_crop_cover", return_value=b"\xff\xd8jpeg")
+@patch("modules.covers.backfill.fetch_album_cover")
+def test_backfill_embeds_missing_covers_and_resumes(mock_fetch, mock_crop, tmp_path):
+    from core.metadata_utils import TagTransaction
+
+    root = tmp_path / "pool"
+    root.mkdir()
+    frame = b"\xff\xfb\x90\x00" + b"\x00" * 413
+    for name in ("A - One.mp3", "B - Two.mp3", "C - Three.mp3"):
+        (root / name).write_bytes(frame * 10)
+    mock_fetch.side_effect = lambda title, artist, rate_limiters=None: (
+        None if artist == "B" else f"http://covers/{title}.jpg"
+    )
+    state_file = str(tmp_path / "state.jsonl")
+
+    counts = backfill.backfill_covers(str(root), workers=2, max_lookups=2, state_file=state_file)
+    assert sum(counts.values()) == 2
+
+    counts = backfill.backfill_covers(str(root), workers=2, max_lookups=2, state_file=state_file)
+    assert counts == {"embedded": 1, "not_found": 0, "failed": 0}
+
+    assert TagTransaction(str(root / "A - One.mp3")).has_cover
+    assert TagTransaction(str(root / "C - Three.mp3")).has_cover
+    assert not TagTransaction(str(root / "B - Two.mp3")).has_cover
+
+    # Nothing left: covered files are skipped, the miss waits for the retry window.
+    mock_fetch.reset_mock()
+    backfill.backfill_covers(str(root), workers=2, state_file=state_file)
+    mock_fetch.assert_not_called()
+
+################################################
+# Cover normalization
+################################################
+
+from core.cover_utils import normalize_cover
+
+
+def test_normalize_cover_downscales_large_images():
+    big = image_to_jpeg_bytes(Image.new("RGB", (2400, 1800), color="red"))
+    result = normalize_cover(big, max_dimension=600)
+    img = Image.open(BytesIO(result))
+    assert img.format == "JPEG"
+    assert img.size == (600, 600)
+    assert len(result) < len(big)
+
+
+def test_normalize_cover_passes_through_small_square_jpeg():
+    small = image_to_jpeg_bytes(Image.new("RGB", (500, 500), color="green"))
+    assert normalize_cover(small, max_dimension=600) is small
+
+    png = BytesIO()
+    Image.new("RGBA", (300, 300), color="blue").save(png, format="PNG")
+    img = Image.open(BytesIO(normalize_cover(png.getvalue(), max_dimension=600)))
+    assert img.format == "JPEG" and img.size == (300, 300)
+
+################################################
+# Cover store
+################################################
+
+from core.cover_store import CoverStore, cover_digest
+from core.cover_utils import download_and_crop_cover
+
+
+def test_cover_store_dedupes_identical_artwork(tmp_path):
+    with CoverStore(str(tmp_path / "covers")) as store:
+        assert store.get("http://a/cover.jpg") is None
+        digest_a = store.put("http://a/cover.jpg", b"same-bytes")
+        digest_b = store.put("http://b/other.jpg", b"same-bytes")
+
+        assert digest_a == digest_b == cover_digest(b"same-bytes")
+        assert store.get("http://b/other.jpg") == b"same-bytes"
+        blobs = [n for _, _, names in os.walk(tmp_path / "covers") for n in names if n.endswith(".jpg")]
+        assert blobs == [f"{digest_a}.jpg"]
+
+
+@patch("core.cover_utils.requests.get")
+def test_download_and_crop_cover_reuses_stored_cover(mock_get, tmp_path):
+    mock_resp = MagicMock()
+    mock_resp.status_code = 200
+    mock_resp.content = image_to_jpeg_bytes(Image.new("RGB", (800, 400), color="blue"))
+    mock_get.return_value = mock_resp
+
+    with CoverStore(str(tmp_path / "covers")) as store, \
+         patch("core.cover_utils.get_cover_store", return_value=store):
+        first = download_and_crop_cover("http://example.com/album.jpg")
+        second = download_and_crop_cover("http://example.com/album.jpg")
+
+    assert first == second
+    mock_get.assert_called_once()
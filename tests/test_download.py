@@ -7,8 +7,9 @@ so you don't rely on an actual network connection during tests.
 
 import os
 import sys
+import sqlite3
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 # Ensure the project root is in the path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -43,4 +44,274 @@ from modules.download.downloader import download_track
 
 #             assert downloaded_file_path == str(download_folder / "Test Song.mp3")
 #             assert info_dict.get("title") == "Test Song"
-#             assert (download_folder / "Test Song.mp3").name == "Test Song.mp3"
\ No newline at end of file
+#             assert (download_folder / "Test Song.mp3").name == "Test Song.mp3"
+
+################################################
+# Download index (skip already-downloaded links)
+################################################
+
+from modules.download.link_index import (
+    canonical_link_id,
+    load_link_index,
+    record_link,
+    is_link_done
+)
+
+
+def test_canonical_link_id_normalizes_url_forms():
+    yt_forms = [
+        "https://www.youtube.com/watch?v=o-YBDTqX_ZU",
+        "https://youtu.be/o-YBDTqX_ZU?t=42",
+        "https://m.youtube.com/watch?v=o-YBDTqX_ZU&list=PL123",
+        "https://music.youtube.com/watch?v=o-YBDTqX_ZU",
+        "https://www.youtube.com/shorts/o-YBDTqX_ZU",
+    ]
+    assert {canonical_link_id(l) for l in yt_forms} == {"youtube:o-YBDTqX_ZU"}
+
+    assert canonical_link_id("https://soundcloud.com/Some-Artist/Track-Name?si=abc") == \
+        canonical_link_id("https://m.soundcloud.com/some-artist/track-name/") == \
+        "soundcloud:some-artist/track-name"
+
+
+def test_link_index_round_trip(tmp_path):
+    index_file = str(tmp_path / "links.jsonl")
+    entries = {}
+    record_link(entries, "https://youtu.be/o-YBDTqX_ZU", "failed", index_file=index_file)
+    record_link(entries, "https://youtu.be/o-YBDTqX_ZU", "done", "/dl/a.mp3", index_file=index_file)
+
+    reloaded = load_link_index(index_file)
+    assert is_link_done(reloaded, "https://www.youtube.com/watch?v=o-YBDTqX_ZU")
+    assert reloaded["youtube:o-YBDTqX_ZU"]["file_path"] == "/dl/a.mp3"
+
+
+@patch("modules.download.downloader.plan_downloads")
+@patch("modules.download.downloader.download_track")
+def test_process_links_from_file_skips_done_links(mock_download, mock_plan, tmp_path):
+    from modules.download import downloader
+
+    links_file = tmp_path / "musicLinks.txt"
+    links_file.write_text(
+        "https://youtu.be/aaaaaaaaaaa\n"
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa\n"
+        "https://youtu.be/bbbbbbbbbbb\n"
+    )
+    index_file = str(tmp_path / "links.jsonl")
+    record_link({}, "https://youtu.be/aaaaaaaaaaa", "done", "/dl/a.mp3", index_file=index_file)
+    mock_download.return_value = (str(tmp_path / "b.mp3"), {})
+    mock_plan.side_effect = lambda links, index, force=False: (
+        [{"link": l, "info": None, "media_id": None, "expected_size": 0} for l in links], []
+    )
+
+    with patch.object(downloader, "LINKS_FILE", str(links_file)), \
+         patch.object(downloader, "DOWNLOAD_FOLDER_NAME", str(tmp_path)), \
+         patch("modules.download.link_index.DOWNLOAD_INDEX_FILE", index_file):
+        downloader.process_links_from_file()
+
+    mock_plan.assert_called_once()
+    assert mock_plan.call_args[0][0] == ["https://youtu.be/bbbbbbbbbbb"]
+    mock_download.assert_called_once_with("https://youtu.be/bbbbbbbbbbb", str(tmp_path), info=None, unique_name=False)
+    assert is_link_done(load_link_index(index_file), "https://youtu.be/bbbbbbbbbbb")
+
+
+@patch("modules.download.planner.collect_pool_basenames", return_value={"a - song.mp3"})
+@patch("modules.download.planner.resolve_link_metadata")
+@patch("modules.download.downloader.download_track")
+def test_process_links_from_file_force_downloads_again(mock_download, mock_resolve, mock_pool, tmp_path):
+    from modules.download import downloader
+
+    links_file = tmp_path / "musicLinks.txt"
+    links_file.write_text("https://youtu.be/aaaaaaaaaaa\n")
+    index_file = str(tmp_path / "links.jsonl")
+    record_link({}, "https://youtu.be/aaaaaaaaaaa", "done", "/dl/a.mp3",
+                media_id="youtube:aaaaaaaaaaa", index_file=index_file)
+    info = {"id": "aaaaaaaaaaa", "extractor_key": "Youtube", "title": "A - Song"}
+    mock_resolve.side_effect = lambda link: (link, info)
+    mock_download.return_value = (str(tmp_path / "A - Song.mp3"), info)
+
+    with patch.object(downloader, "LINKS_FILE", str(links_file)), \
+         patch.object(downloader, "DOWNLOAD_FOLDER_NAME", str(tmp_path)), \
+         patch("modules.download.link_index.DOWNLOAD_INDEX_FILE", index_file):
+        downloader.process_links_from_file()
+        assert mock_download.call_count == 0  # done, and its name is in the pool
+        downloader.process_links_from_file(force=True)
+
+    mock_download.assert_called_once_with("https://youtu.be/aaaaaaaaaaa", str(tmp_path), info=info, unique_name=False)
+    assert load_link_index(index_file)["youtube:aaaaaaaaaaa"]["file_path"] == str(tmp_path / "A - Song.mp3")
+
+
+################################################
+# Planning pass
+################################################
+
+from modules.download.planner import plan_downloads, expected_size
+
+
+@patch("modules.download.planner.resolve_link_metadata")
+def test_plan_downloads_dedupes_skips_and_sorts(mock_resolve):
+    infos = {
+        "https://youtu.be/big": {"id": "big", "extractor_key": "Youtube", "title": "A - Big", "filesize": 9000},
+        "https://youtu.be/small": {"id": "small", "extractor_key": "Youtube", "title": "A - Small", "duration": 1, "abr": 8},
+        "https://www.youtube.com/watch?v=small": {"id": "small", "extractor_key": "Youtube", "title": "A - Small"},
+        "https://youtu.be/pooled": {"id": "pooled", "extractor_key": "Youtube", "title": "B - In Pool (Official Video)"},
+        "https://youtu.be/broken": None,
+    }
+    mock_resolve.side_effect = lambda link: (link, infos[link])
+
+    queue, skipped = plan_downloads(list(infos), link_index={}, pool_names={"b - in pool.mp3"}, max_workers=2)
+
+    assert [item["link"] for item in queue] == [
+        "https://youtu.be/small", "https://youtu.be/big", "https://youtu.be/broken"
+    ]
+    assert queue[-1]["info"] is None
+    reasons = {link: reason for link, reason, _ in skipped}
+    assert reasons["https://www.youtube.com/watch?v=small"] == "same media as an earlier link"
+    assert reasons["https://youtu.be/pooled"] == "already in DJ pool"
+
+
+def test_expected_size_estimates_from_bitrate():
+    assert expected_size({"filesize_approx": 1234}) == 1234
+    assert expected_size({"duration": 8, "abr": 128}) == 128000
+    assert expected_size({"entries": [{"filesize": 10}, {"filesize": 5}]}) == 15
+
+
+################################################
+# Playlists / sets
+################################################
+
+@patch("modules.download.downloader.download_track")
+def test_download_playlist_downloads_and_records_each_entry(mock_download, tmp_path):
+    from modules.download import downloader
+
+    index_file = str(tmp_path / "links.jsonl")
+    link_index = {}
+    record_link(link_index, "https://youtu.be/ccccccccccc", "done", "/dl/c.mp3", index_file=index_file)
+    mock_download.side_effect = lambda link, out, info=None, unique_name=False: (
+        (os.path.join(out, link[-3:] + ".mp3"), {"id": link[-11:]}) if "bbb" not in link else (None, None)
+    )
+    playlist = {
+        "_type": "playlist",
+        "id": "PLset",
+        "extractor_key": "YoutubeTab",
+        "entries": iter([
+            {"_type": "url", "url": "aaaaaaaaaaa", "ie_key": "Youtube"},
+            {"_type": "url", "url": "https://youtu.be/bbbbbbbbbbb"},
+            {"_type": "url", "url": "https://youtu.be/ccccccccccc"},
+            None,
+        ]),
+    }
+
+    with patch("modules.download.link_index.DOWNLOAD_INDEX_FILE", index_file):
+        paths = downloader.download_and_record(
+            "https://www.youtube.com/playlist?list=PLset", str(tmp_path), link_index, info=playlist
+        )
+
+    assert paths == [os.path.join(str(tmp_path), "aaa.mp3")]
+    assert mock_download.call_count == 2
+    # Entries download in parallel, so each gets an id-based name.
+    assert all(c.kwargs["unique_name"] for c in mock_download.call_args_list)
+    reloaded = load_link_index(index_file)
+    assert is_link_done(reloaded, "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    assert reloaded["youtube:bbbbbbbbbbb"]["status"] == "failed"
+    assert reloaded["youtube:playlist:PLset"]["status"] == "failed"
+    assert reloaded["youtube:playlist:PLset"]["entry_count"] == 3
+
+    # Forced: finished entries are downloaded again.
+    mock_download.reset_mock()
+    playlist["entries"] = [{"_type": "url", "url": "https://youtu.be/ccccccccccc"}]
+    with patch("modules.download.link_index.DOWNLOAD_INDEX_FILE", index_file):
+        paths = downloader.download_and_record(
+            "https://www.youtube.com/playlist?list=PLset", str(tmp_path), link_index, info=playlist, force=True
+        )
+    assert paths == [os.path.join(str(tmp_path), "ccc.mp3")]
+
+
+def test_iter_entries_pages_through_paged_lists():
+    from modules.download.downloader import _iter_entries, is_playlist_link
+
+    class FakePagedList:
+        def __init__(self, items):
+            self.items = items
+            self.calls = 0
+
+        def getslice(self, start, end):
+            self.calls += 1
+            return self.items[start:end]
+
+    paged = FakePagedList(list(range(120)))
+    assert list(_iter_entries(paged)) == list(range(120))
+    assert paged.calls == 3
+
+    assert is_playlist_link("https://soundcloud.com/artist/sets/summer-mix")
+    assert is_playlist_link("https://www.youtube.com/playlist?list=PL123")
+    assert not is_playlist_link("https://soundcloud.com/artist/track")
+
+
+################################################
+# Transcode policy
+################################################
+
+from modules.download.audio_policy import audio_format_selector, audio_postprocessor
+
+
+def test_native_policy_copies_acceptable_sources():
+    from yt_dlp.postprocessor.ffmpeg import resolve_mapping
+
+    assert audio_postprocessor("320", policy="always")["preferredcodec"] == "mp3"
+    assert audio_format_selector("always") == "bestaudio/best"
+
+    mapping = audio_postprocessor("320", policy="native")["preferredcodec"]
+    assert resolve_mapping("m4a", mapping)[0] == "m4a"
+    assert resolve_mapping("mp3", mapping)[0] == "mp3"
+    assert resolve_mapping("aac", mapping) == ("m4a", None)
+    assert resolve_mapping("webm", mapping) == ("mp3", None)
+    assert "acodec^=mp4a" in audio_format_selector("native")
+
+
+@patch("core.metadata_utils.MP3")
+@patch("core.metadata_utils.MP4")
+def test_update_id3_tags_writes_mp4_atoms_for_m4a(mock_mp4, mock_mp3):
+    from unittest.mock import MagicMock
+    from core.metadata_utils import update_id3_tags
+
+    mock_audio = MagicMock()
+    mock_audio.tags = {}
+    mock_mp4.return_value = mock_audio
+
+    assert update_id3_tags("/dl/track.m4a", "Artist", "Title", "2024", "")
+    mock_mp3.assert_not_called()
+    assert mock_audio.tags["\xa9ART"] == ["Artist"]
+    assert mock_audio.tags["\xa9gen"] == ["Unknown Genre"]
+
+
+@patch("modules.download.downloader.warn_if_duplicate", side_effect=sqlite3.OperationalError("database is locked"))
+@patch("modules.download.downloader.check_metadata")
+@patch("modules.download.downloader.glean_year_genre", return_value=("2024", "House"))
+@patch("modules.download.downloader.TagTransaction")
+@patch("modules.download.downloader.yt_dlp.YoutubeDL")
+def test_download_track_survives_a_failed_duplicate_check(mock_ydl, mock_tags, mock_year, mock_check, mock_dup, tmp_path):
+    downloaded = tmp_path / "Some Upload [abc].mp3"
+    downloaded.write_bytes(b"audio")
+    info = {"id": "abc", "title": "Artist - Song", "requested_downloads": [{"filepath": str(downloaded)}]}
+    mock_ydl.return_value.__enter__.return_value.extract_info.return_value = info
+    mock_tags.return_value = MagicMock(title="", artist="", has_cover=True)
+
+    final_path, info_dict = download_track("https://youtu.be/abc", str(tmp_path))
+
+    assert final_path == str(tmp_path / "Artist - Song.mp3") and info_dict is info
+    assert os.path.exists(final_path)
+    mock_dup.assert_called_once_with(final_path)
+
+
+def test_rename_file_keeps_native_extension(tmp_path):
+    from modules.download.downloader import rename_file
+
+    original = tmp_path / "Some Upload [Official Video].m4a"
+    original.write_bytes(b"")
+    new_path = rename_file(str(original), "Artist", "Title")
+    assert new_path == str(tmp_path / "Artist - Title.m4a")
+
+    # Another version that cleans up to the same name doesn't replace it.
+    other = tmp_path / "Artist - Title (Radio Edit) [xyz].m4a"
+    other.write_bytes(b"radio")
+    assert rename_file(str(other), "Artist", "Title") == str(tmp_path / "Artist - Title (1).m4a")
+    assert os.path.exists(new_path)
@@ -0,0 +1,144 @@
+# tests/test_duplicates.py
+
+"""
+tests/test_duplicates.py
+
+Tests for acoustic fingerprinting and duplicate handling:
+- Fingerprint similarity on synthetic audio
+- Inverted index add/lookup
+- Collision-safe moves and duplicate policies
+"""
+
+import os
+import sys
+import numpy as np
+from unittest.mock import patch, MagicMock
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.fingerprint_utils import (
+    SAMPLE_RATE,
+    FingerprintIndex,
+    fingerprint_from_samples,
+    compare_fingerprints
+)
+from core.file_utils import unique_destination_path
+from modules.organize.duplicates import resolve_duplicate
+from modules.organize.organize_files import move_audio_file
+
+
+def synthetic_song(seed, seconds=30):
+    """
+    Random three-note chords, one every half second.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    out = np.zeros_like(t)
+    step = SAMPLE_RATE // 2
+    for start in range(0, len(t), step):
+        for note in rng.integers(40, 80, 3):
+            freq = 440 * 2 ** ((note - 69) / 12)
+            out[start:start + step] += np.sin(2 * np.pi * freq * t[start:start + step])
+    return (out / 3).astype(np.float32)
+
+
+################################################
+# 1) Fingerprint similarity
+################################################
+
+def test_fingerprint_matches_reencoded_copy():
+    """
+    A quieter, noisier, slightly offset copy should still match;
+    a different song should not.
+    """
+    song = synthetic_song(1)
+    noisy = (song[2000:] * 0.5 + np.random.default_rng(0).normal(0, 0.05, len(song) - 2000)).astype(np.float32)
+
+    fp_song = fingerprint_from_samples(song)
+    assert fp_song.dtype == np.uint32 and len(fp_song) > 0
+
+    assert compare_fingerprints(fp_song, fingerprint_from_samples(noisy)) > 0.9
+    assert compare_fingerprints(fp_song, fingerprint_from_samples(synthetic_song(2))) < 0.7
+
+
+################################################
+# 2) Inverted index
+################################################
+
+def test_index_lookup_finds_near_duplicate(tmp_path):
+    index = FingerprintIndex(str(tmp_path / "fp.db"))
+    paths = []
+    for seed in (1, 2, 3):
+        path = tmp_path / f"song_{seed}.mp3"
+        path.write_bytes(b"x")
+        index.add(str(path), fingerprint_from_samples(synthetic_song(seed)))
+        paths.append(str(path))
+
+    query = fingerprint_from_samples(synthetic_song(2)[5000:] * 0.8)
+    matches = index.lookup(query)
+    assert [p for p, _ in matches] == [paths[1]]
+
+    # The query file itself doesn't use up the only candidate slot.
+    copy = tmp_path / "song_2 (copy).mp3"
+    copy.write_bytes(b"x")
+    index.add(str(copy), fingerprint_from_samples(synthetic_song(2)))
+    assert [p for p, _ in index.lookup(query, max_candidates=1, exclude=str(copy))] == [paths[1]]
+    assert [p for p, _ in index.lookup(query, max_candidates=1, exclude=paths[1])] == [str(copy)]
+
+    assert index.is_current(paths[0])
+    index.rename(paths[0], str(tmp_path / "moved.mp3"))
+    assert str(tmp_path / "moved.mp3") in index.paths()
+    index.close()
+
+
+################################################
+# 3) Moves and policies
+################################################
+
+def test_unique_destination_path(tmp_path):
+    target = tmp_path / "Artist - Song.mp3"
+    assert unique_destination_path(str(target)) == str(target)
+    target.write_bytes(b"a")
+    (tmp_path / "Artist - Song (1).mp3").write_bytes(b"b")
+    assert unique_destination_path(str(target)) == str(tmp_path / "Artist - Song (2).mp3")
+
+
+def test_move_audio_file_does_not_overwrite(tmp_path):
+    src_dir, dest_dir = tmp_path / "downloads", tmp_path / "pool"
+    src_dir.mkdir()
+    dest_dir.mkdir()
+    (src_dir / "song.mp3").write_bytes(b"new")
+    (dest_dir / "song.mp3").write_bytes(b"old")
+
+    new_path = move_audio_file(str(src_dir / "song.mp3"), str(dest_dir))
+    assert new_path == str(dest_dir / "song (1).mp3")
+    assert (dest_dir / "song.mp3").read_bytes() == b"old"
+
+
+@patch("modules.organize.organize_files.check_pool_for_duplicates")
+def test_move_audio_file_skips_duplicate(mock_check, tmp_path):
+    """
+    With the 'skip' policy a duplicate stays in the download folder.
+    """
+    (tmp_path / "song.mp3").write_bytes(b"new")
+    mock_check.return_value = (np.zeros(4, dtype=np.uint32), [("/pool/song.mp3", 0.97)])
+
+    with patch("modules.organize.organize_files.resolve_duplicate",
+               side_effect=lambda f, m, i: resolve_duplicate(f, m, i, policy="skip")):
+        result = move_audio_file(str(tmp_path / "song.mp3"), str(tmp_path / "pool"), index=MagicMock())
+
+    assert result is None
+    assert (tmp_path / "song.mp3").exists()
+
+
+@patch("modules.organize.duplicates.send2trash")
+@patch("modules.organize.duplicates.get_bitrate")
+def test_merge_policy_keeps_higher_bitrate(mock_bitrate, mock_trash):
+    index = MagicMock()
+    mock_bitrate.side_effect = lambda p: 320000 if p == "new.mp3" else 128000
+
+    assert resolve_duplicate("new.mp3", [("old.mp3", 0.95)], index, policy="merge") is True
+    mock_trash.assert_called_once_with("old.mp3")
+    index.remove.assert_called_once_with("old.mp3")
@@ -0,0 +1,119 @@
+# tests/test_logging.py
+
+"""
+tests/test_logging.py
+
+Tests for the shared logging layer (core/log_utils.py):
+- Console prefixes, color only on terminals, quiet levels
+- Suppressed messages are never formatted
+- JSON lines on the console and in the background-written log file
+- Per-file organize messages follow the configured level
+"""
+
+import io
+import os
+import sys
+import json
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.color_utils import COLOR_RED, COLOR_RESET
+from core.log_utils import configure_logging, flush_logs, get_logger, TerminalHandler
+
+
+class CountingValue:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "value"
+
+
+class FakeTTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    yield
+    configure_logging(log_file="")
+
+
+def test_terminal_prefixes_levels_and_lazy_formatting():
+    out = io.StringIO()
+    configure_logging(level="NOTICE", fmt="text", log_file="", stream=out)
+    log = get_logger("tests.logging")
+    assert log.name == "djcli.tests.logging"
+
+    value = CountingValue()
+    log.info("hidden %s", value)
+    log.success("hidden %s", value)
+    log.debug("hidden %s", value)
+    assert value.calls == 0
+
+    log.notice("Skipped %d link(s)", 3)
+    log.error("Failed %s", value)
+    assert out.getvalue().splitlines() == ["[Notice]: Skipped 3 link(s)", "[Error]: Failed value"]
+    assert "\033[" not in out.getvalue()
+
+    tty = FakeTTY()
+    handler = TerminalHandler(tty)
+    handler.emit(log.makeRecord(log.name, 40, __file__, 1, "boom", (), None))
+    assert tty.getvalue() == f"{COLOR_RED}[Error]{COLOR_RESET}: boom\n"
+
+
+def test_json_lines_keep_extra_fields_and_tracebacks():
+    out = io.StringIO()
+    configure_logging(level="INFO", fmt="json", log_file="", stream=out)
+    log = get_logger("tests.logging")
+    log.success("Uploaded %s", "Mix 1", extra={"mix_number": 1})
+    try:
+        raise ValueError("bad tag")
+    except ValueError:
+        log.exception("Could not tag %s", "a.mp3")
+
+    first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first["level"] == "success" and first["msg"] == "Uploaded Mix 1"
+    assert first["mix_number"] == 1 and first["logger"] == "djcli.tests.logging"
+    assert second["level"] == "error" and "ValueError: bad tag" in second["exc"]
+
+
+def test_log_file_is_written_in_the_background(tmp_path):
+    path = tmp_path / "logs" / "djcli.jsonl"
+    out = io.StringIO()
+    configure_logging(level="WARNING", fmt="text", log_file=str(path), file_level="DEBUG", stream=out)
+    log = get_logger("tests.logging")
+    items = ["a.mp3"]
+    log.debug("Tagged %s", items)
+    items.append("b.mp3")  # changed after the call; the file keeps what was logged
+    log.warning("Slow cover lookup")
+    flush_logs()
+
+    entries = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [(e["level"], e["msg"]) for e in entries] == [
+        ("debug", "Tagged ['a.mp3']"),
+        ("warning", "Slow cover lookup")
+    ]
+    assert out.getvalue() == "[Warning]: Slow cover lookup\n"
+
+
+def test_organize_moves_follow_the_log_level(tmp_path, capsys):
+    from modules.organize.organize_files import move_audio_files
+
+    (tmp_path / "pool").mkdir()
+    (tmp_path / "a.mp3").write_bytes(b"a")
+    out = io.StringIO()
+    configure_logging(level="WARNING", fmt="json", log_file="", stream=out)
+    moved, _ = move_audio_files({str(tmp_path / "pool"): [str(tmp_path / "a.mp3")]})
+    assert moved == [str(tmp_path / "pool" / "a.mp3")]
+    assert out.getvalue() == "" and "Moved:" not in capsys.readouterr().out
+
+    configure_logging(level="INFO", fmt="json", log_file="", stream=out)
+    (tmp_path / "b.mp3").write_bytes(b"b")
+    move_audio_files({str(tmp_path / "pool"): [str(tmp_path / "b.mp3")]})
+    assert json.loads(out.getvalue())["msg"].startswith("Moved: ")
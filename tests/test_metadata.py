@@ -0,0 +1,96 @@
+"""
+tests/test_metadata.py
+
+Tests for core/metadata_utils.py tag transactions, using a small
+synthetic MP3 so no real audio is needed.
+"""
+
+import os
+import sys
+import pytest
+
+from mutagen.id3 import ID3
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core.metadata_utils import TagTransaction, glean_artist_title, TAG_PADDING_BYTES
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz) is 417 bytes.
+MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+
+
+@pytest.fixture
+def mp3_path(tmp_path):
+    path = tmp_path / "track.mp3"
+    path.write_bytes(MP3_FRAME * 20)
+    return str(path)
+
+
+def test_transaction_writes_tags_and_cover_once(mp3_path):
+    with TagTransaction(mp3_path) as tags:
+        assert not tags.has_cover
+        tags.set(title="Title", artist="Artist", year="2024", genre="House")
+        tags.set_cover(b"\xff\xd8fake-jpeg")
+
+    id3 = ID3(mp3_path)
+    assert str(id3["TIT2"]) == "Title"
+    assert str(id3["TCON"]) == "House"
+    assert id3.getall("APIC")[0].data == b"\xff\xd8fake-jpeg"
+    assert glean_artist_title(mp3_path, {}) == ("Artist", "Title")
+
+    # Later small edits fit into the padding instead of growing the file.
+    size = os.path.getsize(mp3_path)
+    assert size >= len(MP3_FRAME) * 20 + TAG_PADDING_BYTES
+    with TagTransaction(mp3_path) as tags:
+        tags.set(genre="Techno")
+    assert os.path.getsize(mp3_path) == size
+
+
+def test_transaction_skips_write_when_nothing_changed(mp3_path):
+    with TagTransaction(mp3_path) as tags:
+        tags.set(title="Title", artist="Artist")
+
+    tags = TagTransaction(mp3_path)
+    tags.set(title="Title", artist="Artist")
+    assert not tags.dirty
+    assert tags.commit() is False
+    assert tags.summary() == {
+        "title": "Title", "artist": "Artist", "year": "", "genre": "", "cover": False
+    }
+
+
+################################################
+# Bulk retag
+################################################
+
+from modules.organize.retag import retag_library, retag_file
+
+
+def test_retag_library_dry_run_then_apply(tmp_path):
+    root = tmp_path / "pool"
+    (root / "House").mkdir(parents=True)
+    messy = root / "House" / "Artist - Song (Official Video).mp3"
+    messy.write_bytes(MP3_FRAME * 20)
+    clean = root / "House" / "clean.mp3"
+    clean.write_bytes(MP3_FRAME * 20)
+    with TagTransaction(str(clean)) as tags:
+        tags.set(title="Clean", artist="Someone", year="2020", genre="House")
+    clean_mtime = os.path.getmtime(clean)
+
+    counts = retag_library(str(root), dry_run=True, workers=2)
+    assert counts == {"scanned": 2, "changed": 1, "failed": 0}
+    assert os.path.getsize(messy) == len(MP3_FRAME) * 20
+
+    counts = retag_library(str(root), dry_run=False, workers=2)
+    assert counts["changed"] == 1
+    assert TagTransaction(str(messy)).summary() == {
+        "title": "Song", "artist": "Artist", "year": "",
+        "genre": "Unknown Genre", "cover": False
+    }
+    assert os.path.getmtime(clean) == clean_mtime
+
+    # A second run finds nothing left to change.
+    _, changes, error = retag_file(str(messy))
+    assert changes == {} and error is None
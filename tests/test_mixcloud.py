@@ -14,6 +14,7 @@ Covers:
 """
 
 import os
+import json
 import sys
 import pytest
 import shutil
@@ -215,7 +216,9 @@ def test_fake_upload_track(mock_post, tmp_path):
     from unittest.mock import patch as patch2, MagicMock
     import modules.mixcloud.uploader as mc_upload  # Import the module, not just the name
 
-    with patch2("modules.mixcloud.uploader.ACCESS_TOKEN", new="FAKE_TOKEN"):
+    metrics_file = tmp_path / "metrics.jsonl"
+    with patch2("modules.mixcloud.uploader.ACCESS_TOKEN", new="FAKE_TOKEN"), \
+            patch2("modules.mixcloud.transfer.UPLOAD_METRICS_FILE", new=str(metrics_file)):
         # Prepare track & cover
         track_path = tmp_path / "MyMix_2025-02-02.mp3"
         cover_path = tmp_path / "cover_1.jpg"
@@ -244,7 +247,408 @@ def test_fake_upload_track(mock_post, tmp_path):
         _, kwargs = mock_post.call_args
         assert kwargs["params"].get("access_token") == "FAKE_TOKEN"
 
-        data_sent = kwargs["data"]
+        assert kwargs["headers"]["Content-Type"].startswith("multipart/form-data; boundary=")
+        assert kwargs["data"].file_fields == ["mp3", "picture"]
+        data_sent = kwargs["data"].fields
         assert data_sent["name"].startswith("Test Title #1 | 2025-02-02")
         assert data_sent["description"] == "Test Desc"
-        assert data_sent["publish_date"] == "2025-02-02T12:00:00Z"
\ No newline at end of file
+        assert data_sent["publish_date"] == "2025-02-02T12:00:00Z"
+
+    metrics = json.loads(metrics_file.read_text())
+    assert metrics["file"] == "MyMix_2025-02-02.mp3" and metrics["status"] == "ok"
+    assert metrics["retries"] == 0
+
+# -----------------------------------------------------------------------------
+# 9) TEST SAVED ACCESS TOKEN
+# -----------------------------------------------------------------------------
+from modules.mixcloud import token_store
+import modules.mixcloud.uploader as mc_uploader
+
+
+def test_token_store_roundtrip_is_owner_only(tmp_path):
+    token_file = str(tmp_path / "config" / "token.json")
+    token_store.save_token("abc", token_file)
+    assert token_store.load_token(token_file) == "abc"
+    if os.name == "posix":
+        assert os.stat(token_file).st_mode & 0o777 == 0o600
+    token_store.clear_token(token_file)
+    assert token_store.load_token(token_file) is None
+
+
+@patch("modules.mixcloud.token_store.requests.get")
+def test_check_access_token(mock_get):
+    mock_get.return_value = MagicMock(ok=True)
+    assert token_store.check_access_token("t") is True
+    mock_get.return_value = MagicMock(ok=False, status_code=400,
+                                      json=lambda: {"error": {"type": "OAuthException"}})
+    assert token_store.check_access_token("t") is False
+    mock_get.return_value = MagicMock(ok=False, status_code=403,
+                                      json=lambda: {"error": {"type": "RateLimitException"}})
+    assert token_store.check_access_token("t") is None
+    mock_get.side_effect = requests.ConnectionError()
+    assert token_store.check_access_token("t") is None
+
+
+@patch("modules.mixcloud.uploader.start_oauth_server")
+@patch("modules.mixcloud.uploader.check_access_token", return_value=True)
+@patch("modules.mixcloud.uploader.load_token", return_value="saved")
+def test_ensure_access_token_reuses_saved_token(mock_load, mock_check, mock_server):
+    with patch("modules.mixcloud.uploader.ACCESS_TOKEN", new=None):
+        assert mc_uploader.ensure_access_token() == "saved"
+        assert mc_uploader.ACCESS_TOKEN == "saved"
+    mock_server.assert_not_called()
+
+
+@patch("modules.mixcloud.uploader.clear_token")
+@patch("modules.mixcloud.uploader.check_access_token", return_value=False)
+@patch("modules.mixcloud.uploader.load_token", return_value="stale")
+def test_ensure_access_token_reauthorizes_rejected_token(mock_load, mock_check, mock_clear):
+    def fake_oauth():
+        mc_uploader.ACCESS_TOKEN = "fresh"
+        mc_uploader.TOKEN_READY.set()
+
+    with patch("modules.mixcloud.uploader.ACCESS_TOKEN", new=None):
+        assert mc_uploader.ensure_access_token(interactive=False) is None
+        with patch("modules.mixcloud.uploader.start_oauth_server", side_effect=fake_oauth):
+            assert mc_uploader.ensure_access_token(timeout=5) == "fresh"
+    assert mock_clear.call_count == 2
+
+
+@patch("modules.mixcloud.uploader.start_oauth_server")
+@patch("modules.mixcloud.uploader.load_token", return_value=None)
+def test_ensure_access_token_times_out(mock_load, mock_server):
+    started = time.monotonic()
+    assert mc_uploader.ensure_access_token(timeout=0.1) is None
+    assert time.monotonic() - started < 2
+
+
+# -----------------------------------------------------------------------------
+# 10) TEST BATCH UPLOADS
+# -----------------------------------------------------------------------------
+def test_load_batch_spec_applies_overrides_and_validates(tmp_path):
+    spec_file = tmp_path / "batch.json"
+    spec_file.write_text('{"title_index": 2, "count": 3, "dates": ["2025-03-04"]}')
+    spec = mc_uploader.load_batch_spec(str(spec_file), {"count": 5, "start_mix": None})
+    assert spec["title_index"] == 2 and spec["count"] == 5
+    assert spec["start_mix"] == "auto" and spec["dates"] == ["2025-03-04"]
+
+    spec_file.write_text('{"titel_index": 2}')
+    with pytest.raises(ValueError):
+        mc_uploader.load_batch_spec(str(spec_file))
+    with pytest.raises(ValueError):
+        mc_uploader.load_batch_spec(None, {"count": 0})
+
+
+@patch("modules.mixcloud.uploader.preflight_plan", return_value=[])
+@patch("modules.mixcloud.uploader.upload_track", return_value=True)
+@patch("modules.mixcloud.uploader.ensure_access_token", return_value="token")
+@patch("modules.mixcloud.uploader.find_cover_images")
+@patch("modules.mixcloud.uploader.find_upload_tracks")
+@patch("modules.mixcloud.uploader.get_last_uploaded_date", return_value=None)
+@patch("modules.mixcloud.uploader.get_last_uploaded_mix_number", return_value=41)
+@patch("modules.mixcloud.uploader.load_titles_descriptions")
+def test_run_upload_batch_without_prompts(mock_titles, mock_last_num, mock_last_date, mock_tracks,
+                                          mock_covers, mock_token, mock_upload, mock_preflight, tmp_path):
+    mock_titles.return_value = [{"title": "A", "description": "a"}, {"title": "B", "description": "b"}]
+    mock_tracks.return_value = (["/m/Mix_2025-01-01.mp3", "/m/Mix_2025-01-08.mp3", "/m/Mix_2025-01-15.mp3"], False)
+    mock_covers.return_value = ["/c/42.jpg", "/c/43.jpg"]
+    spec = mc_uploader.load_batch_spec(None, {"title_index": 2, "count": 2, "dates": ["2025-06-03", "2025-06-06"]})
+
+    with patch("modules.mixcloud.uploader.EXTERNAL_TRACK_DIR", new=str(tmp_path)), \
+         patch("modules.mixcloud.uploader.LOCAL_TRACK_DIR", new=str(tmp_path)), \
+         patch("builtins.input", side_effect=AssertionError("prompted")):
+        assert mc_uploader.run_upload_batch(spec) == (2, 0)
+
+    calls = [c.args[:5] + (c.kwargs["publish_date"], c.kwargs["consume_date"]) for c in mock_upload.call_args_list]
+    assert calls == [
+        ("/m/Mix_2025-01-01.mp3", "/c/42.jpg", 42, "B", "b", "2025-06-03T16:00:00Z", False),
+        ("/m/Mix_2025-01-08.mp3", "/c/43.jpg", 43, "B", "b", "2025-06-06T16:00:00Z", False),
+    ]
+
+
+# -----------------------------------------------------------------------------
+# 11) TEST PUBLISH SCHEDULE
+# -----------------------------------------------------------------------------
+import pytz
+from modules.mixcloud.schedule import PublishSchedule, parse_weekdays
+
+
+def _schedule(tmp_path, **kwargs):
+    options = dict(days="Tue,Fri", start="2025-03-01", hour=12, minute=0,
+                   timezone="US/Eastern", db_path=str(tmp_path / "slots.db"))
+    options.update(kwargs)
+    return PublishSchedule(**options)
+
+
+def test_schedule_slots_keep_local_time_across_dst(tmp_path):
+    with _schedule(tmp_path) as schedule:
+        slots = list(schedule.slots())[:4]
+    # DST starts 2025-03-09: noon Eastern moves from 17:00Z to 16:00Z.
+    assert slots == ["2025-03-04T17:00:00Z", "2025-03-07T17:00:00Z",
+                     "2025-03-11T16:00:00Z", "2025-03-14T16:00:00Z"]
+    assert parse_weekdays("friday, Tue") == [1, 4]
+    with pytest.raises(ValueError):
+        parse_weekdays("Tue,Funday")
+
+
+def test_schedule_claims_are_unique_and_releasable(tmp_path):
+    now = datetime.datetime(2025, 3, 5, tzinfo=pytz.utc)
+    first = _schedule(tmp_path)
+    second = _schedule(tmp_path)  # another run sharing the same store
+    assert first.peek(2, now=now) == ["2025-03-07T17:00:00Z", "2025-03-11T16:00:00Z"]
+    assert first.claim("a", now=now) == "2025-03-07T17:00:00Z"
+    assert second.claim("b", now=now) == "2025-03-11T16:00:00Z"
+    first.release("2025-03-07T17:00:00Z")
+    assert second.peek(1, now=now) == ["2025-03-07T17:00:00Z"]
+    first.close()
+    second.close()
+
+
+@patch("modules.mixcloud.uploader.upload_track", side_effect=[True, False, True])
+def test_upload_plan_claims_schedule_slots(mock_upload, tmp_path):
+    plan = [{"track": f"/m/{i}.mp3", "cover": None, "mix_number": i, "publish_date": None} for i in range(3)]
+    with _schedule(tmp_path, start=datetime.date.today() + datetime.timedelta(days=1)) as schedule:
+        expected = schedule.peek(2)
+        assert mc_uploader.upload_plan(plan, "T", "D", False, schedule=schedule) == (2, 1)
+        dates = [c.kwargs["publish_date"] for c in mock_upload.call_args_list]
+        # The failed upload gave its slot back to the next track.
+        assert dates == [expected[0], expected[1], expected[1]]
+        assert all(c.kwargs["consume_date"] is False for c in mock_upload.call_args_list)
+
+
+@patch("modules.mixcloud.uploader.upload_track", return_value=True)
+def test_upload_plan_stops_when_schedule_is_full(mock_upload):
+    plan = [{"track": f"/m/{i}.mp3", "cover": None, "mix_number": i, "publish_date": None} for i in range(3)]
+    schedule = MagicMock()
+    schedule.claim.side_effect = ["2025-03-07T17:00:00Z", None]
+    assert mc_uploader.upload_plan(plan, "T", "D", False, schedule=schedule) == (1, 2)
+    # Nothing went out without a publish date.
+    assert [c.kwargs["publish_date"] for c in mock_upload.call_args_list] == ["2025-03-07T17:00:00Z"]
+
+
+# -----------------------------------------------------------------------------
+# 12) TEST UPLOAD PRE-FLIGHT
+# -----------------------------------------------------------------------------
+from PIL import Image
+from modules.mixcloud.preflight import probe_track, probe_cover, preflight_plan
+
+MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413  # 128 kbps, ~26 ms
+
+
+def test_probe_track_checks_header_and_duration(tmp_path):
+    mix = tmp_path / "mix.mp3"
+    mix.write_bytes(MP3_FRAME * 2400)  # ~63 s
+    info, errors, warnings = probe_track(str(mix))
+    assert errors == [] and info["bitrate"] == 128 and info["duration"] > 60
+
+    short = tmp_path / "short.mp3"
+    short.write_bytes(MP3_FRAME * 100)
+    assert "under" in probe_track(str(short))[1][0]
+
+    (tmp_path / "empty.mp3").write_bytes(b"")
+    assert probe_track(str(tmp_path / "empty.mp3"))[1] == ["file is empty"]
+    (tmp_path / "junk.mp3").write_bytes(b"not audio at all" * 100)
+    assert probe_track(str(tmp_path / "junk.mp3"))[1]
+
+
+@patch("modules.mixcloud.preflight.MIXCLOUD_COVER_MAX_DIMENSION", 100)
+def test_probe_cover_reencodes_oversized_or_odd_formats(tmp_path):
+    ok = tmp_path / "1.jpg"
+    Image.new("RGB", (80, 80)).save(ok, "JPEG")
+    assert probe_cover(str(ok), str(tmp_path / "out"))[0] == str(ok)
+
+    big = tmp_path / "2.png"
+    Image.new("RGB", (400, 400)).save(big, "PNG")
+    path, errors, warnings = probe_cover(str(big), str(tmp_path / "out"))
+    assert errors == [] and os.path.dirname(path) == str(tmp_path / "out")
+    assert os.path.basename(path).startswith("2-") and path.endswith(".jpg")
+    with Image.open(path) as img:
+        assert img.format == "JPEG" and img.size == (100, 100)
+
+    # Same name in another folder: a separate copy, nothing overwritten.
+    (tmp_path / "other").mkdir()
+    Image.new("RGB", (300, 300)).save(tmp_path / "other" / "2.png", "PNG")
+    other = probe_cover(str(tmp_path / "other" / "2.png"), str(tmp_path / "out"))[0]
+    assert other != path and os.path.exists(path)
+
+    gif = tmp_path / "3.gif"
+    Image.new("P", (50, 50)).save(gif, "GIF")
+    assert os.path.basename(probe_cover(str(gif), str(tmp_path / "out"))[0]).startswith("3-")
+
+    (tmp_path / "4.jpg").write_bytes(b"broken")
+    assert probe_cover(str(tmp_path / "4.jpg"))[1]
+
+
+def test_preflight_plan_reports_every_problem_before_upload(tmp_path):
+    good, bad = tmp_path / "good.mp3", tmp_path / "bad.mp3"
+    good.write_bytes(MP3_FRAME * 2400)
+    bad.write_bytes(b"")
+    (tmp_path / "c.jpg").write_bytes(b"broken")
+    Image.new("P", (50, 50)).save(tmp_path / "3.gif", "GIF")
+    plan = [
+        {"track": str(good), "cover": None, "mix_number": 1, "publish_date": None},
+        {"track": str(bad), "cover": str(tmp_path / "c.jpg"), "mix_number": 2, "publish_date": None},
+        {"track": str(good), "cover": str(tmp_path / "3.gif"), "mix_number": 3, "publish_date": None},
+    ]
+    errors = preflight_plan(plan, workers=2, out_dir=str(tmp_path / "out"))
+    assert len(errors) == 2 and all(e.startswith("bad.mp3") for e in errors)
+    assert plan[0]["size"] == len(MP3_FRAME) * 2400
+    # The re-encoded copy is uploaded; the original is what gets archived.
+    assert plan[2]["source_cover"] == str(tmp_path / "3.gif")
+    assert os.path.dirname(plan[2]["cover"]) == str(tmp_path / "out")
+    assert "source_cover" not in plan[1]
+
+
+# -----------------------------------------------------------------------------
+# 13) TEST UPLOAD BANDWIDTH + TELEMETRY
+# -----------------------------------------------------------------------------
+import email
+from core.rate_limit import BandwidthLimiter, parse_time_windows
+from modules.mixcloud.transfer import MultipartStream, TransferMeter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_multipart_stream_is_a_valid_streamed_body(tmp_path):
+    track = tmp_path / "mix.mp3"
+    track.write_bytes(b"\x00\x01" * 50000)
+    body = MultipartStream({"name": "Mix #1"}, [("mp3", str(track))])
+    chunks = list(body)
+    raw = b"".join(chunks)
+    body.close()
+    assert len(chunks) > 1 and len(raw) == len(body)
+
+    message = email.message_from_bytes(
+        f"Content-Type: {body.content_type}\r\n\r\n".encode() + raw
+    )
+    name, upload = message.get_payload()
+    assert name.get_payload() == "Mix #1"
+    assert upload.get_filename() == "mix.mp3"
+    assert upload.get_payload(decode=True) == track.read_bytes()
+
+
+def test_bandwidth_limiter_follows_time_of_day_windows():
+    assert parse_time_windows("18:00-23:30=4, 23:30-07:00=0") == [(1080, 1410, 4.0), (1410, 420, 0.0)]
+    with pytest.raises(ValueError):
+        parse_time_windows("evening=4")
+
+    clock = FakeClock()
+    local = {"time": datetime.datetime(2025, 1, 1, 12, 0)}
+    limiter = BandwidthLimiter(
+        1000, parse_time_windows("18:00-02:00=0"),
+        now=lambda: local["time"], clock=clock, sleep=clock.sleep
+    )
+    for _ in range(4):
+        limiter.throttle(1000)
+    assert clock.now == pytest.approx(3.0)  # one second of burst, then 1000 B/s
+
+    local["time"] = datetime.datetime(2025, 1, 1, 1, 0)  # inside the unlimited window
+    clock.now += 1.0
+    assert limiter.throttle(10 ** 6) == 0.0
+
+
+def test_transfer_meter_reports_average_and_peak():
+    clock = FakeClock()
+    meter = TransferMeter(clock=clock)
+    meter.start()
+    for rate in (125000, 500000, 125000):  # 1, 4 and 1 Mbit during three seconds
+        clock.now += 1.0
+        meter.add(rate)
+    meter.finish()
+    stats = meter.summary()
+    assert stats["bytes"] == 750000 and stats["seconds"] == 3.0
+    assert stats["avg_mbps"] == 2.0 and stats["peak_mbps"] == 4.0
+
+
+@patch("modules.mixcloud.uploader.time.sleep")
+@patch("modules.mixcloud.uploader.upload_track", side_effect=[{"retry_after": 60}, True])
+def test_upload_plan_counts_retries(mock_upload, mock_sleep):
+    plan = [{"track": "/m/1.mp3", "cover": None, "mix_number": 1, "publish_date": None}]
+    assert mc_uploader.upload_plan(plan, "T", "D", False) == (1, 0)
+    assert [c.kwargs["retries"] for c in mock_upload.call_args_list] == [0, 1]
+
+
+# -----------------------------------------------------------------------------
+# 14) TEST AGAINST THE LOCAL FAKE MIXCLOUD SERVER
+# -----------------------------------------------------------------------------
+import hashlib
+from modules.mixcloud.fake_server import FakeMixcloudServer, MultipartReader, parse_faults
+
+
+def test_multipart_reader_handles_any_chunking(tmp_path):
+    track = tmp_path / "mix.mp3"
+    track.write_bytes(bytes(range(256)) * 300 + b"\r\n--")
+    body = MultipartStream({"name": "Mix #1", "description": "line\r\nbreak"}, [("mp3", str(track))])
+    raw = b"".join(body)
+    body.close()
+    for step in (1, 7, 4096, len(raw)):
+        reader = MultipartReader(body.boundary.encode())
+        for i in range(0, len(raw), step):
+            reader.feed(raw[i:i + step])
+        assert reader.complete
+        assert reader.fields() == {"name": "Mix #1", "description": "line\r\nbreak"}
+        mp3 = reader.files()["mp3"]
+        assert mp3["size"] == track.stat().st_size
+        assert mp3["digest"] == hashlib.blake2b(track.read_bytes(), digest_size=16).hexdigest()
+
+
+def test_fake_server_oauth_and_chunked_upload():
+    assert parse_faults("ok, rate_limit:30, 503, slow:2") == [
+        ("ok", None), ("rate_limit", 30.0), ("error", 503), ("slow", 2.0)
+    ]
+    with pytest.raises(ValueError):
+        parse_faults("explode")
+
+    with FakeMixcloudServer() as server, \
+            patch("modules.mixcloud.uploader.MIXCLOUD_OAUTH_URL", f"{server.url}/oauth"), \
+            patch("modules.mixcloud.uploader.CLIENT_ID", "id"), \
+            patch("modules.mixcloud.uploader.CLIENT_SECRET", "secret"), \
+            patch("modules.mixcloud.token_store.MIXCLOUD_ME_URL", f"{server.url}/me/"):
+        token = mc_uploader.get_access_token("code")
+        assert token_store.check_access_token(token) is True
+        assert token_store.check_access_token("nope") is False
+
+        body = MultipartStream({"name": "Chunked"}, [])
+        resp = requests.post(
+            f"{server.url}/upload/", params={"access_token": token},
+            data=iter(list(body)), headers={"Content-Type": body.content_type}
+        )
+        assert resp.status_code == 400  # no mp3 part
+        assert server.uploads[0]["fields"] == {"name": "Chunked"}
+
+
+@patch("modules.mixcloud.uploader.time.sleep")
+def test_upload_plan_end_to_end_with_injected_faults(mock_sleep, tmp_path):
+    tracks = []
+    for i in (1, 2):
+        path = tmp_path / f"Mix_2025-01-0{i}.mp3"
+        path.write_bytes(os.urandom(200000))
+        tracks.append(path)
+    plan = [
+        {"track": str(p), "cover": None, "mix_number": i, "publish_date": None}
+        for i, p in enumerate(tracks, 1)
+    ]
+    with FakeMixcloudServer(faults="rate_limit:30,503,slow:0.2") as server, \
+            patch("modules.mixcloud.uploader.MIXCLOUD_API_URL", server.url), \
+            patch("modules.mixcloud.uploader.ACCESS_TOKEN", "fake-token"), \
+            patch("modules.mixcloud.uploader.UPLOAD_LINKS_FILE", str(tmp_path / "links.txt")), \
+            patch("modules.mixcloud.transfer.UPLOAD_METRICS_FILE", str(tmp_path / "metrics.jsonl")):
+        # Rate limited, then a 503 for the first track; the second succeeds slowly.
+        assert mc_uploader.upload_plan(plan, "Title", "Desc", False, consume_dates=False) == (1, 1)
+
+    assert [u["status"] for u in server.uploads] == [403, 503, 200]
+    assert all(u["files"]["mp3"]["size"] == 200000 for u in server.uploads)
+    assert server.uploads[2]["fields"]["name"] == "Title #2 | 2025-01-02"
+    assert (tmp_path / "links.txt").read_text() == "https://www.mixcloud.com/djcli-fake/title-2-2025-01-02/\n"
+    metrics = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert [(m["status"], m["retries"]) for m in metrics] == [("rate_limited", 0), ("error", 1), ("ok", 0)]
+    mock_sleep.assert_any_call(60)
@@ -84,4 +84,450 @@
 #         organize_main()
 
 #     # Check for a warning about missing download folder
-#     assert any("not found" in call_args[0][0] for call_args in mock_print.call_args_list)
\ No newline at end of file
+#     assert any("not found" in call_args[0][0] for call_args in mock_print.call_args_list)
+
+################################################
+# Watch mode (org_dl --watch)
+################################################
+
+import os
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from modules.organize.watcher import WatchOrganizer, PollingWatcher, InotifyWatcher
+from core.file_utils import claim_file
+
+
+@patch("modules.organize.watcher.open_fingerprint_index", return_value=None)
+def test_watch_organizer_moves_settled_files_in_batches(mock_index, tmp_path):
+    downloads = tmp_path / "Downloads"
+    pool = tmp_path / "pool"
+    downloads.mkdir()
+    now = [0.0]
+    organizer = WatchOrganizer(
+        str(downloads), strategy=str(pool), settle_seconds=5,
+        batch_size=2, batch_seconds=30, clock=lambda: now[0]
+    )
+
+    (downloads / "a.mp3").write_bytes(b"a")
+    (downloads / "b.mp3.part").write_bytes(b"b")
+    (downloads / "notes.txt").write_text("x")
+    assert organizer.tick({"a.mp3", "b.mp3.part", "notes.txt"}) == []
+    assert list(organizer.pending) == ["a.mp3"]
+
+    # Still being written: the settle timer restarts.
+    now[0] = 4
+    (downloads / "a.mp3").write_bytes(b"aa")
+    organizer.tick()
+    now[0] = 8
+    assert organizer.tick() == []
+
+    # Settled, but the batch waits for a second file or batch_seconds.
+    now[0] = 10
+    organizer.tick()
+    assert organizer.batch == ["a.mp3"]
+
+    # Downloaded, but the downloader is still tagging it.
+    os.rename(downloads / "b.mp3.part", downloads / "b.mp3")
+    lock = claim_file(str(downloads / "b.mp3"))
+    organizer.tick({"b.mp3", os.path.basename(lock)})
+    now[0] = 20
+    assert organizer.tick() == [] and "b.mp3" in organizer.pending
+    os.remove(lock)
+    organizer.tick()
+    now[0] = 26
+    moved = organizer.tick()
+    assert sorted(os.path.basename(p) for p in moved) == ["a.mp3", "b.mp3"]
+    assert sorted(os.listdir(pool)) == ["a.mp3", "b.mp3"]
+    assert os.listdir(downloads) == ["notes.txt"]
+
+    # The batch was logged, so it can be undone like an interactive run.
+    assert undo_last_run() == 2
+    assert sorted(os.listdir(downloads)) == ["a.mp3", "b.mp3", "notes.txt"]
+
+
+def test_polling_watcher_lists_only_on_change(tmp_path):
+    watcher = PollingWatcher(str(tmp_path))
+    (tmp_path / "a.mp3").write_bytes(b"a")
+    assert watcher.changed_names() == {"a.mp3"}
+    assert watcher.changed_names() == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+def test_inotify_watcher_reports_new_files(tmp_path):
+    watcher = InotifyWatcher(str(tmp_path))
+    try:
+        (tmp_path / "new.mp3").write_bytes(b"data")
+        assert "new.mp3" in watcher.wait(2)
+    finally:
+        watcher.close()
+
+
+################################################
+# Routing rules
+################################################
+
+from mutagen.id3 import ID3, TCON, TPE1, TBPM, TKEY
+
+from modules.organize.rules import RuleSet, RuleError, TrackInfo, load_rules, route_files
+
+MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+
+
+def _tagged_mp3(path, genre="", artist="", bpm=None, key=""):
+    path.write_bytes(MP3_FRAME * 10)
+    tags = ID3()
+    if genre:
+        tags.add(TCON(encoding=3, text=genre))
+    if artist:
+        tags.add(TPE1(encoding=3, text=artist))
+    if bpm:
+        tags.add(TBPM(encoding=3, text=str(bpm)))
+    if key:
+        tags.add(TKEY(encoding=3, text=key))
+    tags.save(str(path))
+    return str(path)
+
+
+def test_ruleset_first_match_wins_and_templates_dest():
+    rules = RuleSet([
+        {"name": "Amapiano", "match": {"genre": ["Amapiano", "afro house"]}, "dest": "Amapiano"},
+        {"name": "DnB", "match": {"bpm": [160, 180]}, "dest": "DnB/{key}/{bpm}"},
+        {"match": {"source": "soundcloud", "artist": "re:^dj "}, "dest": "SC/{artist}"},
+    ])
+    assert rules.route(TrackInfo("a", genre="AfroHouse"), "/pool") == ("/pool/Amapiano", "Amapiano")
+    assert rules.route(TrackInfo("b", bpm=174.4, key="8A"), "/pool") == ("/pool/DnB/8A/174", "DnB")
+    assert rules.route(TrackInfo("c", bpm=180), "/pool") == (None, None)
+    assert rules.route(TrackInfo("d", artist="DJ Shadow", source="soundcloud"), "/pool")[0] == "/pool/SC/DJ Shadow"
+    assert rules.route(TrackInfo("e", artist="DJ Shadow", source="youtube"), "/pool") == (None, None)
+
+
+def test_ruleset_rejects_malformed_rules():
+    with pytest.raises(RuleError):
+        RuleSet([{"match": {"tempo": 120}, "dest": "x"}])
+    with pytest.raises(RuleError):
+        RuleSet([{"match": {"bpm": 120}, "dest": "x"}])
+    for dest in ("Crates/{label}", "Crates/{}", "Crates/{genre.upper}", "Crates/{genre[0]}", "Crates/{genre"):
+        with pytest.raises(RuleError):
+            RuleSet([{"match": {"genre": "house"}, "dest": dest}])
+    assert len(RuleSet([{"match": {"genre": "house"}, "dest": "{genre:.5}/{year} {{live}}"}])) == 1
+
+
+def test_load_rules_ignores_missing_or_invalid_file(tmp_path):
+    assert load_rules(str(tmp_path / "missing.json")) is None
+    bad = tmp_path / "rules.json"
+    bad.write_text('{"rules": [{"match": {"genre": "re:("}, "dest": "x"}]}')
+    assert load_rules(str(bad)) is None
+    good = tmp_path / "good.json"
+    good.write_text('{"rules": [{"match": {"genre": "house"}, "dest": "House"}]}')
+    assert len(load_rules(str(good))) == 1
+
+
+def test_route_files_reads_tags_once_per_file(tmp_path):
+    house = _tagged_mp3(tmp_path / "house.mp3", genre="House", artist="A")
+    dnb = _tagged_mp3(tmp_path / "dnb.mp3", genre="Drum & Bass", bpm=174, key="5A")
+    other = _tagged_mp3(tmp_path / "other.mp3", genre="Pop")
+    rules = RuleSet([
+        {"match": {"genre": "house"}, "dest": "House"},
+        {"match": {"bpm": [160, None], "key": "re:^\\d+A$"}, "dest": "DnB/{key}"},
+        {"match": {"source": "youtube"}, "dest": "YouTube"},
+    ])
+
+    routed, unmatched = route_files([house, dnb, other], rules, {"other.mp3": "youtube"}, base="/pool")
+    assert routed == {"/pool/House": [house], "/pool/DnB/5A": [dnb], "/pool/YouTube": [other]}
+    assert unmatched == []
+
+    routed, unmatched = route_files([other], rules, base="/pool")
+    assert routed == {} and unmatched == [other]
+
+
+@patch("modules.organize.watcher.load_download_sources", return_value={})
+@patch("modules.organize.watcher.open_fingerprint_index", return_value=None)
+def test_watch_organizer_applies_rules_before_strategy(mock_index, mock_sources, tmp_path):
+    downloads = tmp_path / "Downloads"
+    downloads.mkdir()
+    _tagged_mp3(downloads / "house.mp3", genre="House")
+    _tagged_mp3(downloads / "pop.mp3", genre="Pop")
+    rules = RuleSet([{"match": {"genre": "house"}, "dest": str(tmp_path / "House")}])
+    organizer = WatchOrganizer(str(downloads), strategy=str(tmp_path / "pool"), ruleset=rules)
+    organizer.batch = ["house.mp3", "pop.mp3"]
+
+    organizer.flush()
+    assert os.listdir(tmp_path / "House") == ["house.mp3"]
+    assert os.listdir(tmp_path / "pool") == ["pop.mp3"]
+
+
+################################################
+# Move engine
+################################################
+
+import errno
+import threading
+
+from core import move_engine
+from core.move_engine import MoveError, copy_verified, move_file, move_files
+from modules.organize.organize_files import move_audio_files
+
+
+def test_move_file_renames_on_same_device(tmp_path):
+    src = tmp_path / "a.mp3"
+    src.write_bytes(b"audio")
+    inode = src.stat().st_ino
+    assert move_file(str(src), str(tmp_path / "b.mp3")) == 0
+    assert (tmp_path / "b.mp3").stat().st_ino == inode
+    assert not src.exists()
+
+
+@patch("core.move_engine.same_device", return_value=False)
+def test_move_files_copies_across_devices_in_parallel(mock_same, tmp_path):
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    pairs = []
+    for i in range(5):
+        src = tmp_path / f"{i}.mp3"
+        src.write_bytes(os.urandom(100_000 + i))
+        pairs.append((str(src), str(pool / f"{i}.mp3")))
+    expected = {dest: open(src, "rb").read() for src, dest in pairs}
+
+    done = []
+    stats = move_files(pairs, workers=3, on_done=lambda s, d, e: done.append((d, e)), buffer_size=4096)
+    assert stats.copied == 5 and stats.renamed == 0 and stats.failed == 0
+    assert stats.bytes_copied == sum(len(v) for v in expected.values())
+    assert sorted(done) == sorted((dest, None) for dest in expected)
+    for dest, data in expected.items():
+        assert open(dest, "rb").read() == data
+    assert sorted(os.listdir(tmp_path)) == ["pool"]
+
+
+@patch("core.move_engine.same_device", return_value=False)
+def test_move_files_reports_each_copy_as_it_finishes(mock_same, tmp_path):
+    first_done = threading.Event()
+
+    def slow_first(src, dest, *args):
+        if src == "slow":
+            assert first_done.wait(5)
+        return 1
+
+    done = []
+
+    def on_done(src, dest, error):
+        done.append(src)
+        first_done.set()
+
+    with patch("core.move_engine.move_file", side_effect=slow_first):
+        move_files([("slow", "a"), ("fast", "b")], workers=2, on_done=on_done)
+    # The fast copy is reported while the slow one is still running.
+    assert done == ["fast", "slow"]
+
+
+def test_copy_verified_falls_back_when_fast_copy_unsupported(tmp_path):
+    src = tmp_path / "a.mp3"
+    src.write_bytes(b"x" * 10_000)
+
+    def unsupported(*args):
+        raise OSError(errno.ENOSYS, "not supported")
+
+    with patch.object(move_engine.os, "copy_file_range", unsupported, create=True), \
+         patch.object(move_engine.os, "sendfile", unsupported, create=True):
+        assert copy_verified(str(src), str(tmp_path / "b.mp3"), buffer_size=1024) == 10_000
+    assert (tmp_path / "b.mp3").read_bytes() == src.read_bytes()
+
+
+@patch("core.move_engine.same_device", return_value=False)
+def test_failed_verification_keeps_source(mock_same, tmp_path):
+    src = tmp_path / "a.mp3"
+    src.write_bytes(b"audio")
+    digests = iter([b"1", b"2"])
+    with patch("core.move_engine._file_digest", side_effect=lambda *a: next(digests)):
+        with pytest.raises(MoveError):
+            move_file(str(src), str(tmp_path / "pool.mp3"), verify="checksum")
+    assert src.read_bytes() == b"audio"
+    assert sorted(os.listdir(tmp_path)) == ["a.mp3"]
+
+
+def test_move_audio_files_reserves_unique_names(tmp_path):
+    (tmp_path / "one").mkdir()
+    (tmp_path / "two").mkdir()
+    pool = tmp_path / "pool"
+    pool.mkdir()
+    (pool / "song.mp3").write_bytes(b"existing")
+    (tmp_path / "one" / "song.mp3").write_bytes(b"1")
+    (tmp_path / "two" / "song.mp3").write_bytes(b"2")
+
+    moved, left = move_audio_files({str(pool): [str(tmp_path / "one" / "song.mp3"),
+                                                str(tmp_path / "two" / "song.mp3")]})
+    assert left == []
+    assert sorted(os.listdir(pool)) == ["song (1).mp3", "song (2).mp3", "song.mp3"]
+    assert (pool / "song.mp3").read_bytes() == b"existing"
+
+
+################################################
+# Operation log / org_dl --undo
+################################################
+
+from modules.organize.oplog import OrganizeLog, read_run, undo_last_run
+
+
+def test_organize_log_records_plan_and_undo_restores(tmp_path):
+    downloads, pool, logs = tmp_path / "Downloads", tmp_path / "pool", tmp_path / "logs"
+    downloads.mkdir()
+    pool.mkdir()
+    for name in ("a.mp3", "b.mp3"):
+        (downloads / name).write_bytes(name.encode())
+    (pool / "a.mp3").write_bytes(b"old")
+
+    with OrganizeLog.create(str(logs)) as log:
+        moved, left = move_audio_files(
+            {str(pool): [str(downloads / "a.mp3"), str(downloads / "b.mp3")]}, log=log
+        )
+    run = read_run(log.path)
+    assert run["planned"] == [(str(downloads / "a.mp3"), str(pool / "a (1).mp3")),
+                              (str(downloads / "b.mp3"), str(pool / "b.mp3"))]
+    assert sorted(run["done"]) == run["planned"] and run["finished"]
+
+    assert undo_last_run(str(logs)) == 2
+    assert sorted(os.listdir(downloads)) == ["a.mp3", "b.mp3"]
+    assert os.listdir(pool) == ["a.mp3"]
+    assert (pool / "a.mp3").read_bytes() == b"old"
+    assert undo_last_run(str(logs)) == 0
+
+
+def test_merge_drops_are_logged_and_undone(tmp_path):
+    from modules.organize.duplicates import resolve_duplicate
+
+    downloads, pool, logs = tmp_path / "Downloads", tmp_path / "pool", tmp_path / "logs"
+    downloads.mkdir()
+    pool.mkdir()
+    (downloads / "a.mp3").write_bytes(b"320k")
+    (pool / "a.mp3").write_bytes(b"128k")
+
+    with patch("modules.organize.organize_files.check_pool_for_duplicates",
+               return_value=(None, [(str(pool / "a.mp3"), 0.97)])), \
+         patch("modules.organize.organize_files.resolve_duplicate",
+               side_effect=lambda f, m, i, trash=None: resolve_duplicate(f, m, i, policy="merge", trash=trash)), \
+         patch("modules.organize.duplicates.get_bitrate",
+               side_effect=lambda p: 320000 if p.startswith(str(downloads)) else 128000), \
+         patch("modules.organize.duplicates.send2trash") as mock_trash, \
+         OrganizeLog.create(str(logs)) as log:
+        moved, _ = move_audio_files({str(pool): [str(downloads / "a.mp3")]}, index=MagicMock(), log=log)
+
+    mock_trash.assert_not_called()
+    held = os.path.join(log.trash_dir, "a.mp3")
+    assert moved == [str(pool / "a.mp3")] and (pool / "a.mp3").read_bytes() == b"320k"
+    assert read_run(log.path)["done"] == [(str(pool / "a.mp3"), held),
+                                          (str(downloads / "a.mp3"), str(pool / "a.mp3"))]
+
+    index = MagicMock()
+    with patch("modules.organize.oplog.index_file") as mock_index_file:
+        assert undo_last_run(str(logs), index=index) == 2
+    assert (downloads / "a.mp3").read_bytes() == b"320k"
+    assert (pool / "a.mp3").read_bytes() == b"128k"
+    # The restored pool copy is fingerprinted again; its trash folder is gone.
+    mock_index_file.assert_called_once_with(index, str(pool / "a.mp3"))
+    assert not os.path.exists(log.trash_dir)
+
+
+def test_old_trash_folders_are_purged(tmp_path):
+    from modules.organize.oplog import purge_trash
+
+    logs = tmp_path / "logs"
+    for i in range(3):
+        log = OrganizeLog(str(logs / f"organize-{i}.jsonl"))
+        os.makedirs(log.trash_dir)
+        open(os.path.join(log.trash_dir, "dropped.mp3"), "wb").close()
+        log.close()
+
+    assert purge_trash(str(logs), keep=2) == 1
+    assert sorted(os.listdir(logs)) == ["organize-0.jsonl", "organize-1.jsonl", "organize-1.trash",
+                                        "organize-2.jsonl", "organize-2.trash"]
+    with patch("modules.organize.oplog.ORGANIZE_TRASH_KEEP_RUNS", 1):
+        OrganizeLog.create(str(logs)).close()  # a new run empties all but the newest
+    assert [name for name in os.listdir(logs) if name.endswith(".trash")] == ["organize-2.trash"]
+    assert purge_trash(str(logs), keep=0) == 1
+    assert not [name for name in os.listdir(logs) if name.endswith(".trash")]
+
+
+def test_undo_of_interrupted_run_moves_back_completed_moves(tmp_path):
+    downloads, pool = tmp_path / "Downloads", tmp_path / "pool"
+    downloads.mkdir()
+    pool.mkdir()
+    (pool / "a.mp3").write_bytes(b"a")
+    (pool / "c.mp3").write_bytes(b"c")  # moved, but stopped before its line was written
+    (downloads / "d.mp3").write_bytes(b"d")  # never moved
+    log = OrganizeLog(str(tmp_path / "logs" / "organize-1.jsonl"))
+    log.plan([(str(downloads / "a.mp3"), str(pool / "a.mp3")),
+              (str(downloads / "c.mp3"), str(pool / "c.mp3")),
+              (str(downloads / "d.mp3"), str(pool / "d.mp3"))])
+    log.done(str(downloads / "a.mp3"), str(pool / "a.mp3"))
+    log._file.write('{"op": "do')  # crashed mid-line
+    log.close()
+
+    run = read_run(log.path)
+    assert len(run["planned"]) == 3 and len(run["done"]) == 1 and not run["finished"]
+    assert undo_last_run(str(tmp_path / "logs")) == 2
+    assert sorted(os.listdir(downloads)) == ["a.mp3", "c.mp3", "d.mp3"]
+    assert os.listdir(pool) == []
+    assert (str(downloads / "a.mp3"), str(pool / "a.mp3")) in read_run(log.path)["undone"]
+
+
+################################################
+# Library index
+################################################
+
+from core.library_index import LibraryIndex
+
+
+def test_library_index_refreshes_incrementally(tmp_path):
+    mixes = tmp_path / "mixes"
+    (mixes / "2024").mkdir(parents=True)
+    (mixes / "Mix 12 - 2024-03-01.mp3").write_bytes(b"a")
+    (mixes / "2024" / "Mix 13 - 2024-03-08.m4a").write_bytes(b"b")
+    (mixes / "notes.txt").write_text("x")
+    index = LibraryIndex(str(tmp_path / "library.db"), max_age=0)
+
+    assert index.refresh(str(mixes)) == (3, 0, 0)
+    entries = index.files(str(mixes), [".mp3", ".m4a"], refresh=False)
+    assert [(e.name, e.date, e.mix_number) for e in entries] == [
+        ("Mix 13 - 2024-03-08.m4a", "2024-03-08", 13),
+        ("Mix 12 - 2024-03-01.mp3", "2024-03-01", 12),
+    ]
+    assert [e.name for e in index.files(str(mixes), recursive=False, refresh=False)] == [
+        "Mix 12 - 2024-03-01.mp3", "notes.txt"
+    ]
+
+    with patch("core.library_index._read_tag_summary") as mock_tags:
+        mock_tags.return_value = (None, None, None, None)
+        assert index.refresh(str(mixes)) == (0, 0, 0)
+        (mixes / "notes.txt").unlink()
+        (mixes / "Mix 12 - 2024-03-01.mp3").write_bytes(b"changed")
+        assert index.refresh(str(mixes)) == (0, 1, 1)
+        assert mock_tags.call_count == 1
+    index.close()
+
+
+def test_library_index_reuses_recent_refresh(tmp_path):
+    (tmp_path / "a.mp3").write_bytes(b"a")
+    index = LibraryIndex(str(tmp_path / "library.db"), max_age=60)
+    assert len(index.files(str(tmp_path), [".mp3"], recursive=False)) == 1
+    (tmp_path / "b.mp3").write_bytes(b"b")
+    assert len(index.files(str(tmp_path), [".mp3"], recursive=False)) == 1
+    index.invalidate(str(tmp_path))
+    assert len(index.files(str(tmp_path), [".mp3"], recursive=False)) == 2
+    index.close()
+
+
+def test_library_index_keeps_sibling_folders_apart(tmp_path):
+    (tmp_path / "pool").mkdir()
+    (tmp_path / "pool2").mkdir()
+    (tmp_path / "pool" / "a.mp3").write_bytes(b"a")
+    (tmp_path / "pool2" / "b.mp3").write_bytes(b"b")
+    index = LibraryIndex(str(tmp_path / "library.db"), max_age=0)
+    index.refresh(str(tmp_path / "pool2"))
+    assert [e.name for e in index.files(str(tmp_path / "pool"))] == ["a.mp3"]
+    assert [e.name for e in index.files(str(tmp_path / "pool2"))] == ["b.mp3"]
+    index.close()
@@ -0,0 +1,104 @@
+# tests/test_tracing.py
+
+"""
+tests/test_tracing.py
+
+Tests for the tracing spans (core/tracing.py):
+- Nothing is recorded while tracing is off
+- Nested spans, self time, errors and threads
+- Chrome trace-event export and the --profile summary
+- yt_dlp hook spans for the network download and ffmpeg
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import pytest
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from core import tracing
+from core.tracing import span, traced
+from modules.download.downloader import YdlTraceHooks
+
+
+@pytest.fixture(autouse=True)
+def tracing_off():
+    yield
+    tracing.disable()
+    tracing.reset()
+
+
+@traced("tests.work")
+def work(seconds=0.0):
+    with span("tests.inner"):
+        time.sleep(seconds)
+    return "done"
+
+
+def test_disabled_tracing_records_nothing():
+    tracing.disable()
+    assert span("a") is span("b")
+    with span("a") as s:
+        s.set(items=3)
+    assert work() == "done"
+    assert tracing.summary() == []
+    assert work.__name__ == "work"
+
+
+def test_spans_nest_and_export_chrome_trace(tmp_path, capsys):
+    tracing.enable()
+    with span("tests.outer", items=2):
+        work(0.02)
+        work(0.0)
+    with pytest.raises(ValueError):
+        with span("tests.failing"):
+            raise ValueError("boom")
+    worker = threading.Thread(target=work, name="worker-1")
+    worker.start()
+    worker.join()
+
+    rows = {r["name"]: r for r in tracing.summary()}
+    assert rows["tests.work"]["count"] == 3 and rows["tests.inner"]["count"] == 3
+    assert rows["tests.outer"]["total"] >= 0.02
+    assert rows["tests.outer"]["self"] < rows["tests.outer"]["total"]
+    assert rows["tests.work"]["self"] <= rows["tests.work"]["total"] - rows["tests.inner"]["total"] + 1e-6
+
+    trace = tracing.chrome_trace()
+    complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert {e["name"] for e in complete} == {"tests.outer", "tests.work", "tests.inner", "tests.failing"}
+    failing = next(e for e in complete if e["name"] == "tests.failing")
+    assert failing["args"] == {"error": "ValueError"} and failing["cat"] == "tests"
+    names = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    assert "worker-1" in names
+
+    path = tracing.finish_profile("dl_audio", str(tmp_path / "trace.json"))
+    assert not tracing.is_enabled()
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)["traceEvents"]) == len(trace["traceEvents"])
+    out = capsys.readouterr().out
+    assert "tests.outer" in out and "trace.json" in out
+
+
+def test_ytdlp_hooks_time_download_and_postprocessing():
+    tracing.enable()
+    hooks = YdlTraceHooks()
+    with span("yt_dlp"):
+        hooks.progress({"status": "downloading"})
+        hooks.progress({"status": "downloading"})
+        hooks.progress({"status": "finished"})
+        hooks.postprocessor({"status": "started", "postprocessor": "FFmpegExtractAudio"})
+        hooks.postprocessor({"status": "started", "postprocessor": "FFmpegMetadata"})
+        hooks.postprocessor({"status": "finished", "postprocessor": "FFmpegExtractAudio"})
+        hooks.close()  # FFmpegMetadata never reported back
+
+    events = [e for e in tracing.chrome_trace()["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events].count("download.fetch") == 1
+    assert sorted(e["args"]["postprocessor"] for e in events if e["name"] == "download.postprocess") == [
+        "FFmpegExtractAudio", "FFmpegMetadata"
+    ]
+    assert events[-1]["name"] == "yt_dlp"